@@ -1,6 +1,5 @@
 import os
 import uuid
-import base64
 import urllib.parse
 import socket
 from dotenv import load_dotenv
@@ -8,6 +7,7 @@ from dotenv import load_dotenv
 # Load environment early so chains can pick up keys on import
 load_dotenv()
 
+from background import job_deadline, jobs
 from main import (
     load_latest_news,
     generate_titles_for_session,
@@ -15,10 +15,17 @@ from main import (
     generate_continuations_for_session,
     select_continuation,
     generate_final_and_image,
+    headline_pool,
 )
 from memory.session_memory import memory
+from memory.export import export_stream
+from observability.metrics import registry as metrics_registry
+from observability.profiling import install as install_profiling, profiled
+from observability.progress import progress_listener
+from tools.text_normalize import article_preview
 
 import dash
+import flask
 from dash import html, dcc, Output, Input, State, no_update
 import dash_bootstrap_components as dbc
 
@@ -34,12 +41,94 @@ def check_ollama(host_url: str, timeout: float = 2.0) -> bool:
         return False
 
 
+# Progress shown while a background job runs, per `main.py` step
+STEP_LABELS = {
+    "load_news": "Fetching headlines",
+    "titles": "Rewriting headlines",
+    "continuations": "Drafting continuations",
+    "story": "Writing the story",
+    "image": "Painting the image",
+}
+
+
+# Outputs a background job can set, keyed by component id in the job's result
+JOB_RESULT_OUTPUTS = [
+    ("status", "children"),
+    ("titles-area", "children"),
+    ("session-id", "data"),
+    ("article-area", "children"),
+    ("continuations-area", "children"),
+    ("final-story", "children"),
+    ("story-image", "src"),
+]
+# (component, prop) -> value while a job runs, and once it has finished or was cancelled
+JOB_RUNNING = {("job-poll", "disabled"): False, ("progress-row", "style"): {"display": "flex"}, ("load-btn", "disabled"): True}
+JOB_IDLE = [True, {"display": "none"}, False, None]
+JOB_START_OUTPUTS = list(JOB_RUNNING) + [("job", "data"), ("progress-bar", "value"), ("progress-text", "children")]
+
+
+def job_start_outputs():
+    return [Output(component, prop, allow_duplicate=True) for component, prop in JOB_START_OUTPUTS]
+
+
+def job_idle_outputs():
+    return [Output(component, prop, allow_duplicate=True) for component, prop in list(JOB_RUNNING) + [("job", "data")]]
+
+
+def start_job(running_job, fn, *args):
+    """Start `fn(set_progress, *args)` in the background (replacing a job still running) and show its progress."""
+    jobs.cancel(running_job)
+    return list(JOB_RUNNING.values()) + [jobs.submit(fn, *args), 0, "Starting..."]
+
+
+def error_alert(error):
+    return dbc.Alert([html.I(className="fas fa-exclamation-triangle me-2"), f"Error: {error}"], color="danger", is_open=True)
+
+
+def title_buttons(titles):
+    buttons = []
+    for i, t in enumerate(titles):
+        btn = dbc.Button(
+            t,
+            id={"type": "title-btn", "index": i},
+            color="light",
+            outline=True,
+            className="m-2 text-start",
+            style={"whiteSpace": "normal", "height": "auto", "minHeight": "60px"},
+            n_clicks=0
+        )
+        buttons.append(dbc.Col(btn, md=6, lg=4))
+    return dbc.Row(buttons, className="g-2")
+
+
+def track_progress(set_progress, steps):
+    """Feed a background job's progress bar from the step events of `steps`."""
+
+    def listener(step, status, info):
+        if step not in steps:
+            return
+        done = steps.index(step) + (1 if status == "done" else 0)
+        label = STEP_LABELS[step]
+        if status == "retry":
+            label = f"{label} (retry {info.get('attempt')})"
+        set_progress((round(100 * done / len(steps)), f"{label}..."))
+
+    set_progress((0, "Starting..."))
+    return progress_listener(listener)
+
+
 def create_dash_app():
-    app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY, dbc.icons.FONT_AWESOME])
+    app = dash.Dash(
+        __name__,
+        external_stylesheets=[dbc.themes.DARKLY, dbc.icons.FONT_AWESOME],
+    )
 
     app.layout = dbc.Container(
         [
             dcc.Store(id="session-id", data=str(uuid.uuid4())),
+            # Background job of the last click, polled while it runs
+            dcc.Store(id="job", data=None),
+            dcc.Interval(id="job-poll", interval=500, disabled=True),
             
             # Header with Session History Button
             dbc.Row([
@@ -130,6 +219,27 @@ def create_dash_app():
                 ], width=12)
             ]),
 
+            # Progress of the running generation (shown while a background job runs)
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            html.Div([
+                                html.Span(id="progress-text", className="text-muted"),
+                                dbc.Button(
+                                    [html.I(className="fas fa-stop me-2"), "Cancel"],
+                                    id="cancel-btn",
+                                    color="danger",
+                                    size="sm",
+                                    outline=True,
+                                ),
+                            ], className="d-flex justify-content-between align-items-center mb-2"),
+                            dbc.Progress(id="progress-bar", value=0, striped=True, animated=True),
+                        ])
+                    ], className="shadow-sm mb-4")
+                ], width=12)
+            ], id="progress-row", style={"display": "none"}),
+
             # Titles Section
             dbc.Row([
                 dbc.Col([
@@ -185,17 +295,24 @@ def create_dash_app():
                             html.H5([html.I(className="fas fa-magic me-2"), "Step 4: Generated Story & Image"], className="mb-3"),
                             dbc.Row([
                                 dbc.Col([
+                                    # Static wrappers: callbacks send only the story text and the image src
                                     dcc.Loading(
                                         id="loading-story",
                                         type="default",
-                                        children=html.Div(id="final-story")
+                                        children=dbc.Card([
+                                            dbc.CardBody([
+                                                html.Div(id="final-story", style={"whiteSpace": "pre-wrap", "fontSize": "1rem", "lineHeight": "1.6"})
+                                            ])
+                                        ], className="bg-dark border-secondary")
                                     )
                                 ], md=8),
                                 dbc.Col([
                                     dcc.Loading(
                                         id="loading-image",
                                         type="default",
-                                        children=html.Div(id="image-area")
+                                        children=dbc.Card([
+                                            dbc.CardImg(id="story-image", top=True, style={"borderRadius": "8px"})
+                                        ], id="image-card", className="shadow-sm", style={"display": "none"})
                                     )
                                 ], md=4),
                             ])
@@ -213,66 +330,32 @@ def create_dash_app():
     )
 
     # Load latest news (creates new session)
-    @app.callback(
-        [Output("status", "children"), Output("titles-area", "children"), Output("session-id", "data", allow_duplicate=True)],
-        [Input("load-btn", "n_clicks")],
-        [State("category", "value")],
-        prevent_initial_call=True,
-    )
-    def on_load(n_clicks, category):
-        # Create new session
+    def load_job(set_progress, category):
         session_id = str(uuid.uuid4())
         try:
-            load_latest_news(session_id, category=category)
-            titles = generate_titles_for_session(session_id)
-            # build title buttons
-            buttons = []
-            for i, t in enumerate(titles):
-                btn = dbc.Button(
-                    t, 
-                    id={"type": "title-btn", "index": i}, 
-                    color="light", 
-                    outline=True,
-                    className="m-2 text-start",
-                    style={"whiteSpace": "normal", "height": "auto", "minHeight": "60px"},
-                    n_clicks=0
-                )
-                buttons.append(dbc.Col(btn, md=6, lg=4))
-            return dbc.Alert([html.I(className="fas fa-check-circle me-2"), "News loaded successfully! Choose a title below."], color="success", is_open=True), dbc.Row(buttons, className="g-2"), session_id
+            with track_progress(set_progress, ["load_news", "titles"]):
+                load_latest_news(session_id, category=category)
+                titles = generate_titles_for_session(session_id, deadline=job_deadline())
+            return {
+                "status": dbc.Alert([html.I(className="fas fa-check-circle me-2"), "News loaded successfully! Choose a title below."], color="success", is_open=True),
+                "titles-area": title_buttons(titles),
+                "session-id": session_id,
+            }
         except Exception as e:
-            return dbc.Alert([html.I(className="fas fa-exclamation-triangle me-2"), f"Error: {e}"], color="danger", is_open=True), "", no_update
+            return {"status": error_alert(e), "titles-area": ""}
 
-    # Title selection -> show article and generate continuations
     @app.callback(
-        [Output("article-area", "children", allow_duplicate=True), Output("status", "children", allow_duplicate=True), Output("continuations-area", "children", allow_duplicate=True)],
-        [Input({"type": "title-btn", "index": dash.ALL}, "n_clicks")],
-        [State("session-id", "data")],
+        job_start_outputs(),
+        [Input("load-btn", "n_clicks")],
+        [State("category", "value"), State("job", "data")],
         prevent_initial_call=True,
     )
-    def on_select_title(n_clicks_list, session_id):
-        # determine which button was clicked
-        ctx = dash.callback_context
-        if not ctx.triggered or not any(n_clicks_list):
-            return no_update, no_update, no_update
-        
-        # Get the triggered input
-        triggered_id = ctx.triggered[0]["prop_id"]
-        
-        # Parse the index from the triggered component
-        title_idx = 0
-        try:
-            import json
-            # Extract the ID part before .n_clicks
-            id_str = triggered_id.split('.')[0]
-            id_dict = json.loads(id_str)
-            title_idx = id_dict.get("index", 0)
-        except Exception as e:
-            # Fallback: try the old method
-            try:
-                title_idx = int(triggered_id.split('index":')[1].split('}')[0])
-            except Exception:
-                title_idx = 0
-        
+    def on_load(n_clicks, category, running_job):
+        return start_job(running_job, load_job, category)
+
+    # Title selection -> show article and generate continuations
+    @profiled("on_select_title", session_arg=1)
+    def title_job(set_progress, session_id, title_idx):
         try:
             # Map title index to article index using the stored mapping
             state = memory.get(session_id)
@@ -283,11 +366,8 @@ def create_dash_app():
                 article_idx = title_idx  # fallback to direct mapping
             
             article = select_article(session_id, article_idx)
-            raw_content = article.content or article.description or ""
-            import re
-
-            cleaned_content = re.sub(r"\s*\[\+\d+ chars\]$", "", raw_content)
-            preview = cleaned_content[:500] + ("..." if len(cleaned_content) > 500 else "")
+            # Normalized at ingest by NewsTool
+            preview = article.preview if article.preview is not None else article_preview(article)
             article_md = html.Div([
                 html.H6(article.title, className="mb-3 text-primary"),
                 html.P(preview, className="text-light", style={"fontSize": "0.95rem"}),
@@ -302,7 +382,8 @@ def create_dash_app():
                 ),
             ])
 
-            opts = generate_continuations_for_session(session_id)
+            with track_progress(set_progress, ["continuations"]):
+                opts = generate_continuations_for_session(session_id, deadline=job_deadline())
             cbuttons = []
             for i, c in enumerate(opts):
                 cb = dbc.Button(
@@ -316,85 +397,158 @@ def create_dash_app():
                 )
                 cbuttons.append(cb)
 
-            return article_md, dbc.Alert([html.I(className="fas fa-arrow-right me-2"), "Article selected! Pick a continuation direction."], color="info", is_open=True), html.Div(cbuttons)
+            return {
+                "article-area": article_md,
+                "status": dbc.Alert([html.I(className="fas fa-arrow-right me-2"), "Article selected! Pick a continuation direction."], color="info", is_open=True),
+                "continuations-area": html.Div(cbuttons),
+            }
         except Exception as e:
-            return "", dbc.Alert([html.I(className="fas fa-exclamation-triangle me-2"), f"Error: {e}"], color="danger", is_open=True), ""
+            return {"article-area": "", "status": error_alert(e), "continuations-area": ""}
 
-    # Continuation selection -> generate final story and image
     @app.callback(
-        [Output("status", "children", allow_duplicate=True), Output("final-story", "children"), Output("image-area", "children")],
-        [Input({"type": "cont-btn", "index": dash.ALL}, "n_clicks")],
-        [State("session-id", "data")],
+        job_start_outputs(),
+        [Input({"type": "title-btn", "index": dash.ALL}, "n_clicks")],
+        [State("session-id", "data"), State("job", "data")],
         prevent_initial_call=True,
     )
-    def on_select_continuation(n_clicks_list, session_id):
+    def on_select_title(n_clicks_list, session_id, running_job):
+        # determine which button was clicked
         ctx = dash.callback_context
         if not ctx.triggered or not any(n_clicks_list):
-            return no_update, no_update, no_update
-        prop_id = ctx.triggered[0]["prop_id"]
+            return [no_update] * len(JOB_START_OUTPUTS)
+        
+        # Get the triggered input
+        triggered_id = ctx.triggered[0]["prop_id"]
+        
+        # Parse the index from the triggered component
+        title_idx = 0
         try:
-            idx = int(prop_id.split('index":')[1].split('}')[0])
-        except Exception:
-            idx = 0
+            import json
+            # Extract the ID part before .n_clicks
+            id_str = triggered_id.split('.')[0]
+            id_dict = json.loads(id_str)
+            title_idx = id_dict.get("index", 0)
+        except Exception as e:
+            # Fallback: try the old method
+            try:
+                title_idx = int(triggered_id.split('index":')[1].split('}')[0])
+            except Exception:
+                title_idx = 0
+
+        return start_job(running_job, title_job, session_id, title_idx)
+
+    # Continuation selection -> generate final story and image
+    def continuation_job(set_progress, session_id, idx):
         try:
-            choice = select_continuation(session_id, idx)
+            select_continuation(session_id, idx)
             # generate final and image
-            final_text, image_pil = generate_final_and_image(session_id)
-            img_component = None
+            with track_progress(set_progress, ["story", "image"]):
+                final_text, image_pil = generate_final_and_image(session_id, deadline=job_deadline())
+            img_src = ""
             if image_pil:
-                # image_pil is a PIL Image object; convert to base64
-                buffered = base64.b64encode(image_pil.tobytes()) if hasattr(image_pil, "tobytes") else None
-                # safer: read from state.image_base64 if present
+                # The PNG is already base64-encoded in the session state
                 b64 = memory.get(session_id).image_base64
                 if b64:
                     img_src = f"data:image/png;base64,{b64}"
-                    img_component = dbc.Card([
-                        dbc.CardImg(src=img_src, top=True, style={"borderRadius": "8px"})
-                    ], className="shadow-sm")
-            
-            story_display = dbc.Card([
-                dbc.CardBody([
-                    html.Div(final_text, style={"whiteSpace": "pre-wrap", "fontSize": "1rem", "lineHeight": "1.6"})
-                ])
-            ], className="bg-dark border-secondary")
-            
-            return dbc.Alert([html.I(className="fas fa-check-circle me-2"), "Story generated successfully!"], color="success", is_open=True), story_display, img_component
+
+            return {
+                "status": dbc.Alert([html.I(className="fas fa-check-circle me-2"), "Story generated successfully!"], color="success", is_open=True),
+                "final-story": final_text,
+                "story-image": img_src,
+            }
         except Exception as e:
-            return dbc.Alert([html.I(className="fas fa-exclamation-triangle me-2"), f"Error: {e}"], color="danger", is_open=True), f"Error: {e}", ""
+            return {"status": error_alert(e), "final-story": f"Error: {e}", "story-image": ""}
+
+    @app.callback(
+        job_start_outputs(),
+        [Input({"type": "cont-btn", "index": dash.ALL}, "n_clicks")],
+        [State("session-id", "data"), State("job", "data")],
+        prevent_initial_call=True,
+    )
+    def on_select_continuation(n_clicks_list, session_id, running_job):
+        ctx = dash.callback_context
+        if not ctx.triggered or not any(n_clicks_list):
+            return [no_update] * len(JOB_START_OUTPUTS)
+        prop_id = ctx.triggered[0]["prop_id"]
+        try:
+            idx = int(prop_id.split('index":')[1].split('}')[0])
+        except Exception:
+            idx = 0
+        return start_job(running_job, continuation_job, session_id, idx)
+
+    # Poll the running job: progress while it runs, then its outputs
+    @app.callback(
+        [Output(component, prop, allow_duplicate=True) for component, prop in JOB_RESULT_OUTPUTS]
+        + [Output("progress-bar", "value"), Output("progress-text", "children")]
+        + job_idle_outputs(),
+        Input("job-poll", "n_intervals"),
+        State("job", "data"),
+        prevent_initial_call=True,
+    )
+    def poll_job(n_intervals, job_id):
+        status = jobs.poll(job_id)
+        results = [no_update] * len(JOB_RESULT_OUTPUTS)
+        if status is not None and not status.done:
+            value, text = status.progress or (0, "Starting...")
+            return results + [value, text] + [no_update] * len(JOB_IDLE)
+        # Finished, or unknown (collected by an earlier poll, or cancelled): stop polling
+        if status is not None and status.error:
+            results[0] = error_alert(status.error)
+        elif status is not None:
+            results = [status.result.get(component, no_update) for component, _ in JOB_RESULT_OUTPUTS]
+        return results + [100, ""] + list(JOB_IDLE)
 
-    # Show titles card when titles are loaded
     @app.callback(
+        [Output("status", "children", allow_duplicate=True)] + job_idle_outputs(),
+        Input("cancel-btn", "n_clicks"),
+        State("job", "data"),
+        prevent_initial_call=True,
+    )
+    def cancel_job(n_clicks, job_id):
+        jobs.cancel(job_id)
+        cancelled = dbc.Alert([html.I(className="fas fa-stop me-2"), "Generation cancelled."], color="secondary", is_open=True)
+        return [cancelled] + list(JOB_IDLE)
+
+    # Show each section once its content arrives. These run in the browser, so revealing a step
+    # costs no extra request and the content is not uploaded again as the callback's input
+    app.clientside_callback(
+        """function(content) {
+            var shown = content && (!Array.isArray(content) || content.length > 0);
+            return {display: shown ? "block" : "none"};
+        }""",
         Output("titles-card", "style"),
         Input("titles-area", "children"),
         prevent_initial_call=True,
     )
-    def show_titles_card(titles_content):
-        if titles_content:
-            return {"display": "block"}
-        return {"display": "none"}
 
-    # Show step 3 header and article row when continuations are loaded
-    @app.callback(
+    app.clientside_callback(
+        """function(content) {
+            var shown = content && (!Array.isArray(content) || content.length > 0);
+            return [{display: shown ? "block" : "none"}, {display: shown ? "flex" : "none"}];
+        }""",
         [Output("step3-header", "style"), Output("article-row", "style")],
         Input("continuations-area", "children"),
         prevent_initial_call=True,
     )
-    def show_article_sections(continuations_content):
-        if continuations_content:
-            return {"display": "block"}, {"display": "flex"}
-        return {"display": "none"}, {"display": "none"}
 
-    # Show final row when story is generated
-    @app.callback(
+    app.clientside_callback(
+        """function(story) {
+            return {display: story ? "block" : "none"};
+        }""",
         Output("final-row", "style"),
         Input("final-story", "children"),
         prevent_initial_call=True,
     )
-    def show_final_row(story_content):
-        if story_content:
-            return {"display": "block"}
-        return {"display": "none"}
-    
+
+    app.clientside_callback(
+        """function(src) {
+            return {display: src ? "block" : "none"};
+        }""",
+        Output("image-card", "style"),
+        Input("story-image", "src"),
+        prevent_initial_call=True,
+    )
+
     # Toggle session history panel
     @app.callback(
         [Output("history-collapse", "is_open"), Output("history-area", "children")],
@@ -466,7 +620,7 @@ def create_dash_app():
             Output("article-area", "children", allow_duplicate=True),
             Output("continuations-area", "children", allow_duplicate=True),
             Output("final-story", "children", allow_duplicate=True),
-            Output("image-area", "children", allow_duplicate=True),
+            Output("story-image", "src", allow_duplicate=True),
         ],
         Input({"type": "load-session-btn", "index": dash.ALL}, "n_clicks"),
         prevent_initial_call=True,
@@ -496,11 +650,9 @@ def create_dash_app():
             )
         
         # Rebuild UI based on session state
-        # Note: We don't store titles separately, so we can't restore title buttons
-        # But we can restore the selected article and continuations
         
-        # 1. Titles area - empty since we don't store generated titles
-        titles_content = []
+        # 1. Titles area
+        titles_content = title_buttons(state.titles) if state.titles else []
         
         # 2. Article area
         article_content = ""
@@ -531,28 +683,9 @@ def create_dash_app():
                     )
                 )
         
-        # 4. Final story
-        story_content = ""
-        if state.final_story:
-            story_content = dbc.Card([
-                dbc.CardHeader([
-                    html.I(className="fas fa-book me-2"),
-                    "Your AI-Generated Story"
-                ]),
-                dbc.CardBody(state.final_story)
-            ], className="shadow-sm")
-        
-        # 5. Image area
-        image_content = ""
-        if state.image_base64:
-            image_content = dbc.Card([
-                dbc.CardBody([
-                    html.Img(
-                        src=f"data:image/png;base64,{state.image_base64}",
-                        style={"maxWidth": "100%", "height": "auto"}
-                    )
-                ])
-            ], className="shadow-sm")
+        # 4. Final story and 5. image go into the static story card
+        story_content = state.final_story or ""
+        image_content = f"data:image/png;base64,{state.image_base64}" if state.image_base64 else ""
         
         return (
             session_id,
@@ -582,7 +715,7 @@ def create_dash_app():
         
         for sid in list(all_sessions.keys()):
             if sid != current_session_id:
-                memory._store.pop(sid, None)
+                memory.delete(sid)
                 cleared_count += 1
         
         return (
@@ -595,7 +728,30 @@ def create_dash_app():
                 f"Session history cleared ({cleared_count} sessions removed)"
             ], color="success", is_open=True)
         )
-    
+
+    # Bulk export of finished stories, streamed so thousands of sessions never sit in memory at once:
+    # /export/sessions.jsonl or /export/sessions.tar (?images=0 leaves out the PNGs)
+    @app.server.route("/export/sessions.<fmt>")
+    def export_sessions(fmt):
+        include_images = flask.request.args.get("images", "1").lower() not in ("0", "false", "no")
+        stream = export_stream(memory.iter_completed(), fmt, include_images=include_images)
+        if stream is None:
+            flask.abort(404)
+        chunks, mimetype = stream
+        return flask.Response(
+            chunks,
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=sessions.{fmt}"},
+        )
+
+    # Prometheus scrape target; rendering never takes the session lock
+    @app.server.route("/metrics")
+    def metrics():
+        return flask.Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+    # Opt-in profiling: X-Profile header / sampling, and /debug/tracemalloc
+    install_profiling(app.server)
+
     return app
 
 
@@ -607,5 +763,8 @@ if __name__ == "__main__":
             ollama_base,
             "— the app may fail to generate text. Start the Ollama server with `ollama serve`, or set OLLAMA_BASE_URL to a reachable host.")
 
+    # Warm the per-category headline pools (no-op unless PREFETCH_ENABLED=true)
+    headline_pool.start()
+
     dash_app = create_dash_app()
     dash_app.run(host="0.0.0.0", port=7860, debug=False)
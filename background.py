@@ -0,0 +1,155 @@
+"""Background jobs for the Dash callbacks that wait on the LLM or SDXL.
+
+A click starts a job and its callback returns at once with the job id; a `dcc.Interval`
+then polls `JobRunner.poll` for progress and the result, so no request thread is held for
+the length of an LLM or SDXL call. Jobs run on a bounded thread pool in the web server's
+process (BACKGROUND_WORKERS threads; further jobs queue), because sessions live in its
+memory. Only plain Dash components and callbacks are involved, no Dash internals.
+
+Each job runs under its own request `Deadline` (see `job_deadline`), and cancelling the
+job (the Cancel button, or a new click replacing a job that is still running) cancels that
+deadline: retries stop and LLM streams are closed. Results nobody collects are dropped
+after BACKGROUND_RESULT_TTL seconds.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Dict, Optional
+
+from chains.deadline import Deadline
+
+
+class _Job:
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.deadline: Optional[Deadline] = None
+        self.cancelled = False
+        self.progress: Any = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> Deadline:
+        with self._lock:
+            self.deadline = Deadline.from_env()
+            if self.cancelled:
+                self.deadline.cancel()
+            return self.deadline
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self.deadline is not None:
+                self.deadline.cancel()
+        if self.future is not None:
+            # Only succeeds while the job is still queued
+            self.future.cancel()
+
+    def set_progress(self, value) -> None:
+        self.progress = value
+
+
+_current_job: ContextVar[Optional[_Job]] = ContextVar("background_job", default=None)
+
+
+def job_deadline() -> Optional[Deadline]:
+    """The running background job's deadline, or None outside a job (steps then use their own)."""
+    job = _current_job.get()
+    return job.deadline if job is not None else None
+
+
+class JobStatus:
+    """What a poll sees: the latest progress while running, then the result or the error."""
+
+    def __init__(self, done: bool, progress: Any = None, result: Any = None, error: Optional[str] = None):
+        self.done = done
+        self.progress = progress
+        self.result = result
+        self.error = error
+
+
+class JobRunner:
+    def __init__(self, max_workers: int = 4, result_ttl: float = 3600.0):
+        self.max_workers = max_workers
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="dash-background")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, _Job] = {}
+
+    @classmethod
+    def from_env(cls) -> "JobRunner":
+        return cls(
+            max_workers=max(1, int(os.getenv("BACKGROUND_WORKERS", "4"))),
+            result_ttl=float(os.getenv("BACKGROUND_RESULT_TTL", "3600")),
+        )
+
+    def _run(self, job: _Job, fn: Callable, args: tuple):
+        job.start()
+        _current_job.set(job)
+        try:
+            return fn(job.set_progress, *args)
+        finally:
+            job.finished_at = time.monotonic()
+
+    def submit(self, fn: Callable, *args) -> str:
+        """Run `fn(set_progress, *args)` on the pool; returns the job id to poll."""
+        self._prune()
+        job_id = uuid.uuid4().hex
+        job = _Job()
+        with self._lock:
+            self._jobs[job_id] = job
+        # The job keeps the triggering request's context (e.g. its profiling decision), in a copy of its own
+        job.future = self._executor.submit(copy_context().run, self._run, job, fn, args)
+        return job_id
+
+    def poll(self, job_id: Optional[str]) -> Optional[JobStatus]:
+        """Progress of a running job, or its outcome (once; the job is then forgotten). None if unknown."""
+        if not job_id:
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or job.future is None:
+            return None
+        if not job.future.done():
+            return JobStatus(done=False, progress=job.progress)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+        if job.future.cancelled():
+            return JobStatus(done=True, error="Cancelled")
+        error = job.future.exception()
+        if error is not None:
+            print(f"[Background] Job failed: {''.join(traceback.format_exception(error))}")
+            return JobStatus(done=True, error=str(error))
+        return JobStatus(done=True, result=job.future.result())
+
+    def cancel(self, job_id: Optional[str]) -> None:
+        with self._lock:
+            job = self._jobs.pop(job_id, None) if job_id else None
+        if job is not None:
+            job.cancel()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            stale = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > self.result_ttl
+            ]
+            for job_id in stale:
+                del self._jobs[job_id]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        pending = [j for j in jobs if j.future is not None and not j.future.done()]
+        running = sum(1 for j in pending if j.deadline is not None)
+        return {"workers": self.max_workers, "running": running, "queued": len(pending) - running}
+
+
+jobs = JobRunner.from_env()
+
+
+__all__ = ["JobRunner", "JobStatus", "job_deadline", "jobs"]
@@ -0,0 +1,217 @@
+"""Headless batch generation: run the full pipeline for many stories without the Dash UI.
+
+    python -m batch --category tech --count 500 --workers 8 --out batch_output
+
+Each item gets its own session: a window of fetched articles, generated titles, the
+first title's article, a continuation (rotated per item for variety), the final story
+and optionally an image. Items run concurrently on `--workers` threads and every stage
+has its own concurrency limit (the image stage defaults to 1 since SDXL holds the GPU).
+Results go to `<out>/results.jsonl` and `<out>/images/<item>.png`.
+"""
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import main
+from memory.export import session_record
+from memory.session_memory import memory
+from schemas import Article
+from tools.news_tool import NewsTool
+
+STAGES = ("titles", "continuation", "story", "image")
+
+
+class Stage:
+    """Concurrency limit plus timing for one pipeline stage."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self._sem = threading.Semaphore(limit)
+        self._lock = threading.Lock()
+        self.ok = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def run(self, fn, *args):
+        with self._sem:
+            start = time.monotonic()
+            try:
+                result = fn(*args)
+            except Exception:
+                self._record(start, ok=False)
+                raise
+            self._record(start, ok=True)
+            return result
+
+    def _record(self, start: float, ok: bool) -> None:
+        end = time.monotonic()
+        with self._lock:
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.busy += end - start
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def summary(self) -> dict:
+        with self._lock:
+            done = self.ok + self.failed
+            if self.first_start is None or self.last_end is None:
+                return {"limit": self.limit, "ok": 0, "failed": 0, "items_per_second": 0.0, "avg_seconds": 0.0}
+            span = self.last_end - self.first_start
+            return {
+                "limit": self.limit,
+                "ok": self.ok,
+                "failed": self.failed,
+                "items_per_second": round(self.ok / span, 3) if span > 0 else 0.0,
+                "avg_seconds": round(self.busy / done, 3) if done else 0.0,
+            }
+
+
+def resolve_category(name: str) -> str:
+    """Accept a category or an unambiguous prefix of one (e.g. 'tech')."""
+    matches = [c for c in NewsTool.CATEGORIES if c.startswith(name.lower())]
+    if len(matches) != 1:
+        raise ValueError(f"Unknown category {name!r}; choose from {', '.join(NewsTool.CATEGORIES)}")
+    return matches[0]
+
+
+def fetch_article_pool(category: str, pages=(1, 2, 3), page_size: int = 20) -> List[Article]:
+    """Fetch the category once for the whole batch (falls back to the article store)."""
+    articles = main.news_tool.fetch_bulk([category], pages=pages, page_size=page_size).get(category, [])
+    if not articles:
+        articles = main.news_tool.store.query(category=category, limit=len(pages) * page_size)
+    return main.headline_dedup.dedupe(articles)
+
+
+def _article_window(pool: List[Article], item: int, size: int) -> List[Article]:
+    # Stride through the pool so consecutive items lead with different articles
+    start = (item * 3) % len(pool)
+    return [pool[(start + k) % len(pool)] for k in range(min(size, len(pool)))]
+
+
+class BatchRunner:
+    def __init__(self, out_dir: str, workers: int = 4, images: bool = True, stage_limits: Optional[Dict[str, int]] = None):
+        limits = {"titles": workers, "continuation": workers, "story": workers, "image": 1}
+        limits.update(stage_limits or {})
+        self.out_dir = out_dir
+        self.workers = workers
+        self.images = images
+        self.stages = {name: Stage(name, max(1, limits[name])) for name in STAGES}
+        self._write_lock = threading.Lock()
+        os.makedirs(os.path.join(out_dir, "images"), exist_ok=True)
+        self._results = open(os.path.join(out_dir, "results.jsonl"), "a", encoding="utf-8")
+
+    def run_item(self, item: int, articles: List[Article]) -> dict:
+        sid = f"batch-{item}-{uuid.uuid4().hex[:8]}"
+        state = memory.get(sid)
+        state.articles = articles
+        memory.set(sid, state)
+        stage = "titles"
+        try:
+            self.stages["titles"].run(main.generate_titles_for_session, sid)
+            # The first title's article; fallback titles may point past a short article list
+            article_map = memory.get(sid).title_to_article_map
+            main.select_article(sid, article_map[0] if article_map and article_map[0] < len(articles) else 0)
+
+            stage = "continuation"
+            options = self.stages["continuation"].run(main.generate_continuations_for_session, sid)
+            main.select_continuation(sid, item % len(options))
+
+            stage = "story"
+            _, generated = self.stages["story"].run(main.generate_final_story_for_session, sid)
+
+            image_path = None
+            # A fallback story gets no image, as in the interactive path
+            if self.images and generated:
+                stage = "image"
+                self.stages["image"].run(main.generate_image_for_session, sid)
+                state = memory.get(sid)
+                if state.image_base64:
+                    image_path = os.path.join("images", f"{item:06d}.png")
+                    with open(os.path.join(self.out_dir, image_path), "wb") as f:
+                        f.write(base64.b64decode(state.image_base64))
+            record = {"item": item, **session_record(sid, memory.get(sid)), "image_path": image_path}
+        except Exception as e:
+            print(f"[Batch] item {item} failed at {stage}: {e}")
+            record = {"item": item, "session_id": sid, "error": str(e), "failed_stage": stage}
+        finally:
+            # Results are on disk; keep memory flat over long batches
+            memory.delete(sid)
+        with self._write_lock:
+            self._results.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._results.flush()
+        return record
+
+    def run(self, pool: List[Article], count: int, articles_per_item: int = 10) -> dict:
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+            records = list(executor.map(lambda i: self.run_item(i, _article_window(pool, i, articles_per_item)), range(count)))
+        elapsed = time.monotonic() - start
+        self._results.close()
+        completed = sum(1 for r in records if "error" not in r)
+        return {
+            "items": count,
+            "completed": completed,
+            "failed": count - completed,
+            "seconds": round(elapsed, 2),
+            "items_per_second": round(completed / elapsed, 3) if elapsed > 0 else 0.0,
+            "stages": {name: s.summary() for name, s in self.stages.items() if s.ok or s.failed},
+        }
+
+
+def print_summary(summary: dict) -> None:
+    print(
+        f"[Batch] {summary['completed']}/{summary['items']} items in {summary['seconds']}s "
+        f"({summary['items_per_second']} items/s, {summary['failed']} failed)"
+    )
+    for name, s in summary["stages"].items():
+        print(
+            f"[Batch]   {name:<13} limit {s['limit']:>2}  ok {s['ok']:>5}  failed {s['failed']:>4}  "
+            f"{s['items_per_second']:>8} items/s  avg {s['avg_seconds']}s"
+        )
+
+
+def main_cli(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--category", default="general")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=4, help="items processed concurrently")
+    parser.add_argument("--out", default="batch_output")
+    parser.add_argument("--no-images", action="store_true")
+    parser.add_argument("--articles-per-item", type=int, default=10)
+    for name in STAGES:
+        parser.add_argument(f"--{name}-workers", type=int, default=None, help=f"concurrency limit of the {name} stage")
+    args = parser.parse_args(argv)
+
+    category = resolve_category(args.category)
+    fetch_start = time.monotonic()
+    pool = fetch_article_pool(category)
+    fetch_seconds = time.monotonic() - fetch_start
+    if not pool:
+        raise SystemExit(f"[Batch] No '{category}' articles available from NewsAPI or the article store")
+    print(
+        f"[Batch] fetched {len(pool)} '{category}' articles in {fetch_seconds:.2f}s; "
+        f"generating {args.count} items with {args.workers} workers"
+    )
+
+    limits = {name: getattr(args, f"{name}_workers") for name in STAGES if getattr(args, f"{name}_workers")}
+    runner = BatchRunner(args.out, workers=args.workers, images=not args.no_images, stage_limits=limits)
+    summary = runner.run(pool, args.count, articles_per_item=args.articles_per_item)
+    summary["fetch"] = {"articles": len(pool), "seconds": round(fetch_seconds, 2)}
+    print_summary(summary)
+    return summary
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1 @@
+# Benchmarks and performance harnesses (run with `python -m benchmarks.<name>`)
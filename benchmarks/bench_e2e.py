@@ -0,0 +1,183 @@
+"""End-to-end benchmark of the `main.py` flow with fake models.
+
+Runs the session flow (load news → titles → continuations → story → image) with the
+deterministic fakes from `benchmarks.fakes` at several concurrency levels. For every
+step it reports p50/p95 latency and p50/p95 overhead, i.e. wall time minus the time
+spent inside the fake models. That overhead is the cost of our own code. Results are
+written as JSON, tagged with the git commit, so runs can be compared between commits.
+
+    python -m benchmarks.bench_e2e --concurrency 1,4,8 --sessions 20 --llm-latency 0.05
+    python -m benchmarks.bench_e2e --baseline bench_results/e2e_<commit>.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks import fakes
+
+STEPS = ("load_news", "titles", "continuations", "story", "image")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_session(n: int) -> Dict[str, tuple]:
+    """One full session; returns {step: (wall seconds, model seconds)}."""
+    import main
+
+    sid = f"bench-{n}-{uuid.uuid4().hex[:8]}"
+    timings = {}
+
+    def timed(step, fn, *args):
+        fakes.reset_model_time()
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[step] = (time.perf_counter() - start, fakes.model_time())
+        return result
+
+    timed("load_news", main.load_latest_news, sid, "general")
+    timed("titles", main.generate_titles_for_session, sid)
+    main.select_article(sid, 0)
+    timed("continuations", main.generate_continuations_for_session, sid)
+    main.select_continuation(sid, 0)
+    timed("story", main.generate_final_story_for_session, sid)
+    timed("image", main.generate_image_for_session, sid)
+    main.memory.delete(sid)
+    return timings
+
+
+def run_level(concurrency: int, sessions: int) -> dict:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(run_session, range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    steps = {}
+    for step in STEPS:
+        wall = [r[step][0] for r in results]
+        overhead = [r[step][0] - r[step][1] for r in results]
+        steps[step] = {
+            "p50_ms": round(percentile(wall, 50) * 1000, 2),
+            "p95_ms": round(percentile(wall, 95) * 1000, 2),
+            "overhead_p50_ms": round(percentile(overhead, 50) * 1000, 2),
+            "overhead_p95_ms": round(percentile(overhead, 95) * 1000, 2),
+        }
+    session_overhead = [sum(r[s][0] - r[s][1] for s in STEPS) for r in results]
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "seconds": round(elapsed, 3),
+        "sessions_per_second": round(sessions / elapsed, 3),
+        "session_overhead_p50_ms": round(percentile(session_overhead, 50) * 1000, 2),
+        "session_overhead_p95_ms": round(percentile(session_overhead, 95) * 1000, 2),
+        "steps": steps,
+    }
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Change in p50 overhead per step (ms) against a previous result file, per concurrency level."""
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    deltas = {}
+    for level in current["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        deltas[str(level["concurrency"])] = {
+            step: round(level["steps"][step]["overhead_p50_ms"] - old["steps"][step]["overhead_p50_ms"], 2)
+            for step in STEPS
+            if step in old["steps"]
+        }
+    return {"baseline_commit": baseline.get("commit"), "overhead_p50_delta_ms": deltas}
+
+
+def run(concurrency: List[int], sessions: int, llm_latency: float, story_latency: float, image_latency: float,
+        jitter: float, image_size: int, verbose: bool = False) -> dict:
+    fakes.install(
+        llm_latency=llm_latency,
+        story_latency=story_latency,
+        image_latency=image_latency,
+        jitter=jitter,
+        image_size=image_size,
+    )
+    levels = []
+    for level in concurrency:
+        # The pipeline prints progress for every step; keep the benchmark output readable
+        sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink:
+            levels.append(run_level(level, sessions))
+    return {
+        "benchmark": "e2e",
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "sessions_per_level": sessions,
+            "llm_latency": llm_latency,
+            "story_latency": story_latency,
+            "image_latency": image_latency,
+            "jitter": jitter,
+            "image_size": image_size,
+        },
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", default="1,2,4,8", help="comma-separated concurrent session counts")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake LLM call")
+    parser.add_argument("--story-latency", type=float, default=None, help="seconds per story call (default: --llm-latency)")
+    parser.add_argument("--image-latency", type=float, default=0.1, help="seconds per fake diffusion call")
+    parser.add_argument("--jitter", type=float, default=0.0, help="uniform +/- jitter on every fake latency")
+    parser.add_argument("--image-size", type=int, default=512)
+    parser.add_argument("--output", default=None, help="result file (default: bench_results/e2e_<commit>.json)")
+    parser.add_argument("--baseline", default=None, help="previous result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's progress output")
+    args = parser.parse_args()
+
+    story_latency = args.llm_latency if args.story_latency is None else args.story_latency
+    result = run(
+        [int(c) for c in args.concurrency.split(",")],
+        args.sessions,
+        args.llm_latency,
+        story_latency,
+        args.image_latency,
+        args.jitter,
+        args.image_size,
+        verbose=args.verbose,
+    )
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+
+    output = args.output or os.path.join("bench_results", f"e2e_{result['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    print(f"[bench_e2e] results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Measure construction and serialization cost of Article and SessionState.
+
+Compares the serialization used before (a.dict() plus URL stringification per
+prompt, str(state.dict()) per session for memory stats) with the cached
+Article.payload / Article.estimated_size and SessionState.estimated_size. Validated
+construction is reported next to model_construct(): on pydantic 2 validation runs in
+pydantic-core and is not slower than skipping it.
+
+    python -m benchmarks.bench_models --count 10000
+"""
+import argparse
+import json
+import time
+import warnings
+
+from schemas import Article, SessionState
+
+
+def _fields(i: int) -> dict:
+    return {
+        "title": f"Headline number {i} about the city council",
+        "description": "A short description of the story. " * 3,
+        "content": "Body text of the article. " * 40,
+        "image_url": f"https://img.example.com/{i}.jpg",
+        "url": f"https://news.example.com/story/{i}",
+    }
+
+
+def _legacy_payload(a: Article) -> dict:
+    # TitleChain before the change
+    d = a.dict()
+    if d.get("image_url"):
+        d["image_url"] = str(d["image_url"])
+    if d.get("url"):
+        d["url"] = str(d["url"])
+    return d
+
+
+def _ms(fn, items) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def run(count: int, articles_per_session: int = 10) -> dict:
+    fields = [_fields(i) for i in range(count)]
+    articles = [Article(**f) for f in fields]
+    fresh = [Article(**f) for f in fields]
+
+    sessions = []
+    for i in range(count):
+        state = SessionState()
+        start = (i * articles_per_session) % max(count - articles_per_session, 1)
+        state.articles = [Article(**f) for f in fields[start:start + articles_per_session]]
+        state.titles = [a.title for a in state.articles[:3]]
+        state.final_story = "Paragraph of the generated story.\n\n" * 10
+        sessions.append(state)
+
+    return {
+        "count": count,
+        "article_construct_ms": {
+            "validated": _ms(lambda f: Article(**f), fields),
+            "model_construct": _ms(lambda f: Article.model_construct(**f), fields),
+        },
+        "article_prompt_payload_ms": {
+            "legacy_dict": _ms(_legacy_payload, articles),
+            "payload_first_access": _ms(lambda a: a.payload, fresh),
+            "payload_cached": _ms(lambda a: a.payload, fresh),
+        },
+        "session_construct_ms": _ms(lambda _: SessionState(), range(count)),
+        "session_stats_size_ms": {
+            "legacy_str_dict": _ms(lambda s: len(str(s.dict()).encode("utf-8")), sessions),
+            "estimated_size_first": _ms(SessionState.estimated_size, sessions),
+            "estimated_size_cached": _ms(SessionState.estimated_size, sessions),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    args = parser.parse_args()
+    with warnings.catch_warnings():
+        # .dict() is deprecated on pydantic 2 but is what the old code called
+        warnings.simplefilter("ignore")
+        print(json.dumps(run(args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
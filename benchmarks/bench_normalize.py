@@ -0,0 +1,101 @@
+"""Measure article normalization throughput over a synthetic NewsAPI corpus.
+
+Compares the previous processing (uncompiled tag stripping at fetch time plus
+truncation-marker removal on every article click) with the single ingest-time pass in
+`tools.text_normalize`, which also unescapes entities and collapses whitespace.
+
+    python -m benchmarks.bench_normalize --articles 50000
+"""
+import argparse
+import json
+import random
+import re
+import time
+
+from schemas import Article
+from tools.text_normalize import article_preview, normalize_article
+
+_WORDS = "the mayor council river market storm election vaccine league launch court budget".split()
+
+
+def synthetic_corpus(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+
+    def sentence(k):
+        return " ".join(rng.choice(_WORDS) for _ in range(k)).capitalize() + "."
+
+    corpus = []
+    for i in range(n):
+        body = " ".join(sentence(rng.randint(8, 20)) for _ in range(rng.randint(3, 8)))
+        corpus.append({
+            "title": f"{sentence(8)[:-1]} &amp; more - Outlet {i % 40}",
+            "description": f"<p>{sentence(25)}</p>\n<ul><li>{sentence(6)}</li></ul>",
+            "content": f"<p>{body}</p>\r\n&quot;{sentence(10)}&quot;… [+{rng.randint(100, 9000)} chars]",
+            "url": f"https://news.example.com/{i}",
+            "urlToImage": f"https://img.example.com/{i}.jpg",
+        })
+    return corpus
+
+
+def legacy_ingest(raw: dict) -> Article:
+    # fetch_top_headlines before the change
+    content = re.sub(r'<[^>]+>', '', raw.get("content") or raw.get("description") or "")
+    description = re.sub(r'<[^>]+>', '', raw.get("description") or "")
+    return Article(
+        title=raw.get("title") or "",
+        description=description or None,
+        content=content or None,
+        image_url=raw.get("urlToImage"),
+        url=raw.get("url"),
+    )
+
+
+def legacy_render(article: Article) -> str:
+    # on_select_title before the change, paid on every click
+    cleaned = re.sub(r"\s*\[\+\d+ chars\]$", "", article.content or article.description or "")
+    return cleaned[:500] + ("..." if len(cleaned) > 500 else "")
+
+
+def current_render(article: Article) -> str:
+    # Same lookup as on_select_title: the ingest-time preview, computed only if missing
+    return article.preview if article.preview is not None else article_preview(article)
+
+
+def _time(fn, items):
+    start = time.perf_counter()
+    out = [fn(item) for item in items]
+    return time.perf_counter() - start, out
+
+
+def run(articles: int) -> dict:
+    corpus = synthetic_corpus(articles)
+    legacy_ingest_s, legacy_articles = _time(legacy_ingest, corpus)
+    ingest_s, normalized = _time(normalize_article, corpus)
+    legacy_render_s, _ = _time(legacy_render, legacy_articles)
+    render_s, _ = _time(current_render, normalized)
+    return {
+        "articles": articles,
+        "ingest_articles_per_second": {
+            "legacy": round(articles / legacy_ingest_s),
+            "normalized": round(articles / ingest_s),
+        },
+        "render_us_per_click": {
+            "legacy": round(legacy_render_s / articles * 1e6, 2),
+            "normalized": round(render_s / articles * 1e6, 2),
+        },
+        "total_seconds_ingest_plus_one_click_each": {
+            "legacy": round(legacy_ingest_s + legacy_render_s, 3),
+            "normalized": round(ingest_s + render_s, 3),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=50000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.articles), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Measure prompt-eval tokens per session against the Ollama stub (`tools/ollama_stub.py`).
+
+The stub mimics Ollama's single-slot prompt cache: for each model it remembers the
+token sequence of the previous prompt and only "evaluates" the tokens after the
+longest common prefix, reporting them as `prompt_eval_count` like Ollama does.
+Every session runs twice: once with the old prompt layout (instructions first, article
+last) and once with the shared system + article prefix, and the report shows the
+prompt-eval tokens saved per session.
+
+    python -m benchmarks.bench_prompt_cache --sessions 5
+"""
+import argparse
+import json
+import os
+from unittest.mock import patch
+
+from PIL import Image
+
+from tools.ollama_stub import OllamaStub
+
+
+class _TinyPipeline:
+    class _Out:
+        def __init__(self):
+            self.images = [Image.new("RGB", (8, 8))]
+
+    def __call__(self, **kwargs):
+        return self._Out()
+
+
+def legacy_layout(prompt):
+    """The same chain prompt in the layout used before the shared prefix.
+
+    Step instructions come first and the article last, with no shared system text, so
+    consecutive steps of a session only share the first few words of their prompts.
+    """
+    from langchain.prompts import ChatPromptTemplate
+    from chains.prompt_prefix import SYSTEM_PROMPT
+
+    system, human = (message.prompt.template for message in prompt.messages)
+    article = system[len(SYSTEM_PROMPT):].strip()
+    return ChatPromptTemplate.from_messages([("human", human + ("\n\n" + article if article else ""))])
+
+
+def _summary(per_session: list) -> dict:
+    sent = sum(p["prompt_tokens"] for p in per_session)
+    evaluated = sum(p["prompt_eval_tokens"] for p in per_session)
+    return {
+        "avg_prompt_tokens_per_session": round(sent / len(per_session), 1),
+        "avg_prompt_eval_tokens_per_session": round(evaluated / len(per_session), 1),
+        "prefix_reuse_ratio": round(1 - evaluated / sent, 3) if sent else 0.0,
+        "per_session": per_session,
+    }
+
+
+def run(sessions: int) -> dict:
+    stub = OllamaStub().start()
+    cache = stub.cache
+    os.environ["OLLAMA_BASE_URL"] = stub.url
+
+    # Import after OLLAMA_BASE_URL points at the stub
+    from chains.title_chain import TitleChain
+    from chains.continuation_chain import ContinuationChain
+    from chains.final_story_chain import FinalStoryChain
+    from chains.image_chain import ImageChain
+    from chains.prompt_prefix import article_context
+    from chains.generation_limits import generation_stats
+    from schemas import Article
+
+    # Wrap the stub's accounting so each call's numbers can be collected
+    calls = []
+    original = cache.evaluate
+
+    def recording(model, text):
+        total, evaluated = original(model, text)
+        calls.append((total, evaluated))
+        return total, evaluated
+
+    layouts = {}
+    with patch.object(cache, "evaluate", recording):
+        for layout in ("legacy", "shared_prefix"):
+            title_chain = TitleChain()
+            continuation_chain = ContinuationChain()
+            final_chain = FinalStoryChain()
+            image_chain = ImageChain(pipeline=_TinyPipeline())
+            if layout == "legacy":
+                for chain in (title_chain, continuation_chain, final_chain, image_chain):
+                    chain.prompt = legacy_layout(chain.prompt)
+            # Each layout starts from an empty cache and counts only its own generations
+            cache.reset()
+            generation_stats.reset()
+
+            per_session = []
+            for s in range(sessions):
+                articles = [
+                    Article(title=f"Session {s} headline {i}", description=f"Description {i} " * 10, content=f"Body {s}-{i} " * 60)
+                    for i in range(10)
+                ]
+                start = len(calls)
+                title_chain.generate(articles)
+                title, text = article_context(articles[0])
+                opts = continuation_chain.generate(text, article_title=title)
+                story = final_chain.generate(title, text, opts.options[0])
+                image_chain.generate(story, article_title=title, article_text=text)
+                session_calls = calls[start:]
+                sent = sum(c[0] for c in session_calls)
+                evaluated = sum(c[1] for c in session_calls)
+                per_session.append({"prompt_tokens": sent, "prompt_eval_tokens": evaluated, "reused_tokens": sent - evaluated})
+            layouts[layout] = _summary(per_session)
+
+    stub.stop()
+    legacy = layouts["legacy"]["avg_prompt_eval_tokens_per_session"]
+    shared = layouts["shared_prefix"]["avg_prompt_eval_tokens_per_session"]
+    return {
+        "sessions": sessions,
+        **layouts,
+        "prompt_eval_tokens_saved_per_session": round(legacy - shared, 1),
+        "prompt_eval_reduction": round(1 - shared / legacy, 3) if legacy else 0.0,
+        "generation": generation_stats.get_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compare session snapshot size and encode/decode time against pydantic JSON.
+
+    python -m benchmarks.bench_snapshot --sessions 200
+"""
+import argparse
+import base64
+import io
+import json
+import random
+import time
+
+from PIL import Image
+
+from memory import snapshot
+from memory.snapshot import CODEC_ZLIB, CODEC_ZSTD, decode_session, encode_session
+from schemas import Article, SessionState
+
+_WORDS = "the mayor council river market storm election vaccine league launch court budget".split()
+
+
+def synthetic_session(rng: random.Random, image_b64: str) -> SessionState:
+    def text(words):
+        return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+    return SessionState(
+        articles=[
+            Article.model_validate(
+                {"title": text(10), "description": text(30), "content": text(200), "url": f"https://news.example.com/{i}"}
+            )
+            for i in range(10)
+        ],
+        titles=[text(10) for _ in range(3)],
+        title_to_article_map=[0, 1, 2],
+        selected_article_index=1,
+        continuation_options=[text(25) for _ in range(3)],
+        selected_continuation_index=0,
+        final_story="\n\n".join(text(80) for _ in range(10)),
+        image_base64=image_b64,
+    )
+
+
+def _png_b64(size: int) -> str:
+    # Gradient with noise: compresses like a real image rather than a flat fill
+    rng = random.Random(0)
+    img = Image.new("RGB", (size, size))
+    img.putdata([(x % 256, y % 256, rng.randrange(256)) for y in range(size) for x in range(size)])
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+def _measure(encode, decode, states) -> dict:
+    start = time.perf_counter()
+    blobs = [encode(s) for s in states]
+    encoded = time.perf_counter() - start
+    start = time.perf_counter()
+    for b in blobs:
+        decode(b)
+    decoded = time.perf_counter() - start
+    n = len(states)
+    return {
+        "avg_bytes": round(sum(len(b) for b in blobs) / n),
+        "encode_ms_per_session": round(encoded / n * 1000, 3),
+        "decode_ms_per_session": round(decoded / n * 1000, 3),
+    }
+
+
+def run(sessions: int, image_size: int = 256) -> dict:
+    rng = random.Random(1)
+    image = _png_b64(image_size)
+    states = [synthetic_session(rng, image) for _ in range(sessions)]
+    results = {
+        "sessions": sessions,
+        "json": _measure(lambda s: s.model_dump_json().encode("utf-8"), SessionState.model_validate_json, states),
+        "snapshot_zlib": _measure(lambda s: encode_session(s, codec=CODEC_ZLIB), decode_session, states),
+    }
+    if snapshot.zstandard is not None:
+        results["snapshot_zstd"] = _measure(lambda s: encode_session(s, codec=CODEC_ZSTD), decode_session, states)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--image-size", type=int, default=256)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sessions, args.image_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Deterministic stand-ins for the models and NewsAPI, for benchmarks that measure our own code.
+
+Every fake sleeps for a configurable latency and adds it to a per-thread model clock,
+so a benchmark can subtract model time from a step's wall time and report the
+overhead of the surrounding pipeline.
+"""
+import random
+import threading
+import time
+from typing import List, Optional
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+import requests
+from PIL import Image
+
+from schemas import Article
+from tools.article_store import SQLiteArticleStore
+from tools.news_tool import NewsTool
+
+REPLIES = {
+    "title": '{"titles": ["Mayor Unveils Secret Plan", "Council Shocked by Twist", "City Wakes to Strange News"]}',
+    "continuation": '{"options": ["A hidden witness comes forward.", "The plan was a decoy all along.", "A rival city responds."]}',
+    "story": "\n\n".join(
+        f"Paragraph {i}: the city council met again as rumours spread through the markets and the river district."
+        for i in range(1, 9)
+    ),
+    "image": '{"subject": "a mayor at a podium", "setting": "city hall at night", "lighting": "neon", '
+             '"mood": "tense", "realism_level": "photorealistic"}',
+}
+
+# Headline parts with coprime list lengths, so consecutive headlines share no part and survive dedup
+_SUBJECTS = ("Council", "Startup", "Museum", "Harbour authority", "University", "Rail operator", "Hospital",
+             "Football club", "Bakery chain", "Observatory", "Ferry line", "Orchestra", "Library")
+_ACTIONS = ("approves budget for", "delays plans for", "unveils prototype of", "faces questions over",
+            "reports record demand for", "cancels contract for", "pilots", "votes against", "expands",
+            "launches inquiry into", "celebrates")
+_OBJECTS = ("river bridge", "night trains", "solar roofs", "drone deliveries", "free museum days",
+            "a four-day week", "robot waiters")
+
+_model_clock = threading.local()
+
+
+def reset_model_time() -> None:
+    _model_clock.seconds = 0.0
+
+
+def model_time() -> float:
+    """Seconds the current thread spent inside fakes since the last reset."""
+    return getattr(_model_clock, "seconds", 0.0)
+
+
+class _Latency:
+    def __init__(self, seconds: float, jitter: float, seed: int):
+        self.seconds = seconds
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self) -> None:
+        with self._lock:
+            delay = max(0.0, self.seconds + self._rng.uniform(-self.jitter, self.jitter))
+        start = time.perf_counter()
+        if delay:
+            time.sleep(delay)
+        _model_clock.seconds = model_time() + (time.perf_counter() - start)
+
+
+class FakeLLM(Runnable):
+    """Chat-model stand-in for the chains' `llm=` argument, returning a canned reply."""
+
+    def __init__(self, reply: str, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.reply = reply
+        self._latency = _Latency(latency, jitter, seed)
+
+    def invoke(self, input, config=None, **kwargs) -> AIMessage:
+        self._latency.sleep()
+        return AIMessage(content=self.reply)
+
+
+class FakePipeline:
+    """Diffusion pipeline stand-in for `ImageChain(pipeline=...)`."""
+
+    class _Output:
+        def __init__(self, image):
+            self.images = [image]
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, size: int = 512, seed: int = 0):
+        self._latency = _Latency(latency, jitter, seed)
+        self._image = Image.new("RGB", (size, size), (90, 60, 140))
+
+    def __call__(self, prompt: str = "", **kwargs):
+        self._latency.sleep()
+        return self._Output(self._image.copy())
+
+
+class FakeNewsTool(NewsTool):
+    """NewsTool serving synthetic headlines instead of calling NewsAPI, with an in-memory store."""
+
+    def __init__(self, latency: float = 0.0, seed: int = 0):
+        super().__init__(api_key="fake", store=SQLiteArticleStore(), offline=False)
+        self._latency = _Latency(latency, 0.0, seed)
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def _headlines(self, category: str, page_size: int) -> List[Article]:
+        self._latency.sleep()
+        with self._lock:
+            base = self._counter
+            self._counter += page_size
+        return [
+            Article.model_validate({
+                "title": f"{_SUBJECTS[(base + i) % 13]} {_ACTIONS[(base + i) % 11]} {_OBJECTS[(base + i) % 7]} - Outlet {i}",
+                "description": f"Officials discussed item {base + i} at length. " * 3,
+                "content": f"Body of article {base + i}. " * 60,
+                "url": f"https://news.example.com/{category}/{base + i}",
+                "preview": f"Body of article {base + i}.",
+            })
+            for i in range(page_size)
+        ]
+
+    def fetch_page(
+        self,
+        category: str = "general",
+        page: int = 1,
+        page_size: int = 10,
+        session: Optional[requests.Session] = None,
+    ) -> List[Article]:
+        articles = self._headlines(category, page_size)
+        self.store.add(articles, category)
+        return articles
+
+    def fetch_top_headlines(self, category: str = "general", page_size: int = 10) -> List[Article]:
+        # No random page or shuffle, so runs are repeatable
+        return self._headlines(category, page_size)
+
+
+def install(llm_latency: float = 0.0, story_latency: Optional[float] = None, image_latency: float = 0.0,
+            news_latency: float = 0.0, jitter: float = 0.0, image_size: int = 512) -> None:
+    """Replace the models and NewsAPI used by `main.py` with fakes."""
+    import main
+    from chains.continuation_chain import ContinuationChain
+    from chains.final_story_chain import FinalStoryChain
+    from chains.image_chain import ImageChain
+    from chains.title_chain import TitleChain
+
+    story_latency = llm_latency if story_latency is None else story_latency
+    main.news_tool = FakeNewsTool(news_latency)
+    main.title_chain = TitleChain(llm=FakeLLM(REPLIES["title"], llm_latency, jitter, seed=1))
+    main.continuation_chain = ContinuationChain(llm=FakeLLM(REPLIES["continuation"], llm_latency, jitter, seed=2))
+    main.final_chain = FinalStoryChain(llm=FakeLLM(REPLIES["story"], story_latency, jitter, seed=3))
+    main.image_chain = ImageChain(
+        llm=FakeLLM(REPLIES["image"], llm_latency, jitter, seed=4),
+        pipeline=FakePipeline(image_latency, jitter, size=image_size, seed=5),
+    )
+
+
+__all__ = ["FakeLLM", "FakeNewsTool", "FakePipeline", "REPLIES", "install", "model_time", "reset_model_time"]
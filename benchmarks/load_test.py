@@ -0,0 +1,432 @@
+"""Concurrent-user load test of the Dash app over HTTP.
+
+Each virtual user replays what the browser does for one story: the page load
+(`/`, `/_dash-layout`, `/_dash-dependencies`), then the `/_dash-update-component`
+calls for "Load Latest News", a title click and a continuation click, with a think
+time between clicks. Clicks that start a background job are followed by the polls
+the browser's `dcc.Interval` sends, and timed until the job's result arrives. Server
+callbacks that the browser chains after an output changes are sent too, with the
+value the server just returned; clientside callbacks are skipped. Request bodies are built
+from the app's own `/_dash-dependencies`, so they match the callbacks as they are
+currently declared.
+
+Concurrency ramps through `--users`; for each level every user runs for `--duration`
+seconds. Per callback it reports p50/p95/p99 latency and the error rate, and the
+highest level that kept every p95 under `--p95-slo` without errors. Per completed
+journey it reports the callback requests made (polls and chained callbacks included)
+and their payload bytes (request plus response bodies).
+
+By default the app runs in-process on a free port with the fake models from
+`benchmarks.fakes`; `--url` targets an app started elsewhere instead.
+
+    python -m benchmarks.load_test --users 1,4,8,16 --duration 30 --llm-latency 0.2
+    python -m benchmarks.load_test --url http://localhost:7860 --users 2,4
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from benchmarks import fakes
+from benchmarks.bench_e2e import _git_commit, percentile
+
+JOURNEY = ("load", "select_title", "select_continuation")
+# Input that triggers each journey step, and the background job poll
+TRIGGERS = {
+    "load": "load-btn.n_clicks",
+    "select_title": '{"index":["ALL"],"type":"title-btn"}.n_clicks',
+    "select_continuation": '{"index":["ALL"],"type":"cont-btn"}.n_clicks',
+    "poll": "job-poll.n_intervals",
+}
+# The app's dcc.Interval period for polling a background job
+POLL_INTERVAL = 0.5
+# State of the `job` store once the previous click's job has finished
+_NO_JOB = {"id": "job", "property": "data", "value": None}
+_BUTTON_TYPES = {"select_title": "title-btn", "select_continuation": "cont-btn"}
+
+
+def _parse_outputs(output: str) -> List[dict]:
+    # "..a.children...b.data@hash.." for several outputs, "a.children" for one
+    specs = output[2:-2].split("...") if output.startswith("..") else [output]
+    outputs = []
+    for spec in specs:
+        component, prop = spec.rsplit(".", 1)
+        outputs.append({"id": component, "property": prop})
+    return outputs
+
+
+def _key(component, prop: str) -> str:
+    if isinstance(component, dict):
+        component = json.dumps(component, sort_keys=True, separators=(",", ":"))
+    return f"{component}.{prop.split('@')[0]}"
+
+
+class Callbacks:
+    """The app's callbacks, indexed by their triggering input."""
+
+    def __init__(self, dependencies: List[dict]):
+        self.by_input: Dict[str, List[dict]] = defaultdict(list)
+        for dep in dependencies:
+            dep = {**dep, "outputs": _parse_outputs(dep["output"])}
+            for inp in dep["inputs"]:
+                self.by_input[_key(inp["id"], inp["property"])].append(dep)
+
+    def trigger(self, name: str) -> dict:
+        (dep,) = self.by_input[TRIGGERS[name]]
+        return dep
+
+    def followups(self, changed: Dict[str, object]) -> List[Tuple[dict, list]]:
+        """Callbacks whose inputs all just changed and that need no state, with their input values."""
+        found = []
+        for key in changed:
+            for dep in self.by_input.get(key, []):
+                keys = [_key(i["id"], i["property"]) for i in dep["inputs"]]
+                # Clientside callbacks run in the browser without a request
+                if dep.get("clientside_function") or dep["state"] or not all(k in changed for k in keys):
+                    continue
+                inputs = [{**i, "value": changed[k]} for i, k in zip(dep["inputs"], keys)]
+                found.append((dep, inputs))
+        return found
+
+
+def _body(dep: dict, inputs: list, state: list, changed: List[str]) -> dict:
+    outputs = dep["outputs"]
+    return {
+        "output": dep["output"],
+        "outputs": outputs if len(outputs) > 1 or dep["output"].startswith("..") else outputs[0],
+        "inputs": inputs,
+        "state": state,
+        "changedPropIds": changed,
+    }
+
+
+def _buttons(button_type: str, count: int, clicked: int) -> list:
+    return [
+        {"id": {"index": i, "type": button_type}, "property": "n_clicks", "value": 1 if i == clicked else 0}
+        for i in range(count)
+    ]
+
+
+def _count_buttons(tree, button_type: str) -> int:
+    # Buttons rendered in a returned component tree
+    if isinstance(tree, dict):
+        found = 1 if isinstance(tree.get("id"), dict) and tree["id"].get("type") == button_type else 0
+        return found + sum(_count_buttons(v, button_type) for v in tree.values())
+    if isinstance(tree, list):
+        return sum(_count_buttons(v, button_type) for v in tree)
+    return 0
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.journeys = 0
+        # Callback traffic of completed journeys: requests and payload bytes (request + response bodies)
+        self.journey_requests = 0
+        self.journey_bytes = 0
+
+    def record(self, step: str, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.latencies[step].append(seconds)
+            if not ok:
+                self.errors[step] += 1
+
+    def journey_done(self, requests_made: int, payload_bytes: int) -> None:
+        with self._lock:
+            self.journeys += 1
+            self.journey_requests += requests_made
+            self.journey_bytes += payload_bytes
+
+    def per_journey(self) -> dict:
+        if not self.journeys:
+            return {"callback_requests": 0, "callback_bytes": 0}
+        return {
+            "callback_requests": round(self.journey_requests / self.journeys, 2),
+            "callback_bytes": round(self.journey_bytes / self.journeys),
+        }
+
+    def summary(self) -> Dict[str, dict]:
+        out = {}
+        for step, values in sorted(self.latencies.items()):
+            out[step] = {
+                "requests": len(values),
+                "error_rate": round(self.errors[step] / len(values), 4),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+            }
+        return out
+
+
+class VirtualUser:
+    def __init__(self, base_url: str, callbacks: Callbacks, recorder: Recorder, think: Tuple[float, float],
+                 category: str, seed: int, timeout: float):
+        self.base_url = base_url.rstrip("/")
+        self.callbacks = callbacks
+        self.recorder = recorder
+        self.think = think
+        self.category = category
+        self.rng = random.Random(seed)
+        self.timeout = timeout
+        self.http = requests.Session()
+        self._requests = 0
+        self._bytes = 0
+
+    def _timed(self, step: str, method: str, path: str, **kwargs) -> Optional[requests.Response]:
+        start = time.perf_counter()
+        try:
+            resp = self.http.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(step, time.perf_counter() - start, ok=False)
+            return None
+        ok = resp.status_code in (200, 204)
+        self.recorder.record(step, time.perf_counter() - start, ok)
+        return resp if ok else None
+
+    def _post(self, body: dict) -> Optional[requests.Response]:
+        try:
+            resp = self.http.post(self.base_url + "/_dash-update-component", json=body, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        self._requests += 1
+        self._bytes += len(resp.request.body or b"") + len(resp.content)
+        return resp if resp.status_code in (200, 204) else None
+
+    @staticmethod
+    def _merge(response: dict, update: dict) -> dict:
+        merged = {c: dict(props) for c, props in response.items()}
+        for component, props in update.items():
+            merged.setdefault(component, {}).update(props)
+        return merged
+
+    def _update(self, step: str, body: dict) -> Optional[dict]:
+        """POST a callback and return its outputs. A click that starts a background job is then
+        polled like the app's `dcc.Interval` does; the step's latency runs until the job's result."""
+        start = time.perf_counter()
+        resp = self._post(body)
+        response: Optional[dict] = None
+        if resp is not None:
+            response = resp.json().get("response", {}) if resp.status_code == 200 else {}
+        job = (response or {}).get("job", {}).get("data")
+        polls = 0
+        while job and response is not None:
+            if time.perf_counter() - start > self.timeout:
+                response = None
+                break
+            time.sleep(POLL_INTERVAL)
+            polls += 1
+            polled = self._post(_body(
+                self.callbacks.trigger("poll"),
+                [{"id": "job-poll", "property": "n_intervals", "value": polls}],
+                [{"id": "job", "property": "data", "value": job}],
+                ["job-poll.n_intervals"],
+            ))
+            if polled is None:
+                response = None
+                break
+            update = polled.json().get("response", {}) if polled.status_code == 200 else {}
+            response = self._merge(response, update)
+            job = update.get("job", {}).get("data", job)
+        # The app reports failed steps as a red alert rather than an HTTP error
+        ok = response is not None and '"color":"danger"' not in json.dumps(response)
+        self.recorder.record(step, time.perf_counter() - start, ok)
+        return response if ok else None
+
+    def _callback(self, step: str, dep: dict, inputs: list, state: list, changed: List[str]) -> Optional[dict]:
+        response = self._update(step, _body(dep, inputs, state, changed))
+        if not response:
+            return None
+        # Fire what the browser would chain on the changed outputs
+        updates = {_key(c, p): v for c, props in response.items() for p, v in props.items()}
+        for followup, follow_inputs in self.callbacks.followups(updates):
+            self._update("followup",
+                         _body(followup, follow_inputs, [], [_key(i["id"], i["property"]) for i in follow_inputs]))
+        return response
+
+    def _pause(self) -> None:
+        time.sleep(self.rng.uniform(*self.think))
+
+    def page_load(self) -> None:
+        for path in ("/", "/_dash-layout", "/_dash-dependencies"):
+            self._timed("page_load", "GET", path)
+
+    def journey(self) -> bool:
+        self._requests = self._bytes = 0
+        dep = self.callbacks.trigger("load")
+        response = self._callback(
+            "load", dep,
+            [{"id": "load-btn", "property": "n_clicks", "value": 1}],
+            [{"id": "category", "property": "value", "value": self.category}, _NO_JOB],
+            ["load-btn.n_clicks"],
+        )
+        session_id = (response or {}).get("session-id", {}).get("data")
+        if not session_id:
+            return False
+        session_state = [{"id": "session-id", "property": "data", "value": session_id}, _NO_JOB]
+        tree = response
+
+        for step in JOURNEY[1:]:
+            self._pause()
+            button_type = _BUTTON_TYPES[step]
+            count = _count_buttons(tree, button_type)
+            if not count:
+                return False
+            clicked = self.rng.randrange(count)
+            changed = [_key({"index": clicked, "type": button_type}, "n_clicks")]
+            tree = self._callback(step, self.callbacks.trigger(step), [_buttons(button_type, count, clicked)],
+                                  session_state, changed)
+            if tree is None:
+                return False
+        return True
+
+    def run_until(self, stop_at: float) -> None:
+        self.page_load()
+        while time.monotonic() < stop_at:
+            if self.journey():
+                self.recorder.journey_done(self._requests, self._bytes)
+            self._pause()
+
+
+def run_level(base_url: str, callbacks: Callbacks, users: int, duration: float, think: Tuple[float, float],
+              category: str, timeout: float) -> dict:
+    recorder = Recorder()
+    stop_at = time.monotonic() + duration
+    threads = [
+        threading.Thread(
+            target=VirtualUser(base_url, callbacks, recorder, think, category, seed=n, timeout=timeout).run_until,
+            args=(stop_at,),
+            daemon=True,
+        )
+        for n in range(users)
+    ]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    return {
+        "users": users,
+        "seconds": round(elapsed, 2),
+        "journeys": recorder.journeys,
+        "journeys_per_minute": round(recorder.journeys / elapsed * 60, 2) if elapsed else 0.0,
+        "per_journey": recorder.per_journey(),
+        "callbacks": recorder.summary(),
+    }
+
+
+def sustained_users(levels: List[dict], p95_slo_ms: float) -> Optional[int]:
+    """Highest user count whose journey callbacks all met the p95 SLO without errors."""
+    best = None
+    for level in levels:
+        steps = [level["callbacks"].get(s) for s in JOURNEY]
+        if all(s and s["error_rate"] == 0 and s["p95_ms"] <= p95_slo_ms for s in steps):
+            best = level["users"]
+        else:
+            break
+    return best
+
+
+@contextlib.contextmanager
+def local_server(llm_latency: float, story_latency: float, image_latency: float, jitter: float):
+    """The Dash app with fake models on a free local port (threaded, like the Dash dev server)."""
+    from werkzeug.serving import make_server
+
+    # One access log line per request would drown the results
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    fakes.install(llm_latency=llm_latency, story_latency=story_latency, image_latency=image_latency, jitter=jitter)
+    from app import create_dash_app
+
+    server = make_server("127.0.0.1", 0, create_dash_app().server, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+
+
+def run(base_url: str, users: List[int], duration: float, think: Tuple[float, float], category: str,
+        timeout: float, p95_slo: float) -> dict:
+    callbacks = Callbacks(requests.get(base_url.rstrip("/") + "/_dash-dependencies", timeout=timeout).json())
+    levels = []
+    for n in users:
+        levels.append(run_level(base_url, callbacks, n, duration, think, category, timeout))
+        journey = levels[-1]["callbacks"]
+        print(
+            f"[load_test] {n:>3} users: {levels[-1]['journeys_per_minute']} journeys/min  "
+            f"{levels[-1]['per_journey']['callback_requests']} requests / "
+            f"{levels[-1]['per_journey']['callback_bytes']} bytes per journey  "
+            + "  ".join(f"{s} p95 {journey[s]['p95_ms']}ms err {journey[s]['error_rate']:.1%}" for s in JOURNEY if s in journey),
+            file=sys.stderr,
+        )
+    return {
+        "benchmark": "load_test",
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "levels": levels,
+        "p95_slo_ms": p95_slo * 1000,
+        "sustained_users": sustained_users(levels, p95_slo * 1000),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="running app to test (default: in-process app with fake models)")
+    parser.add_argument("--users", default="1,2,4,8", help="comma-separated concurrent user counts")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level")
+    parser.add_argument("--think-min", type=float, default=1.0, help="minimum think time between clicks")
+    parser.add_argument("--think-max", type=float, default=3.0, help="maximum think time between clicks")
+    parser.add_argument("--category", default="general")
+    parser.add_argument("--timeout", type=float, default=300.0, help="HTTP timeout per request")
+    parser.add_argument("--p95-slo", type=float, default=5.0, help="p95 seconds per callback counted as sustained")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake LLM call (in-process only)")
+    parser.add_argument("--story-latency", type=float, default=None, help="seconds per story call (default: --llm-latency)")
+    parser.add_argument("--image-latency", type=float, default=0.5, help="seconds per fake diffusion call")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--output", default=None, help="result file (default: bench_results/load_<commit>.json)")
+    parser.add_argument("--verbose", action="store_true", help="keep the app's own output")
+    args = parser.parse_args()
+
+    users = [int(u) for u in args.users.split(",")]
+    think = (args.think_min, args.think_max)
+    story_latency = args.llm_latency if args.story_latency is None else args.story_latency
+    if args.url:
+        result = run(args.url, users, args.duration, think, args.category, args.timeout, args.p95_slo)
+    else:
+        # The pipeline prints progress for every request; per-level lines go to stderr
+        sink = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        with sink, local_server(args.llm_latency, story_latency, args.image_latency, args.jitter) as url:
+            result = run(url, users, args.duration, think, args.category, args.timeout, args.p95_slo)
+    result["config"] = {
+        "url": args.url or "in-process",
+        "duration": args.duration,
+        "think": list(think),
+        "llm_latency": None if args.url else args.llm_latency,
+        "story_latency": None if args.url else story_latency,
+        "image_latency": None if args.url else args.image_latency,
+    }
+
+    output = args.output or os.path.join("bench_results", f"load_{result['commit']}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    print(f"[load_test] sustained {result['sustained_users']} users at p95 <= {args.p95_slo}s; results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Circuit breaker around Ollama calls so an unhealthy server makes requests fail fast
+import os
+import time
+import threading
+from typing import Callable, Optional
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling Ollama while the circuit is open."""
+
+
+def http_probe(base_url: str, timeout: float = 2.0) -> bool:
+    """Health probe: Ollama answers GET /api/version when it is able to serve."""
+    try:
+        resp = requests.get(f"{base_url.rstrip('/')}/api/version", timeout=timeout)
+        return resp.status_code == 200
+    except Exception:
+        return False
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker with an optional background health probe.
+
+    - closed: calls pass; `failure_threshold` consecutive failures open the circuit.
+    - open: calls raise CircuitOpenError immediately. After `reset_timeout` seconds, or
+      as soon as the background probe sees the server healthy, the circuit half-opens.
+    - half_open: a single trial call is let through; success closes the circuit,
+      failure opens it again.
+
+    The probe also opens a closed circuit when the server stops answering, so the first
+    request after an outage fails fast instead of waiting for connection timeouts.
+    """
+
+    def __init__(
+        self,
+        name: str = "ollama",
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+        probe_interval: float = 5.0,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._rejected = 0
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_env(cls, probe: Optional[Callable[[], bool]] = None) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("OLLAMA_BREAKER_THRESHOLD", "3")),
+            reset_timeout=float(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", "30")),
+            probe=probe,
+            probe_interval=float(os.getenv("OLLAMA_PROBE_INTERVAL", "5")),
+            enabled=os.getenv("OLLAMA_BREAKER_ENABLED", "true").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+
+    def _open(self, reason: str) -> None:
+        if self._state != OPEN:
+            print(f"[CircuitBreaker] {self.name} circuit OPEN ({reason})")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def before_call(self) -> None:
+        """Raise CircuitOpenError unless a call may go through now."""
+        if not self.enabled:
+            return
+        self._ensure_probe()
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+            self._rejected += 1
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open); failing fast")
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != CLOSED:
+                print(f"[CircuitBreaker] {self.name} circuit CLOSED (recovered)")
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open(f"{self._failures} consecutive failure(s)")
+
+    def call(self, fn: Callable, *args, **kwargs):
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    # -- background probe ---------------------------------------------------------
+
+    def _ensure_probe(self) -> None:
+        if self.probe is None or self._probe_thread is not None:
+            return
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(target=self._probe_loop, name=f"{self.name}-health-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        probe = self.probe
+        if probe is None:
+            return
+        while not self._stop.wait(self.probe_interval):
+            healthy = probe()
+            with self._lock:
+                if healthy and self._state == OPEN:
+                    # Let the next real call through as the half-open trial
+                    self._state = HALF_OPEN
+                    self._trial_in_flight = False
+                elif not healthy and self._state == CLOSED:
+                    self._open("health probe failed")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._maybe_half_open()
+            return {"state": self._state, "consecutive_failures": self._failures, "rejected_calls": self._rejected}
+
+
+def _default_probe() -> bool:
+    # Healthy while at least one balanced Ollama endpoint answers
+    from chains.ollama_balancer import balancer
+
+    return balancer.any_healthy()
+
+
+breaker = CircuitBreaker.from_env(probe=_default_probe)
+
+
+__all__ = ["CircuitBreaker", "CircuitOpenError", "breaker", "http_probe", "CLOSED", "OPEN", "HALF_OPEN"]
@@ -1,63 +1,34 @@
-import os
 import json
 import re
-from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOllama
-
-# Lazy local generator (transformers) to use when Ollama is unavailable
-_LOCAL_PIPE = None
-def _get_local_pipe():
-    global _LOCAL_PIPE
-    if _LOCAL_PIPE is None:
-        try:
-            from transformers import pipeline
-            import torch
-
-            device = 0 if torch.cuda.is_available() else -1
-            model_name = os.getenv("LOCAL_GEN_MODEL", "gpt2")
-            _LOCAL_PIPE = pipeline("text-generation", model=model_name, device=device)
-        except Exception:
-            _LOCAL_PIPE = None
-    return _LOCAL_PIPE
-
-
-def _ollama_base_kwargs():
-    base = os.getenv("OLLAMA_BASE_URL")
-    if base:
-        return {"base_url": base}
-    return {}
+from chains.ollama_client import RoutedChatOllama, run_prompt
+from chains.prompt_prefix import article_prompt
+from chains.local_fallback import local_generator
+from observability.tracing import span
 from schemas import ContinuationOptions
 
 
 class ContinuationChain:
     def __init__(self, llm=None):
-        self.llm = llm or ChatOllama(model="llama3:8b", temperature=0.8, **_ollama_base_kwargs())
-        self.prompt = PromptTemplate(
-            input_variables=["article_text"],
-            template=(
-                "You are an imaginative writer. Given the following news article text, generate exactly 3 distinct continuation ideas "
-                "that could plausibly continue the narrative in a fictional direction. Respond with a single JSON object exactly like: "
-                "{{\"options\": [\"option1\", \"option2\", \"option3\"]}}. Do not add any other text.\n\nArticle:\n{article_text}"
-            ),
+        self.llm = llm or RoutedChatOllama("continuation")
+        # Article first, instructions last: shares the cached prefix with the later session steps
+        self.prompt = article_prompt(
+            "You are an imaginative writer. Given the news article above, generate exactly 3 distinct continuation ideas "
+            "that could plausibly continue the narrative in a fictional direction. Respond with a single JSON object exactly like: "
+            "{{\"options\": [\"option1\", \"option2\", \"option3\"]}}. Do not add any other text."
         )
 
-    def generate(self, article_text: str) -> ContinuationOptions:
+    def generate(self, article_text: str, article_title: str = "") -> ContinuationOptions:
+        inputs = {"article_title": article_title, "article_text": article_text}
         # First try the configured LLM (usually Ollama)
         try:
-            chain = self.prompt | self.llm
-            res = chain.invoke({"article_text": article_text}).content
+            res = run_prompt("continuation", self.prompt, self.llm, inputs)
         except Exception as primary_exc:
-            # Attempt local transformers generator as a substitute
-            try:
-                pipe = _get_local_pipe()
-                if pipe is None:
-                    raise primary_exc
-                prompt_text = self.prompt.format(article_text=article_text)
-                gen = pipe(prompt_text, max_new_tokens=256, do_sample=True, temperature=0.8)[0]
-                res = gen.get("generated_text") or gen.get("text") or ""
-            except Exception:
-                # re-raise the original exception to be handled by caller
-                raise primary_exc
+            # Attempt the shared local generator as a substitute (re-raises the original on failure)
+            res = local_generator.generate_or_raise(self.prompt.format(**inputs), primary_exc, max_new_tokens=256, temperature=0.8)
+        with span("parse", chain="continuation"):
+            return self._parse(res)
+
+    def _parse(self, res: str) -> ContinuationOptions:
         # robust JSON extraction (same strategy as TitleChain)
         def extract_json(text: str):
             try:
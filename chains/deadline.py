@@ -0,0 +1,112 @@
+# Request deadlines and per-step time budgets for generation
+import os
+import time
+import functools
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a step has no time budget left."""
+
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    seconds = float(value)
+    return seconds if seconds > 0 else None
+
+
+# Per-call budget of each chain's LLM call (GEN_TIMEOUT_<CHAIN>), on top of the request deadline
+_DEFAULT_STEP_TIMEOUTS = {"title": 60.0, "continuation": 60.0, "story": 150.0, "image": 60.0}
+
+
+class Deadline:
+    """Absolute point in time by which one user request (one click) must be answered."""
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.cancelled = False
+
+    @classmethod
+    def from_env(cls) -> "Deadline":
+        return cls(_env_float("REQUEST_DEADLINE_SECONDS", 180.0))
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self, step: str) -> None:
+        if self.cancelled:
+            raise DeadlineExceeded(f"Request cancelled before {step}")
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline reached before {step}")
+
+    def cancel(self) -> None:
+        """End the request now (e.g. the user pressed Cancel): later checks fail and no retry starts."""
+        self.cancelled = True
+        self.expires_at = time.monotonic()
+
+    def allows_attempt(self) -> bool:
+        """False when too little time is left for another attempt to be worth starting."""
+        return self.remaining() >= (_env_float("GEN_MIN_ATTEMPT_SECONDS", 5.0) or 0.0)
+
+    def cap(self, seconds: float) -> float:
+        """Clamp a sleep/wait so it never outlives the deadline."""
+        return min(seconds, self.remaining())
+
+    def step_budget(self, step: str) -> Optional[float]:
+        """Seconds the given step may take: its own timeout, bounded by the request deadline."""
+        step_timeout = _env_float(f"GEN_TIMEOUT_{step.upper()}", _DEFAULT_STEP_TIMEOUTS.get(step))
+        remaining = self.remaining()
+        if step_timeout is None:
+            return None if remaining == float("inf") else remaining
+        return min(step_timeout, remaining)
+
+
+_current: ContextVar[Deadline] = ContextVar("deadline", default=Deadline(None))
+
+
+def current_deadline() -> Deadline:
+    return _current.get()
+
+
+def with_deadline(fn):
+    """Decorator: runs `fn` under the `deadline=` passed by the caller (or REQUEST_DEADLINE_SECONDS)."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, deadline: Optional[Deadline] = None, **kwargs):
+        token = _current.set(deadline or Deadline.from_env())
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return wrapper
+
+
+class TimeoutStats:
+    def __init__(self):
+        self._lock = Lock()
+        self._counts: Dict[str, int] = {}
+
+    def record(self, step: str) -> None:
+        with self._lock:
+            self._counts[step] = self._counts.get(step, 0) + 1
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+timeout_stats = TimeoutStats()
+
+
+__all__ = ["Deadline", "DeadlineExceeded", "current_deadline", "with_deadline", "timeout_stats"]
@@ -1,33 +1,29 @@
-import os
-from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOllama
-
-
-def _ollama_base_kwargs():
-    base = os.getenv("OLLAMA_BASE_URL")
-    if base:
-        return {"base_url": base}
-    return {}
+from chains.ollama_client import RoutedChatOllama, run_prompt
+from chains.prompt_prefix import article_prompt
+from chains.local_fallback import local_generator
 
 
 class FinalStoryChain:
     def __init__(self, llm=None):
-        self.llm = llm or ChatOllama(model="llama3:8b", temperature=0.9, **_ollama_base_kwargs())
-        self.prompt = PromptTemplate(
-            input_variables=["article_title", "article_text", "continuation_choice"],
-            template=(
-                "You are a satirical fake news writer. Given the real news article below and a chosen continuation idea, "
+        self.llm = llm or RoutedChatOllama("story")
+        # Same system + article prefix as ContinuationChain, so Ollama only evaluates the instructions
+        self.prompt = article_prompt(
+            (
+                "You are a satirical fake news writer. Given the real news article above and a chosen continuation idea, "
                 "write a sensationalized fake news story in 6-10 paragraphs. Use exaggerated claims, dramatic language, "
                 "absurd unnamed sources (like 'sources close to the matter', 'anonymous insiders'), clickbait-style writing, "
                 "conspiracy theories, and over-the-top speculation. Make it clearly satirical and ridiculous while building on the article's themes. "
                 "Include fake quotes from fictional experts or officials. Do NOT repeat the article verbatim. Output only the fake news story text.\n\n"
-                "Article Title: {article_title}\n\nArticle Content:\n{article_text}\n\nChosen Continuation Idea:\n{continuation_choice}"
-            ),
+                "Chosen Continuation Idea:\n{continuation_choice}"
+            )
         )
 
     def generate(self, article_title: str, article_text: str, continuation_choice: str) -> str:
-        chain = self.prompt | self.llm
-        res = chain.invoke({"article_title": article_title, "article_text": article_text, "continuation_choice": continuation_choice}).content
+        inputs = {"article_title": article_title, "article_text": article_text, "continuation_choice": continuation_choice}
+        try:
+            res = run_prompt("story", self.prompt, self.llm, inputs)
+        except Exception as primary_exc:
+            res = local_generator.generate_or_raise(self.prompt.format(**inputs), primary_exc, max_new_tokens=512, temperature=0.9)
         return res.strip()
 
 
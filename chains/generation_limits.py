@@ -0,0 +1,108 @@
+# Per-chain output limits (token caps, stop sequences, paragraph stop) and decode metrics
+import os
+import re
+import json
+from dataclasses import dataclass
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+# JSON chains produce a single flat object, so generation can stop at its closing brace
+_JSON_CHAINS = ("title", "continuation", "image")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+@dataclass(frozen=True)
+class GenerationLimits:
+    num_predict: Optional[int] = None
+    stop: Tuple[str, ...] = ()
+    max_paragraphs: Optional[int] = None
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    number = int(value)
+    return number if number > 0 else None
+
+
+def limits_for(chain_name: str, default_num_predict: Optional[int] = None) -> GenerationLimits:
+    """Resolve the limits for a chain.
+
+    Env overrides per chain: <CHAIN>_NUM_PREDICT (0 disables the cap), <CHAIN>_STOP
+    (JSON list of stop strings) and, for stories, STORY_MAX_PARAGRAPHS.
+    """
+    prefix = chain_name.upper()
+    num_predict = _env_int(f"{prefix}_NUM_PREDICT", default_num_predict)
+    stop_env = os.getenv(f"{prefix}_STOP")
+    if stop_env is not None:
+        stop = tuple(json.loads(stop_env) if stop_env.strip() else [])
+    else:
+        stop = ("}",) if chain_name in _JSON_CHAINS else ()
+    max_paragraphs = _env_int("STORY_MAX_PARAGRAPHS", 10) if chain_name == "story" else None
+    return GenerationLimits(num_predict=num_predict, stop=stop, max_paragraphs=max_paragraphs)
+
+
+def close_json(text: str, limits: GenerationLimits) -> str:
+    """Re-append the closing brace that Ollama strips when '}' is a stop sequence."""
+    if "}" in limits.stop and text.count("{") > text.count("}"):
+        return text + "}"
+    return text
+
+
+def paragraph_cutoff(text: str, max_paragraphs: int) -> Optional[int]:
+    """Index at which `text` should be cut to keep `max_paragraphs`, or None if still within the limit."""
+    body_start = len(text) - len(text.lstrip())
+    breaks = 0
+    for match in _PARAGRAPH_BREAK.finditer(text, body_start):
+        breaks += 1
+        if breaks >= max_paragraphs and text[match.end():].strip():
+            return match.start()
+    return None
+
+
+class GenerationStats:
+    """Thread-safe per-chain counters of generated tokens and decode time."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def record(self, chain_name: str, tokens: int, prompt_tokens: int = 0, decode_seconds: float = 0.0, stopped_early: bool = False) -> None:
+        with self._lock:
+            s = self._stats.setdefault(
+                chain_name,
+                {"calls": 0, "tokens": 0, "prompt_tokens": 0, "decode_seconds": 0.0, "stopped_early": 0, "max_tokens": 0},
+            )
+            s["calls"] += 1
+            s["tokens"] += tokens
+            s["prompt_tokens"] += prompt_tokens
+            s["decode_seconds"] += decode_seconds
+            s["stopped_early"] += int(stopped_early)
+            s["max_tokens"] = max(s["max_tokens"], tokens)
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            out = {}
+            for name, s in self._stats.items():
+                calls = s["calls"] or 1
+                out[name] = {
+                    "calls": s["calls"],
+                    "avg_tokens_per_call": round(s["tokens"] / calls, 1),
+                    "max_tokens_per_call": s["max_tokens"],
+                    "avg_prompt_tokens_per_call": round(s["prompt_tokens"] / calls, 1),
+                    "avg_decode_seconds": round(s["decode_seconds"] / calls, 3),
+                    "tokens_per_second": round(s["tokens"] / s["decode_seconds"], 1) if s["decode_seconds"] else 0.0,
+                    "stopped_early": s["stopped_early"],
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+generation_stats = GenerationStats()
+
+
+__all__ = ["GenerationLimits", "limits_for", "close_json", "paragraph_cutoff", "GenerationStats", "generation_stats"]
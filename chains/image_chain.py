@@ -2,15 +2,12 @@ import os
 import json
 import base64
 from io import BytesIO
-from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOllama
-
-
-def _ollama_base_kwargs():
-    base = os.getenv("OLLAMA_BASE_URL")
-    if base:
-        return {"base_url": base}
-    return {}
+from chains.ollama_client import RoutedChatOllama, run_prompt
+from chains.prompt_prefix import article_prompt
+from chains.local_fallback import local_generator
+from chains.deadline import current_deadline
+from observability.profiling import profiled
+from observability.tracing import span
 
 # Heavy ML imports are performed lazily inside the class to allow lightweight CI runs
 _HAVE_DIFFUSERS = None
@@ -19,7 +16,7 @@ _HAVE_TORCH = None
 
 class ImageChain:
     def __init__(self, llm=None, pipeline=None):
-        self.llm = llm or ChatOllama(model="llama3:8b", temperature=0.7, **_ollama_base_kwargs())
+        self.llm = llm or RoutedChatOllama("image")
         # If a pipeline is given, use it. Otherwise attempt to load diffusers/torch lazily.
         if pipeline is not None:
             self.pipe = pipeline
@@ -64,15 +61,14 @@ class ImageChain:
                 print(f"[IMAGE] Error loading diffusers/torch: {e}")
                 self.pipe = None
 
-        # Prompt to extract cinematic components
-        self.prompt = PromptTemplate(
-            input_variables=["final_text"],
-            template=(
+        # Prompt to extract cinematic components (behind the session's shared article prefix)
+        self.prompt = article_prompt(
+            (
                 "Extract cinematic image prompt components from the following fictional continuation. "
                 "Return a JSON object with exactly these keys: subject, setting, lighting, mood, realism_level. "
                 "Keep values concise, suitable for an image-generation prompt. Output MUST be valid JSON only.\n\n"
                 "Continuation:\n{final_text}"
-            ),
+            )
         )
 
     def build_prompt_from_components(self, comps: dict) -> str:
@@ -87,36 +83,48 @@ class ImageChain:
         ]
         return ", ".join(parts)
 
-    def generate(self, final_text: str) -> str:
+    @profiled("image.generate")
+    def generate(self, final_text: str, article_title: str = "", article_text: str = "") -> str:
         # Use LLM to extract components
-        print("[IMAGE] Extracting image prompt components from story using LLM...")
-        chain = self.prompt | self.llm
-        comp_raw = chain.invoke({"final_text": final_text}).content
+        inputs = {"article_title": article_title, "article_text": article_text, "final_text": final_text}
         try:
-            comps = json.loads(comp_raw)
-        except Exception:
-            # Fallback: try to extract JSON from text
-            start = comp_raw.find('{')
-            end = comp_raw.rfind('}')
-            if start == -1 or end == -1:
-                raise RuntimeError(f"Could not parse JSON from components: {comp_raw}")
-            comps = json.loads(comp_raw[start:end+1])
+            comp_raw = run_prompt("image", self.prompt, self.llm, inputs)
+        except Exception as primary_exc:
+            comp_raw = local_generator.generate_or_raise(self.prompt.format(**inputs), primary_exc, max_new_tokens=128, temperature=0.7)
+        with span("parse", chain="image"):
+            try:
+                comps = json.loads(comp_raw)
+            except Exception:
+                # Fallback: try to extract JSON from text
+                start = comp_raw.find('{')
+                end = comp_raw.rfind('}')
+                if start == -1 or end == -1:
+                    raise RuntimeError(f"Could not parse JSON from components: {comp_raw}")
+                comps = json.loads(comp_raw[start:end+1])
 
         prompt = self.build_prompt_from_components(comps)
-        print(f"[IMAGE] Prompt extracted. Generating image with Stable Diffusion (this may take 10-60s)...")
 
         # Ensure pipeline is available
         if self.pipe is None:
             raise RuntimeError("Image pipeline is not available in this environment. Install 'torch' and 'diffusers' or build the Docker image without SKIP_HEAVY.")
 
+        # Do not start SDXL when the request deadline has already passed. The single-step
+        # SDXL-Turbo call cannot be interrupted part-way (a step-end callback would only run
+        # after its one step), so this check is the last chance to skip the work.
+        deadline = current_deadline()
+        deadline.check("image generation")
+
         # Generate image using local Stable Diffusion
-        image = self.pipe(prompt=prompt, num_inference_steps=1, guidance_scale=0.0).images[0]
-        print("[IMAGE] ✓ Image generation complete")
-        
+        with span("sdxl.inference", steps=1):
+            image = self.pipe(prompt=prompt, num_inference_steps=1, guidance_scale=0.0).images[0]
+        deadline.check("PNG encoding")
+
         # Convert PIL image to base64
-        buffered = BytesIO()
-        image.save(buffered, format="PNG")
-        b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+        with span("png.encode") as s:
+            buffered = BytesIO()
+            image.save(buffered, format="PNG")
+            b64 = base64.b64encode(buffered.getvalue()).decode("utf-8")
+            s.set_attribute("png.bytes", buffered.tell())
         return b64
 
 
@@ -0,0 +1,297 @@
+# Local text-generation fallback shared by all chains when Ollama is unavailable
+import os
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+import multiprocessing.queues
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, List, Optional
+from chains.deadline import current_deadline
+
+
+def load_transformers_pipeline(model_name: str):
+    """Default loader: a transformers text-generation pipeline (heavy imports happen here)."""
+    from transformers import pipeline
+    import torch
+
+    device = 0 if torch.cuda.is_available() else -1
+    pipe = pipeline("text-generation", model=model_name, device=device)
+    # gpt2-style models have no pad token, which batched generation needs
+    if pipe.tokenizer is not None and pipe.tokenizer.pad_token_id is None:
+        pipe.tokenizer.pad_token_id = pipe.model.config.eos_token_id
+    return pipe
+
+
+def _run_batch(pipe, prompts: List[str], max_new_tokens: int, temperature: float) -> List[str]:
+    outputs = pipe(
+        prompts,
+        max_new_tokens=max_new_tokens,
+        do_sample=True,
+        temperature=temperature,
+        return_full_text=False,
+        batch_size=len(prompts),
+    )
+    texts = []
+    for out in outputs:
+        # pipelines return one list of candidates per prompt
+        gen = out[0] if isinstance(out, list) else out
+        texts.append(gen.get("generated_text") or gen.get("text") or "")
+    return texts
+
+
+_substitutions: ContextVar[Optional[List[str]]] = ContextVar("local_fallback_substitutions", default=None)
+
+
+@contextmanager
+def watch_local_fallback():
+    """Collect the prompts answered by the local model instead of Ollama within the block.
+
+        with watch_local_fallback() as substituted:
+            story = final_chain.generate(...)
+        if substituted: ...  # the story is local fallback text
+    """
+    substituted: List[str] = []
+    token = _substitutions.set(substituted)
+    try:
+        yield substituted
+    finally:
+        _substitutions.reset(token)
+
+
+def _worker_main(loader, model_name, requests_q, responses_q):
+    """Entry point of the optional generation subprocess."""
+    try:
+        pipe = loader(model_name)
+    except Exception as e:
+        responses_q.put(("load", False, repr(e)))
+        return
+    responses_q.put(("load", True, None))
+    while True:
+        item = requests_q.get()
+        if item is None:
+            return
+        batch_id, prompts, max_new_tokens, temperature = item
+        try:
+            responses_q.put((batch_id, True, _run_batch(pipe, prompts, max_new_tokens, temperature)))
+        except Exception as e:
+            responses_q.put((batch_id, False, repr(e)))
+
+
+class LocalGenerationService:
+    """Loads the local model once and serves batched generation requests.
+
+    - The model is loaded lazily, exactly once, under a lock. A failed load is cached
+      and not retried for `retry_after` seconds, so chains fail fast to their callers.
+    - With `use_process=True` the model runs in a separate process, keeping generation
+      off the web server's GIL.
+    - Requests arriving within `batch_window` seconds with the same generation
+      parameters are generated together in a single batched call.
+    - Waiting for the model load or a generation is bounded by `timeout` seconds (and
+      by the request deadline); if the subprocess dies, pending requests fail at once
+      and the model counts as a failed load.
+    """
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        enabled: Optional[bool] = None,
+        use_process: Optional[bool] = None,
+        batch_window: Optional[float] = None,
+        max_batch: Optional[int] = None,
+        retry_after: Optional[float] = None,
+        timeout: Optional[float] = None,
+        loader: Callable = load_transformers_pipeline,
+    ):
+        self.model_name = model_name or os.getenv("LOCAL_GEN_MODEL", "gpt2")
+        self.enabled = enabled if enabled is not None else os.getenv("LOCAL_GEN_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.use_process = use_process if use_process is not None else os.getenv("LOCAL_GEN_PROCESS", "false").lower() in ("1", "true", "yes")
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("LOCAL_GEN_BATCH_WINDOW", "0.05"))
+        self.max_batch = max_batch or int(os.getenv("LOCAL_GEN_MAX_BATCH", "8"))
+        self.retry_after = retry_after if retry_after is not None else float(os.getenv("LOCAL_GEN_RETRY_SECONDS", "600"))
+        self.timeout = timeout if timeout is not None else float(os.getenv("LOCAL_GEN_TIMEOUT", "300"))
+        self.loader = loader
+
+        self._load_lock = threading.Lock()
+        self._loaded = False
+        self._failed_at: Optional[float] = None
+        self._pipe = None
+        self._process: Optional[BaseProcess] = None
+        self._requests_q: "Optional[multiprocessing.queues.Queue]" = None
+        self._pending: Dict[int, Future] = {}
+        self._batch_ids = itertools.count()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._batcher: Optional[threading.Thread] = None
+
+    # -- loading -----------------------------------------------------------------
+
+    def available(self) -> bool:
+        """Load the model if needed; False while a previous load failure is cached."""
+        if not self.enabled:
+            return False
+        if self._loaded:
+            return True
+        with self._load_lock:
+            if self._loaded:
+                return True
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_after:
+                return False
+            try:
+                if self.use_process:
+                    self._start_process()
+                else:
+                    self._pipe = self.loader(self.model_name)
+                self._loaded = True
+                self._failed_at = None
+                if self._batcher is None:
+                    self._batcher = threading.Thread(target=self._batch_loop, name="local-gen-batcher", daemon=True)
+                    self._batcher.start()
+                print(f"[LocalGen] Loaded fallback model '{self.model_name}'" + (" in subprocess" if self.use_process else ""))
+            except Exception as e:
+                self._failed_at = time.monotonic()
+                print(f"[LocalGen] Fallback model unavailable ({e}); not retrying for {self.retry_after:.0f}s")
+            return self._loaded
+
+    def _start_process(self) -> None:
+        # Called with _load_lock held, so every wait here is bounded
+        ctx = multiprocessing.get_context("spawn")
+        requests_q = ctx.Queue()
+        responses_q = ctx.Queue()
+        process = ctx.Process(
+            target=_worker_main,
+            args=(self.loader, self.model_name, requests_q, responses_q),
+            name="local-gen-worker",
+            daemon=True,
+        )
+        process.start()
+        stop_at = time.monotonic() + self.timeout
+        while True:
+            try:
+                _, ok, error = responses_q.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(f"Local generation process exited with code {process.exitcode} while loading")
+                if time.monotonic() > stop_at:
+                    process.terminate()
+                    raise RuntimeError(f"Local model did not load within {self.timeout:.0f}s")
+        if not ok:
+            process.join(timeout=1)
+            raise RuntimeError(error)
+        self._process, self._requests_q = process, requests_q
+        threading.Thread(
+            target=self._response_loop, args=(process, responses_q), name="local-gen-responses", daemon=True
+        ).start()
+
+    def _response_loop(self, process: BaseProcess, responses_q: "multiprocessing.queues.Queue") -> None:
+        while True:
+            try:
+                batch_id, ok, payload = responses_q.get(timeout=1)
+            except queue.Empty:
+                if process.is_alive():
+                    continue
+                self._process_died(process)
+                return
+            future = self._pending.pop(batch_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(payload))
+
+    def _process_died(self, process: BaseProcess) -> None:
+        print(f"[LocalGen] Generation process exited with code {process.exitcode}; not retrying for {self.retry_after:.0f}s")
+        with self._load_lock:
+            if self._process is process:
+                self._process, self._requests_q = None, None
+                self._loaded = False
+                self._failed_at = time.monotonic()
+        error = RuntimeError("Local generation process exited")
+        for batch_id in list(self._pending):
+            future = self._pending.pop(batch_id, None)
+            if future is not None:
+                future.set_exception(error)
+
+    # -- batching ----------------------------------------------------------------
+
+    def _batch_loop(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Requests can only share a batch when their generation parameters match
+            groups: Dict[tuple, list] = {}
+            for item in batch:
+                groups.setdefault(item[1], []).append(item)
+            for (max_new_tokens, temperature), items in groups.items():
+                self._generate_group(items, max_new_tokens, temperature)
+
+    def _generate_group(self, items, max_new_tokens: int, temperature: float) -> None:
+        prompts = [item[0] for item in items]
+        try:
+            if self.use_process:
+                process, requests_q = self._process, self._requests_q
+                if process is None or requests_q is None or not process.is_alive():
+                    raise RuntimeError("Local generation process is not running")
+                future: Future = Future()
+                batch_id = next(self._batch_ids)
+                self._pending[batch_id] = future
+                requests_q.put((batch_id, prompts, max_new_tokens, temperature))
+                try:
+                    texts = future.result(timeout=self.timeout)
+                finally:
+                    self._pending.pop(batch_id, None)
+            else:
+                texts = _run_batch(self._pipe, prompts, max_new_tokens, temperature)
+            for item, text in zip(items, texts):
+                item[2].set_result(text)
+        except Exception as e:
+            for item in items:
+                item[2].set_exception(e)
+
+    # -- public API --------------------------------------------------------------
+
+    def generate(self, prompt: str, max_new_tokens: int = 256, temperature: float = 0.8) -> str:
+        if not self.available():
+            raise RuntimeError("Local fallback model is not available")
+        future: Future = Future()
+        self._queue.put((prompt, (max_new_tokens, temperature), future))
+        return future.result(timeout=current_deadline().cap(self.timeout))
+
+    def generate_or_raise(self, prompt: str, primary_exc: Exception, max_new_tokens: int = 256, temperature: float = 0.8) -> str:
+        """Generate locally as a substitute for a failed primary call, re-raising `primary_exc` if that fails too."""
+        if current_deadline().expired():
+            raise primary_exc
+        try:
+            text = self.generate(prompt, max_new_tokens=max_new_tokens, temperature=temperature)
+        except Exception:
+            raise primary_exc
+        substituted = _substitutions.get()
+        if substituted is not None:
+            substituted.append(prompt)
+        return text
+
+    def shutdown(self) -> None:
+        process, requests_q = self._process, self._requests_q
+        if process is not None and requests_q is not None:
+            requests_q.put(None)
+            process.join(timeout=5)
+
+
+local_generator = LocalGenerationService()
+
+
+__all__ = ["LocalGenerationService", "local_generator", "load_transformers_pipeline", "watch_local_fallback"]
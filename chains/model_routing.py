@@ -0,0 +1,145 @@
+# Model routing: which Ollama model, temperature and token cap each chain uses
+import os
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from threading import Lock
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class ModelRoute:
+    model: str
+    temperature: float
+    num_predict: Optional[int] = None
+
+
+def _default_routes() -> Dict[str, ModelRoute]:
+    # Titles, continuation ideas and image components are short structured outputs: small tier.
+    # Stories are the only long-form step and keep the large model.
+    # Both tiers default to llama3:8b, the one model the README has users pull, so tiering is
+    # a no-op (only the token caps differ) until LLM_SMALL_MODEL names a pulled smaller model.
+    small = os.getenv("LLM_SMALL_MODEL", "llama3:8b")
+    large = os.getenv("LLM_LARGE_MODEL", "llama3:8b")
+    return {
+        "title": ModelRoute(small, 0.7, 160),
+        "continuation": ModelRoute(small, 0.8, 256),
+        "image": ModelRoute(small, 0.7, 160),
+        "story": ModelRoute(large, 0.9, 1200),
+    }
+
+
+def _default_overload_routes(routes: Dict[str, ModelRoute]) -> Dict[str, ModelRoute]:
+    # Under overload every chain moves to the small tier; stories also get a tighter cap
+    small = (routes.get("title") or next(iter(routes.values()))).model
+    overload = {name: replace(route, model=small) for name, route in routes.items()}
+    overload["story"] = replace(overload["story"], num_predict=min(routes["story"].num_predict or 800, 800))
+    return overload
+
+
+def _apply_overrides(routes: Dict[str, ModelRoute], overrides: dict) -> Dict[str, ModelRoute]:
+    merged = dict(routes)
+    for name, fields in (overrides or {}).items():
+        base = merged.get(name) or merged["story"]
+        merged[name] = replace(base, **{k: v for k, v in fields.items() if k in ("model", "temperature", "num_predict")})
+    return merged
+
+
+class ModelRouter:
+    """Maps each chain to a ModelRoute and downgrades to the overload routes under load.
+
+    Load is judged from time-to-first-token, which includes the time a request waits
+    in Ollama's queue. When its moving average exceeds `overload_ttft` seconds the
+    router switches to overload mode, and leaves it once the average falls below half
+    of the threshold again.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, ModelRoute]] = None,
+        overload_routes: Optional[Dict[str, ModelRoute]] = None,
+        overload_ttft: float = 8.0,
+        smoothing: float = 0.3,
+        force_overload: bool = False,
+    ):
+        self.routes = routes or _default_routes()
+        self.overload_routes = overload_routes or _default_overload_routes(self.routes)
+        self.overload_ttft = overload_ttft
+        self.smoothing = smoothing
+        self.force_overload = force_overload
+        self._lock = Lock()
+        self._ttft_avg = 0.0
+        self._overloaded = False
+        self._in_flight = 0
+        self._downgrades = 0
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        """Build a router from env vars.
+
+        MODEL_ROUTES is an optional JSON object such as
+        {"title": {"model": "llama3.2:3b", "num_predict": 96}, "overload": {"story": {"model": "llama3.2:3b"}}}
+        """
+        routes = _default_routes()
+        overrides = json.loads(os.getenv("MODEL_ROUTES", "") or "{}")
+        overload_overrides = overrides.pop("overload", {})
+        routes = _apply_overrides(routes, overrides)
+        overload_routes = _apply_overrides(_default_overload_routes(routes), overload_overrides)
+        return cls(
+            routes=routes,
+            overload_routes=overload_routes,
+            overload_ttft=float(os.getenv("LLM_OVERLOAD_TTFT_SECONDS", "8.0")),
+            force_overload=os.getenv("LLM_FORCE_OVERLOAD", "false").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def overloaded(self) -> bool:
+        return self.force_overload or self._overloaded
+
+    def route(self, chain_name: str) -> ModelRoute:
+        routes = self.overload_routes if self.overloaded else self.routes
+        route = routes.get(chain_name) or self.routes.get(chain_name)
+        if route is None:
+            raise KeyError(f"No model route configured for chain '{chain_name}'")
+        if self.overloaded and route != self.routes.get(chain_name):
+            with self._lock:
+                self._downgrades += 1
+        return route
+
+    def observe_ttft(self, seconds: float) -> None:
+        """Feed one time-to-first-token sample into the overload detector."""
+        with self._lock:
+            self._ttft_avg = self.smoothing * seconds + (1 - self.smoothing) * self._ttft_avg
+            if not self._overloaded and self._ttft_avg > self.overload_ttft:
+                self._overloaded = True
+                print(f"[ModelRouter] Overload mode ON (avg time-to-first-token {self._ttft_avg:.1f}s)")
+            elif self._overloaded and self._ttft_avg < self.overload_ttft / 2:
+                self._overloaded = False
+                print(f"[ModelRouter] Overload mode OFF (avg time-to-first-token {self._ttft_avg:.1f}s)")
+
+    @contextmanager
+    def track(self):
+        """Count an in-flight call and time it until the first token is observed by the caller."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            yield time.monotonic()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "overloaded": self.overloaded,
+                "avg_ttft_seconds": round(self._ttft_avg, 3),
+                "in_flight": self._in_flight,
+                "downgraded_calls": self._downgrades,
+            }
+
+
+router = ModelRouter.from_env()
+
+
+__all__ = ["ModelRoute", "ModelRouter", "router"]
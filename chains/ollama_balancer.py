@@ -0,0 +1,205 @@
+# Client-side load balancer over several Ollama endpoints
+import os
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+from chains.circuit_breaker import http_probe
+
+
+class NoHealthyBackendError(RuntimeError):
+    """Raised when every configured Ollama endpoint is marked unhealthy."""
+
+
+class Backend:
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.healthy = True
+        self.latency_avg = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+
+
+def is_timeout(error: Optional[BaseException]) -> bool:
+    """True when the HTTP client gave up waiting (our own per-call timeout), however requests wraps it.
+
+    A read timeout after the response headers arrived surfaces as a ConnectionError
+    around urllib3's ReadTimeoutError rather than as requests' Timeout.
+    """
+    if isinstance(error, requests.exceptions.Timeout):
+        return True
+    return isinstance(error, requests.exceptions.ConnectionError) and any(
+        isinstance(arg, ReadTimeoutError) for arg in error.args
+    )
+
+
+def is_connection_error(error: Optional[BaseException]) -> bool:
+    """True for errors reaching the endpoint at all, i.e. the ones that say it is down.
+
+    Timeouts (our own deadline budget) and errors the server answered with (such as an
+    unknown model) say nothing about the endpoint's health.
+    """
+    if error is None or is_timeout(error):
+        return False
+    return isinstance(error, (requests.exceptions.ConnectionError, ConnectionError))
+
+
+class OllamaBalancer:
+    """Routes LLM calls across Ollama endpoints by least outstanding requests.
+
+    Calls carrying an affinity key (the session id) stick to the backend that served
+    the session before, so its prompt cache can be reused, unless that backend has
+    `affinity_slack` more requests in flight than the least loaded one. A backend is
+    taken out of rotation after `eject_after` consecutive connection errors, unless it
+    is the last healthy one; the background probe puts it back once it answers.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        affinity_slack: int = 2,
+        probe: Callable[[str], bool] = http_probe,
+        probe_interval: float = 5.0,
+        max_affinity_entries: int = 10000,
+        smoothing: float = 0.3,
+        eject_after: int = 3,
+    ):
+        if not urls:
+            raise ValueError("OllamaBalancer needs at least one endpoint")
+        self.backends = [Backend(u) for u in urls]
+        self.affinity_slack = affinity_slack
+        self.probe = probe
+        self.probe_interval = probe_interval
+        self.max_affinity_entries = max_affinity_entries
+        self.smoothing = smoothing
+        self.eject_after = max(1, eject_after)
+        self._lock = threading.Lock()
+        self._affinity: "OrderedDict[str, Backend]" = OrderedDict()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "OllamaBalancer":
+        # OLLAMA_BASE_URLS is a comma-separated list; falls back to the single OLLAMA_BASE_URL
+        urls = [u.strip() for u in os.getenv("OLLAMA_BASE_URLS", "").split(",") if u.strip()]
+        if not urls:
+            urls = [os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")]
+        return cls(
+            urls,
+            affinity_slack=int(os.getenv("OLLAMA_AFFINITY_SLACK", "2")),
+            probe_interval=float(os.getenv("OLLAMA_PROBE_INTERVAL", "5")),
+            eject_after=int(os.getenv("OLLAMA_EJECT_AFTER", "3")),
+        )
+
+    def acquire(self, affinity_key: Optional[str] = None) -> Backend:
+        self._ensure_probe()
+        with self._lock:
+            healthy = [b for b in self.backends if b.healthy]
+            if not healthy:
+                raise NoHealthyBackendError("No healthy Ollama backend available")
+            least = min(healthy, key=lambda b: (b.in_flight, b.latency_avg))
+            chosen = least
+            if affinity_key is not None:
+                sticky = self._affinity.get(affinity_key)
+                if sticky is not None and sticky.healthy and sticky.in_flight <= least.in_flight + self.affinity_slack:
+                    chosen = sticky
+                self._affinity[affinity_key] = chosen
+                self._affinity.move_to_end(affinity_key)
+                while len(self._affinity) > self.max_affinity_entries:
+                    self._affinity.popitem(last=False)
+            chosen.in_flight += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(self, backend: Backend, ok: bool, latency: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            backend.in_flight -= 1
+            if ok:
+                backend.latency_avg = self.smoothing * latency + (1 - self.smoothing) * backend.latency_avg
+                backend.consecutive_failures = 0
+                return
+            backend.failures += 1
+            if not is_connection_error(error):
+                # The endpoint answered (or we gave up waiting on it); it is reachable
+                backend.consecutive_failures = 0
+                return
+            backend.consecutive_failures += 1
+            if not backend.healthy or backend.consecutive_failures < self.eject_after:
+                return
+            if not any(b.healthy for b in self.backends if b is not backend):
+                print(f"[OllamaBalancer] {backend.url} is failing but is the last healthy backend; keeping it")
+                return
+            print(f"[OllamaBalancer] Marking {backend.url} unhealthy after {backend.consecutive_failures} connection errors")
+            backend.healthy = False
+
+    @contextmanager
+    def lease(self, affinity_key: Optional[str] = None):
+        backend = self.acquire(affinity_key)
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(backend, error is None, time.monotonic() - started, error)
+
+    def any_healthy(self) -> bool:
+        """Probe every backend now; True if at least one answers. Read-only: no backend changes state."""
+        return any(self.probe(b.url) for b in self.backends)
+
+    def _probe_backend(self, backend: Backend) -> bool:
+        # Probes only bring backends back; taking one out is left to release()'s failure counting
+        ok = self.probe(backend.url)
+        with self._lock:
+            if ok and not backend.healthy:
+                print(f"[OllamaBalancer] {backend.url} is healthy again")
+                backend.consecutive_failures = 0
+                backend.healthy = True
+        return ok
+
+    def _ensure_probe(self) -> None:
+        if self.probe_interval <= 0 or self._probe_thread is not None:
+            return
+        with self._lock:
+            if self._probe_thread is not None:
+                return
+            self._probe_thread = threading.Thread(target=self._probe_loop, name="ollama-balancer-probe", daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self) -> None:
+        while not self._stop.wait(self.probe_interval):
+            # Only unhealthy nodes need probing; healthy ones are judged by real traffic
+            for backend in [b for b in self.backends if not b.healthy]:
+                self._probe_backend(backend)
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                b.url: {
+                    "healthy": b.healthy,
+                    "in_flight": b.in_flight,
+                    "avg_latency_seconds": round(b.latency_avg, 3),
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "consecutive_failures": b.consecutive_failures,
+                }
+                for b in self.backends
+            }
+
+
+balancer = OllamaBalancer.from_env()
+
+
+__all__ = ["OllamaBalancer", "NoHealthyBackendError", "is_connection_error", "is_timeout", "balancer"]
@@ -0,0 +1,214 @@
+# Shared Ollama connection settings used by every chain
+import os
+import math
+import time
+import requests
+from threading import Lock
+from typing import Dict, Optional, Tuple
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable
+from langchain_community.chat_models import ChatOllama
+from chains.model_routing import ModelRoute, router as default_router
+from chains.generation_limits import GenerationLimits, limits_for, close_json, paragraph_cutoff, generation_stats
+from chains.circuit_breaker import breaker as default_breaker
+from chains.ollama_balancer import balancer as default_balancer, is_timeout
+from chains.request_context import current_session_id
+from chains.deadline import DeadlineExceeded, current_deadline
+from observability.tracing import current_span, span
+from tools.cassette import OFF, cassette
+
+
+def _keep_alive():
+    # Keep the model (and its prompt cache) resident between the steps of a session
+    value = os.getenv("OLLAMA_KEEP_ALIVE", "30m").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def ollama_base_kwargs():
+    """Keyword arguments shared by all ChatOllama instances.
+
+    Every chain must send identical load-time options (keep_alive, num_ctx) so
+    Ollama reuses the same loaded runner, and with it the cached prompt prefix.
+    """
+    kwargs = {}
+    # Allow overriding Ollama host via OLLAMA_BASE_URL env var (e.g. http://host:11434)
+    base = os.getenv("OLLAMA_BASE_URL")
+    if base:
+        kwargs["base_url"] = base
+    keep_alive = _keep_alive()
+    if keep_alive is not None:
+        kwargs["keep_alive"] = keep_alive
+    num_ctx = os.getenv("OLLAMA_NUM_CTX")
+    if num_ctx:
+        kwargs["num_ctx"] = int(num_ctx)
+    return kwargs
+
+
+class RoutedChatOllama(Runnable):
+    """Runnable standing in for ChatOllama that picks the model per call via the ModelRouter.
+
+    The route and generation limits are resolved on every invoke, so a chain moves to
+    the small model as soon as the router enters overload mode. Responses are streamed
+    internally: the time-to-first-token is fed back to the router, stories are cut at
+    the configured paragraph count, and token counts go to `generation_stats`.
+    Every call goes through the shared circuit breaker, so while Ollama is down calls
+    raise CircuitOpenError immediately, and is sent to the Ollama endpoint picked by
+    the balancer, keyed on the current session for prompt-cache affinity. The call is
+    bounded by the chain's step budget within the current request deadline.
+    """
+
+    def __init__(self, chain_name: str, router=None, breaker=None, balancer=None):
+        self.chain_name = chain_name
+        self.router = router or default_router
+        self.breaker = breaker or default_breaker
+        self.balancer = balancer or default_balancer
+        self._models: Dict[Tuple[ModelRoute, Optional[int], Tuple[str, ...], str], ChatOllama] = {}
+        self._models_lock = Lock()
+
+    def _llm_for(self, route: ModelRoute, limits: GenerationLimits, base_url: str) -> ChatOllama:
+        key = (route, limits.num_predict, limits.stop, base_url)
+        with self._models_lock:
+            llm = self._models.get(key)
+            if llm is None:
+                kwargs = ollama_base_kwargs()
+                kwargs["base_url"] = base_url
+                llm = ChatOllama(
+                    model=route.model,
+                    temperature=route.temperature,
+                    num_predict=limits.num_predict,
+                    stop=list(limits.stop) or None,
+                    **kwargs,
+                )
+                self._models[key] = llm
+            return llm
+
+    def _resolve(self):
+        route = self.router.route(self.chain_name)
+        return route, limits_for(self.chain_name, route.num_predict)
+
+    def stream(self, input, config=None, **kwargs):
+        route, limits = self._resolve()
+        yield from self._stream(route, limits, input, config, **kwargs)
+
+    def _stream(self, route, limits, input, config=None, **kwargs):
+        text = ""
+        chunk_count = 0
+        metadata = {}
+        stopped_early = False
+        timed_out = False
+        first_at = None
+        deadline = current_deadline()
+        budget = deadline.step_budget(self.chain_name)
+        if budget is not None and budget <= 0:
+            raise DeadlineExceeded(f"No time left for the {self.chain_name} LLM call")
+        expires_at = time.monotonic() + budget if budget is not None else None
+        self.breaker.before_call()
+        try:
+            with self.balancer.lease(current_session_id()) as backend, self.router.track() as started:
+                llm = self._llm_for(route, limits, backend.url)
+                current = current_span()
+                current.set_attribute("llm.model", route.model)
+                current.set_attribute("llm.backend", backend.url)
+                if budget is not None:
+                    # Bounds connecting and waiting for the first byte; the loop below bounds the whole stream
+                    llm = llm.model_copy(update={"timeout": max(1, math.ceil(budget))})
+                chunks = llm.stream(input, config=config, **kwargs)
+                try:
+                    for chunk in chunks:
+                        if deadline.cancelled or (expires_at is not None and time.monotonic() > expires_at):
+                            timed_out = True
+                            break
+                        if first_at is None:
+                            first_at = time.monotonic()
+                            self.router.observe_ttft(first_at - started)
+                        if chunk.response_metadata:
+                            metadata = chunk.response_metadata
+                        if not chunk.content:
+                            yield chunk
+                            continue
+                        chunk_count += 1
+                        if limits.max_paragraphs:
+                            cut = paragraph_cutoff(text + chunk.content, limits.max_paragraphs)
+                            if cut is not None:
+                                # Closing the stream drops the HTTP response, which makes Ollama stop decoding
+                                yield AIMessageChunk(content=(text + chunk.content)[len(text):cut])
+                                stopped_early = True
+                                break
+                        text += chunk.content
+                        yield chunk
+                finally:
+                    chunks.close()
+        except GeneratorExit:
+            # The consumer stopped reading part-way; Ollama was answering, and a half-open trial must be settled
+            self.breaker.record_success()
+            raise
+        except Exception as e:
+            if not is_timeout(e):
+                self.breaker.record_failure()
+                raise
+            if isinstance(e, requests.exceptions.Timeout):
+                # No response within the budget: Ollama may be stuck, so this counts against it
+                self.breaker.record_failure()
+                raise DeadlineExceeded(f"{self.chain_name} LLM call timed out after {budget:.0f}s") from e
+            # Timed out reading the stream: Ollama had answered and was generating, only our budget ran out
+            self.breaker.record_success()
+            raise DeadlineExceeded(f"{self.chain_name} LLM call exceeded its {budget:.0f}s budget") from e
+        except BaseException:
+            self.breaker.record_failure()
+            raise
+        # Ollama was streaming, so it is healthy even if our own budget ran out
+        self.breaker.record_success()
+        if timed_out and deadline.cancelled:
+            raise DeadlineExceeded(f"{self.chain_name} LLM call cancelled")
+        if timed_out:
+            raise DeadlineExceeded(f"{self.chain_name} LLM call exceeded its {budget:.0f}s budget")
+        generation_stats.record(
+            self.chain_name,
+            tokens=metadata.get("eval_count", chunk_count) if not stopped_early else chunk_count,
+            prompt_tokens=metadata.get("prompt_eval_count", 0),
+            decode_seconds=(time.monotonic() - first_at) if first_at else 0.0,
+            stopped_early=stopped_early,
+        )
+
+    def invoke(self, input, config=None, **kwargs):
+        route, limits = self._resolve()
+        aggregated = None
+        for chunk in self._stream(route, limits, input, config, **kwargs):
+            aggregated = chunk if aggregated is None else aggregated + chunk
+        if aggregated is None:
+            raise ValueError("No data received from Ollama stream.")
+        return AIMessage(content=close_json(aggregated.content, limits), response_metadata=aggregated.response_metadata)
+
+
+def run_prompt(chain_name: str, prompt, llm, inputs: dict) -> str:
+    """Render `prompt` and call `llm` in separate spans; returns the reply text.
+
+    Equivalent to `(prompt | llm).invoke(inputs).content`. Token counts reported by
+    Ollama are attached to the `llm.call` span. With CASSETTE_MODE set the call is
+    recorded to, or replayed from, the cassette (`tools/cassette.py`).
+    """
+    with span("prompt.render", chain=chain_name):
+        prompt_value = prompt.invoke(inputs)
+    with span("llm.call", chain=chain_name) as s:
+        if cassette.mode == OFF:
+            content, meta = _invoke(llm, prompt_value)
+        else:
+            content, meta = cassette.llm(chain_name, prompt_value.to_string(), lambda: _invoke(llm, prompt_value))
+        if "prompt_eval_count" in meta:
+            s.set_attribute("llm.prompt_tokens", meta["prompt_eval_count"])
+        if "eval_count" in meta:
+            s.set_attribute("llm.completion_tokens", meta["eval_count"])
+    return content
+
+
+def _invoke(llm, prompt_value):
+    message = llm.invoke(prompt_value)
+    return message.content, getattr(message, "response_metadata", None) or {}
+
+
+__all__ = ["ollama_base_kwargs", "RoutedChatOllama", "run_prompt"]
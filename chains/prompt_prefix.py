@@ -0,0 +1,45 @@
+# Stable prompt prefix shared by the chains of one session.
+#
+# Ollama reuses its KV cache for the longest common token prefix between a new
+# prompt and the previous one. Every chain therefore starts with the same system
+# text, followed by the article under discussion, and only then the step-specific
+# instructions. Continuation, final story and image extraction for one session
+# share the whole article prefix; the title step shares the system text.
+from langchain.prompts import ChatPromptTemplate
+
+SYSTEM_PROMPT = (
+    "You are the writing engine of a satirical fake news studio. You turn real news into clearly fictional, "
+    "entertaining material and follow the output format requested in each instruction exactly."
+)
+
+ARTICLE_CONTEXT = "Article Title: {article_title}\n\nArticle Content:\n{article_text}"
+
+
+def article_prompt(instructions: str) -> ChatPromptTemplate:
+    """Chat prompt with the shared system + article prefix followed by `instructions`."""
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT + "\n\n" + ARTICLE_CONTEXT),
+            ("human", instructions),
+        ]
+    )
+
+
+def system_prompt(instructions: str) -> ChatPromptTemplate:
+    """Chat prompt with only the shared system text as prefix (no single article to share)."""
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", SYSTEM_PROMPT),
+            ("human", instructions),
+        ]
+    )
+
+
+def article_context(article, max_chars: int = 4000) -> tuple:
+    """Return the (title, text) pair every step of a session must use for its prefix."""
+    title = article.title or ""
+    text = (article.content or article.description or article.title or "")[:max_chars]
+    return title, text
+
+
+__all__ = ["SYSTEM_PROMPT", "ARTICLE_CONTEXT", "article_prompt", "system_prompt", "article_context"]
@@ -0,0 +1,27 @@
+# Per-request context (current session id) visible to the chains without changing their signatures
+import functools
+from contextvars import ContextVar
+from typing import Optional
+
+_session_id: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+
+def current_session_id() -> Optional[str]:
+    return _session_id.get()
+
+
+def session_scope(fn):
+    """Decorator for `main.py` steps taking `session_id` first: exposes it to the chains while the step runs."""
+
+    @functools.wraps(fn)
+    def wrapper(session_id, *args, **kwargs):
+        token = _session_id.set(session_id)
+        try:
+            return fn(session_id, *args, **kwargs)
+        finally:
+            _session_id.reset(token)
+
+    return wrapper
+
+
+__all__ = ["current_session_id", "session_scope"]
@@ -1,48 +1,42 @@
-import os
 import json
 import re
-from langchain.prompts import PromptTemplate
-from langchain_community.chat_models import ChatOllama
-
-
-def _ollama_base_kwargs():
-    # Allow overriding Ollama host via OLLAMA_BASE_URL env var (e.g. http://host:11434)
-    base = os.getenv("OLLAMA_BASE_URL")
-    if base:
-        return {"base_url": base}
-    return {}
+from chains.ollama_client import RoutedChatOllama, run_prompt
+from chains.prompt_prefix import system_prompt
+from chains.local_fallback import local_generator
+from observability.profiling import profiled
+from observability.tracing import current_span, span
 from schemas import TitlesOutput, Article
 
 
 class TitleChain:
     def __init__(self, llm=None):
-        self.llm = llm or ChatOllama(model="llama3:8b", temperature=0.7, **_ollama_base_kwargs())
-        self.prompt = PromptTemplate(
-            input_variables=["articles_json"],
-            template=(
+        self.llm = llm or RoutedChatOllama("title")
+        # Only the shared system text is common with later steps; the article list differs per session
+        self.prompt = system_prompt(
+            (
                 "You are a creative editor. Given the following list of news articles as JSON, "
                 "generate exactly 3 engaging, rewritten titles suitable for a popular audience. "
                 "Respond with a single JSON object exactly in this format: {{\"titles\": [\"title1\", \"title2\", \"title3\"]}} "
                 "Do not include any extra text, explanation, or formatting. Keep titles concise and unique.\n\n"
                 "Articles JSON:\n{articles_json}"
-            ),
+            )
         )
 
+    @profiled("title.generate")
     def generate(self, articles: list[Article]) -> TitlesOutput:
-        # prepare articles JSON and ensure URLs are serialized as strings
-        articles_payload = []
-        for a in articles:
-            d = a.dict()
-            # HttpUrl / AnyUrl objects may not be JSON serializable; coerce to str when present
-            if d.get("image_url"):
-                d["image_url"] = str(d["image_url"])
-            if d.get("url"):
-                d["url"] = str(d["url"])
-            articles_payload.append(d)
-
-        chain = self.prompt | self.llm
-        res = chain.invoke({"articles_json": json.dumps(articles_payload, ensure_ascii=False)}).content
+        # payload() has URLs as strings already and is cached on the article
+        articles_payload = [a.payload for a in articles]
+
+        inputs = {"articles_json": json.dumps(articles_payload, ensure_ascii=False)}
+        try:
+            res = run_prompt("title", self.prompt, self.llm, inputs)
+        except Exception as primary_exc:
+            res = local_generator.generate_or_raise(self.prompt.format(**inputs), primary_exc, max_new_tokens=128, temperature=0.7)
+
+        with span("parse", chain="title"):
+            return self._parse(res, articles)
 
+    def _parse(self, res: str, articles: list[Article]) -> TitlesOutput:
         # parse structured JSON output robustly
         def extract_json(text: str):
             # attempt direct load
@@ -154,11 +148,10 @@ class TitleChain:
                 # If TitlesOutput validation fails, raise to trigger fallback
                 raise RuntimeError(f"TitlesOutput validation failed: {validation_error}") from validation_error
         except Exception as e:
-            # Log raw model output for debugging
-            import traceback
+            # Log raw model output for debugging; the parse span records that the fallback was used
             print("[TitleChain] Failed to parse model output:", e)
-            print("[TitleChain] Traceback:", traceback.format_exc())
             print("[TitleChain] Raw output:", res)
+            current_span().set_attribute("parse.fallback", type(e).__name__)
 
             # Final fallback: try to heuristically extract three title-like strings
             qmatches = re.findall(r'"([^"\n]{3,})"', res)
@@ -2,14 +2,24 @@ import os
 import time
 import base64
 import io
-from typing import List
+from typing import List, Optional, Tuple
 from PIL import Image
 from tools.news_tool import NewsTool
+from tools.dedup import headline_dedup
 from memory.session_memory import memory
+from memory.headline_pool import HeadlineBundle, HeadlinePool
 from chains.title_chain import TitleChain
 from chains.continuation_chain import ContinuationChain
 from chains.final_story_chain import FinalStoryChain
 from chains.image_chain import ImageChain
+from chains.prompt_prefix import article_context
+from chains.circuit_breaker import CircuitOpenError
+from chains.local_fallback import watch_local_fallback
+from chains.request_context import session_scope
+from chains.deadline import DeadlineExceeded, current_deadline, timeout_stats, with_deadline
+from observability.metrics import fallbacks, image_queue_depth, instrument_step, step_retries
+from observability.progress import report_progress
+from observability.tracing import current_span, span
 from schemas import Article
 
 
@@ -20,10 +30,37 @@ final_chain = FinalStoryChain()
 image_chain = ImageChain()
 
 
+def _fetch_articles(category: str) -> List[Article]:
+    # The same story from several outlets would only cost TitleChain prompt tokens
+    return headline_dedup.dedupe(news_tool.fetch_top_headlines(category=category))
+
+
+def _build_headline_bundle(category: str) -> HeadlineBundle:
+    # Runs on the prefetch workers: the same NewsAPI call + title generation as a live load
+    articles = _fetch_articles(category)
+    titles_out = title_chain.generate(articles)
+    return HeadlineBundle(category, articles, titles_out.titles, titles_out.article_indices)
+
+
+headline_pool = HeadlinePool.from_env(_build_headline_bundle, NewsTool.CATEGORIES)
+
+
+@session_scope
+@instrument_step("load_news")
 def load_latest_news(session_id: str, category: str = "general", country: str = "us") -> List[Article]:
-    # fetch and store in session
-    articles = news_tool.fetch_top_headlines(category=category)
     state = memory.get(session_id)
+    bundle = headline_pool.take(category)
+    if bundle is not None:
+        # Prefetched: articles and titles are ready, generate_titles_for_session becomes a lookup
+        articles = bundle.articles
+        current_span().set_attribute("prefetched", True)
+        state.titles = list(bundle.titles)
+        state.title_to_article_map = list(bundle.article_indices)
+    else:
+        # fetch and store in session
+        articles = _fetch_articles(category)
+        state.titles = []
+        state.title_to_article_map = []
     state.articles = articles
     state.selected_article_index = None
     state.continuation_options = []
@@ -34,19 +71,28 @@ def load_latest_news(session_id: str, category: str = "general", country: str =
     return articles
 
 
+@session_scope
+@with_deadline
+@instrument_step("titles")
 def generate_titles_for_session(session_id: str):
     state = memory.get(session_id)
+    if state.titles:
+        # Titles came with a prefetched bundle
+        return state.titles
     try:
         titles_out = title_chain.generate(state.articles)
         # Store the mapping of title index to article index
+        state.titles = titles_out.titles
         state.title_to_article_map = titles_out.article_indices
         memory.set(session_id, state)
         return titles_out.titles
     except Exception as e:
         # If generation fails (e.g. Ollama unreachable), fall back to lightweight heuristics
+        if isinstance(e, DeadlineExceeded):
+            timeout_stats.record("titles")
         print(f"[main.py] Error in generate_titles_for_session: {e}")
-        import traceback
-        traceback.print_exc()
+        current_span().set_attribute("fallback", True)
+        fallbacks.inc("titles")
         # Produce three short fallback titles based on article titles/descriptions
         fallback = []
         for idx, a in enumerate(state.articles[:3]):
@@ -63,11 +109,13 @@ def generate_titles_for_session(session_id: str):
             fallback.append(f"Breaking: More to come ({len(fallback)+1})")
             i += 1
         # Store mapping for fallback titles (map to first 3 articles)
+        state.titles = fallback
         state.title_to_article_map = [0, 1, 2]
         memory.set(session_id, state)
         return fallback
 
 
+@session_scope
 def select_article(session_id: str, index: int):
     state = memory.get(session_id)
     if not (0 <= index < len(state.articles)):
@@ -82,37 +130,53 @@ def select_article(session_id: str, index: int):
     return state.articles[index]
 
 
+@session_scope
+@with_deadline
+@instrument_step("continuations")
 def generate_continuations_for_session(session_id: str):
     state = memory.get(session_id)
     if state.selected_article_index is None:
         raise RuntimeError("No article selected")
     article = state.articles[state.selected_article_index]
-    article_text = (article.content or article.description or article.title)[:4000]
+    article_title, article_text = article_context(article)
     # Retry logic with exponential backoff
     max_retries = int(os.getenv("GEN_MAX_RETRIES", "3"))
     backoff = float(os.getenv("GEN_BACKOFF", "1.0"))
     enable_fallback = os.getenv("ENABLE_FALLBACK", "false").lower() in ("1", "true", "yes")
-    last_exc = None
-    print(f"[PROGRESS] Starting continuation generation (max {max_retries} attempts)...")
+    last_exc: Optional[Exception] = None
+    deadline = current_deadline()
     for attempt in range(1, max_retries + 1):
+        if attempt > 1 and not deadline.allows_attempt():
+            print(f"[main.py] continuation: only {deadline.remaining():.1f}s left, not retrying")
+            break
+        if attempt > 1:
+            step_retries.inc("continuations")
+            report_progress("continuations", "retry", attempt=attempt)
         try:
-            print(f"[PROGRESS] Continuation attempt {attempt}/{max_retries} - calling LLM...")
-            opts = continuation_chain.generate(article_text)
-            print(f"[PROGRESS] ✓ Continuation generation complete")
+            with span("attempt", attempt=attempt):
+                opts = continuation_chain.generate(article_text, article_title=article_title)
             state.continuation_options = opts.options
             memory.set(session_id, state)
             return opts.options
+        except CircuitOpenError as e:
+            # Ollama is known to be down: go straight to the fallback instead of sleeping through retries
+            last_exc = e
+            print(f"[main.py] continuation skipped retries: {e}")
+            break
+        except DeadlineExceeded as e:
+            last_exc = e
+            timeout_stats.record("continuation")
+            print(f"[main.py] continuation attempt {attempt}/{max_retries} timed out: {e}")
+            break
         except Exception as e:
             last_exc = e
             print(f"[main.py] continuation attempt {attempt}/{max_retries} failed: {e}")
             if attempt < max_retries:
-                time.sleep(backoff)
+                time.sleep(deadline.cap(backoff))
                 backoff *= 2
                 continue
             # last attempt failed
-    # After retries exhausted
-    import traceback
-    traceback.print_exc()
+    # After retries exhausted (each failed attempt is recorded on its span)
     if enable_fallback:
         fallback_opts = [
             "A surprising political scandal develops around the story.",
@@ -121,6 +185,7 @@ def generate_continuations_for_session(session_id: str):
         ]
         state.continuation_options = fallback_opts
         memory.set(session_id, state)
+        fallbacks.inc("continuations")
         return fallback_opts
     # Fallback disabled — propagate the last exception so caller (UI) can show an error
     if last_exc:
@@ -128,6 +193,7 @@ def generate_continuations_for_session(session_id: str):
     raise RuntimeError("Continuation generation failed after retries")
 
 
+@session_scope
 def select_continuation(session_id: str, index: int):
     state = memory.get(session_id)
     if not (0 <= index < len(state.continuation_options)):
@@ -137,40 +203,58 @@ def select_continuation(session_id: str, index: int):
     return state.continuation_options[index]
 
 
-def generate_final_and_image(session_id: str):
+def _generate_final_story(session_id: str) -> Tuple[str, bool]:
+    # Runs under the caller's session scope and deadline; returns (story, written by Ollama).
+    # Fallback stories (the template, or text from the local model) get no image.
     state = memory.get(session_id)
     if state.selected_article_index is None or state.selected_continuation_index is None:
         raise RuntimeError("Article or continuation not selected")
     article = state.articles[state.selected_article_index]
     continuation = state.continuation_options[state.selected_continuation_index]
+    # Same title/text as the continuation step so Ollama can reuse the cached article prefix
+    article_title, article_text = article_context(article)
     # Retry final story generation
     max_retries = int(os.getenv("GEN_MAX_RETRIES", "3"))
     backoff = float(os.getenv("GEN_BACKOFF", "1.0"))
     enable_fallback = os.getenv("ENABLE_FALLBACK", "false").lower() in ("1", "true", "yes")
-    last_exc = None
+    last_exc: Optional[Exception] = None
     final_story = None
-    print(f"[PROGRESS] Starting final story generation (max {max_retries} attempts)...")
+    written_locally = False
+    deadline = current_deadline()
     for attempt in range(1, max_retries + 1):
+        if attempt > 1 and not deadline.allows_attempt():
+            print(f"[main.py] final generation: only {deadline.remaining():.1f}s left, not retrying")
+            break
+        if attempt > 1:
+            step_retries.inc("story")
+            report_progress("story", "retry", attempt=attempt)
         try:
-            print(f"[PROGRESS] Final story attempt {attempt}/{max_retries} - calling LLM...")
-            final_story = final_chain.generate(article.title, article.content or article.description or article.title, continuation)
-            print(f"[PROGRESS] ✓ Final story generation complete")
+            with span("attempt", attempt=attempt), watch_local_fallback() as substituted:
+                final_story = final_chain.generate(article_title, article_text, continuation)
+            written_locally = bool(substituted)
             state.final_story = final_story
             # Auto-generate session name from article title
             if not state.session_name and article.title:
                 state.session_name = article.title[:60] + ("..." if len(article.title) > 60 else "")
             memory.set(session_id, state)
             break
+        except CircuitOpenError as e:
+            last_exc = e
+            print(f"[main.py] final generation skipped retries: {e}")
+            break
+        except DeadlineExceeded as e:
+            last_exc = e
+            timeout_stats.record("story")
+            print(f"[main.py] final generation attempt {attempt}/{max_retries} timed out: {e}")
+            break
         except Exception as e:
             last_exc = e
             print(f"[main.py] final generation attempt {attempt}/{max_retries} failed: {e}")
             if attempt < max_retries:
-                time.sleep(backoff)
+                time.sleep(deadline.cap(backoff))
                 backoff *= 2
                 continue
     if final_story is None:
-        import traceback
-        traceback.print_exc()
         if not enable_fallback:
             if last_exc:
                 raise last_exc
@@ -191,44 +275,118 @@ def generate_final_and_image(session_id: str):
         state.final_story = fallback_story
         state.image_base64 = None
         memory.set(session_id, state)
-        return fallback_story, None
+        fallbacks.inc("story")
+        return fallback_story, False
+    if written_locally:
+        # The local model's text is too rough to spend an SDXL call on
+        current_span().set_attribute("fallback", True)
+        state.image_base64 = None
+        memory.set(session_id, state)
+        fallbacks.inc("story")
+        return final_story, False
+    return final_story, True
 
-    # If we have a final story, try to generate an image (with retries)
-    last_img_exc = None
+
+def _generate_image(session_id: str, final_story: str):
+    # Image generations in progress, including the prompt step and retry backoff
+    image_queue_depth.inc()
+    try:
+        return _run_image_attempts(session_id, final_story)
+    finally:
+        image_queue_depth.dec()
+
+
+def _run_image_attempts(session_id: str, final_story: str):
+    state = memory.get(session_id)
+    if state.selected_article_index is None:
+        raise RuntimeError("Article not selected")
+    article_title, article_text = article_context(state.articles[state.selected_article_index])
+    max_retries = int(os.getenv("GEN_MAX_RETRIES", "3"))
+    enable_fallback = os.getenv("ENABLE_FALLBACK", "false").lower() in ("1", "true", "yes")
+    deadline = current_deadline()
+    # Try to generate an image for the story (with retries)
+    last_img_exc: Optional[Exception] = None
     b64 = None
     backoff = float(os.getenv("GEN_BACKOFF", "1.0"))
-    print(f"[PROGRESS] Starting image generation (max {max_retries} attempts)...")
     for attempt in range(1, max_retries + 1):
+        # The story shares this request's deadline, so even the first image attempt may not fit
+        if not deadline.allows_attempt():
+            last_img_exc = DeadlineExceeded(f"Only {deadline.remaining():.1f}s left for image generation")
+            timeout_stats.record("image")
+            print(f"[main.py] image generation skipped: {last_img_exc}")
+            break
+        if attempt > 1:
+            step_retries.inc("image")
+            report_progress("image", "retry", attempt=attempt)
         try:
-            print(f"[PROGRESS] Image generation attempt {attempt}/{max_retries} - extracting prompt and generating...")
-            b64 = image_chain.generate(final_story)
-            print(f"[PROGRESS] ✓ Image generation complete")
+            with span("attempt", attempt=attempt):
+                b64 = image_chain.generate(final_story, article_title=article_title, article_text=article_text)
             state.image_base64 = b64
             memory.set(session_id, state)
             break
+        except CircuitOpenError as e:
+            last_img_exc = e
+            print(f"[main.py] image generation skipped retries: {e}")
+            break
+        except DeadlineExceeded as e:
+            last_img_exc = e
+            timeout_stats.record("image")
+            print(f"[main.py] image generation attempt {attempt}/{max_retries} timed out: {e}")
+            break
         except Exception as e:
             last_img_exc = e
             print(f"[main.py] image generation attempt {attempt}/{max_retries} failed: {e}")
             if attempt < max_retries:
-                time.sleep(backoff)
+                time.sleep(deadline.cap(backoff))
                 backoff *= 2
                 continue
     if b64:
         # produce PIL Image for Gradio by decoding base64
         image_bytes = base64.b64decode(b64)
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        return final_story, image
+        return Image.open(io.BytesIO(image_bytes)).convert("RGB")
     # image generation failed after retries
-    import traceback
-    traceback.print_exc()
     if not enable_fallback:
         if last_img_exc:
             raise last_img_exc
         raise RuntimeError("Image generation failed after retries")
-    # Fallback: return final_story and no image (caller should handle None)
+    # Fallback: no image (caller should handle None)
     state.image_base64 = None
     memory.set(session_id, state)
-    return final_story, None
+    fallbacks.inc("image")
+    return None
+
+
+@session_scope
+@with_deadline
+@instrument_step("final_and_image")
+def generate_final_and_image(session_id: str):
+    report_progress("story", "start")
+    final_story, generated = _generate_final_story(session_id)
+    if not generated:
+        return final_story, None
+    report_progress("image", "start")
+    return final_story, _generate_image(session_id, final_story)
+
+
+@session_scope
+@with_deadline
+@instrument_step("story")
+def generate_final_story_for_session(session_id: str) -> Tuple[str, bool]:
+    """Story step alone, for callers that schedule the image separately (e.g. batch mode).
+
+    Returns (story, generated by the LLM); callers skip the image for a fallback story.
+    """
+    return _generate_final_story(session_id)
+
+
+@session_scope
+@with_deadline
+@instrument_step("image")
+def generate_image_for_session(session_id: str):
+    state = memory.get(session_id)
+    if not state.final_story:
+        raise RuntimeError("No final story generated")
+    return _generate_image(session_id, state.final_story)
 
 
 __all__ = [
@@ -238,4 +396,6 @@ __all__ = [
     "generate_continuations_for_session",
     "select_continuation",
     "generate_final_and_image",
+    "generate_final_story_for_session",
+    "generate_image_for_session",
 ]
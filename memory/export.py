@@ -0,0 +1,101 @@
+import base64
+import io
+import json
+import tarfile
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from schemas import SessionState
+
+SessionItem = Tuple[str, SessionState]
+
+
+def session_record(session_id: str, state: SessionState) -> dict:
+    """Story, selected article metadata and choices of a session (without the image)."""
+    article = None
+    if state.selected_article_index is not None and 0 <= state.selected_article_index < len(state.articles):
+        a = state.articles[state.selected_article_index]
+        article = {"title": a.title, "description": a.description, "url": a.payload["url"]}
+    continuation = None
+    if state.selected_continuation_index is not None and 0 <= state.selected_continuation_index < len(state.continuation_options):
+        continuation = state.continuation_options[state.selected_continuation_index]
+    return {
+        "session_id": session_id,
+        "session_name": state.session_name,
+        "created_at": state.created_at.isoformat(),
+        "article": article,
+        "titles": state.titles,
+        "continuation": continuation,
+        "story": state.final_story,
+    }
+
+
+def iter_jsonl(sessions: Iterable[SessionItem], include_images: bool = True) -> Iterator[bytes]:
+    """One JSON line per session; the image is inlined as base64 PNG when requested."""
+    for sid, state in sessions:
+        record = session_record(sid, state)
+        if include_images:
+            record["image_png_base64"] = state.image_base64
+        yield (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class _ChunkBuffer(io.RawIOBase):
+    # Write-only sink for tarfile's stream mode; drained after every member
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_tar(sessions: Iterable[SessionItem], include_images: bool = True) -> Iterator[bytes]:
+    """A tar stream with `<session_id>/session.json` and `<session_id>/image.png` per session.
+
+    Members are written with tarfile's stream mode and yielded as soon as they are
+    complete, so memory use is bounded by a single session.
+    """
+    sink = _ChunkBuffer()
+    tar = tarfile.open(fileobj=sink, mode="w|")
+    now = time.time()
+
+    def add(name: str, data: bytes) -> None:
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = now
+        tar.addfile(info, io.BytesIO(data))
+
+    for sid, state in sessions:
+        add(f"{sid}/session.json", json.dumps(session_record(sid, state), ensure_ascii=False, indent=2).encode("utf-8"))
+        if include_images and state.image_base64:
+            add(f"{sid}/image.png", base64.b64decode(state.image_base64))
+        chunk = sink.drain()
+        if chunk:
+            yield chunk
+    tar.close()
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    "jsonl": (iter_jsonl, "application/x-ndjson"),
+    "tar": (iter_tar, "application/x-tar"),
+}
+
+
+def export_stream(sessions: Iterable[SessionItem], fmt: str, include_images: bool = True) -> Optional[Tuple[Iterator[bytes], str]]:
+    """(chunk iterator, mimetype) for a supported format, or None."""
+    if fmt not in EXPORT_FORMATS:
+        return None
+    writer, mimetype = EXPORT_FORMATS[fmt]
+    return writer(sessions, include_images=include_images), mimetype
+
+
+__all__ = ["EXPORT_FORMATS", "export_stream", "iter_jsonl", "iter_tar", "session_record"]
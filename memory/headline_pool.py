@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+from schemas import Article
+
+
+@dataclass
+class HeadlineBundle:
+    """Articles for one category plus the titles already generated for them."""
+
+    category: str
+    articles: List[Article]
+    titles: List[str]
+    article_indices: List[int]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class HeadlinePool:
+    """Per-category pool of ready (articles, titles) bundles, refilled in the background.
+
+    `start()` fills every category once. After that bundles are only built on demand:
+    `take()` is a dictionary lookup that schedules a refill of its category, so the pool
+    returns to `pool_size` after a bundle is served or found expired. Bundles older than
+    `max_age` seconds are discarded rather than served; the maintenance loop drops them
+    every `refresh_interval` seconds without rebuilding, so an idle pool spends no
+    NewsAPI quota or LLM time.
+    """
+
+    def __init__(
+        self,
+        build_bundle: Callable[[str], HeadlineBundle],
+        categories: List[str],
+        pool_size: int = 2,
+        concurrency: int = 2,
+        max_age: float = 900.0,
+        refresh_interval: float = 60.0,
+        enabled: bool = True,
+    ):
+        self.build_bundle = build_bundle
+        self.categories = list(categories)
+        self.pool_size = pool_size
+        self.max_age = max_age
+        self.refresh_interval = refresh_interval
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Deque[HeadlineBundle]] = {c: deque() for c in self.categories}
+        self._building: Dict[str, int] = {c: 0 for c in self.categories}
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="headline-prefetch")
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._hits = 0
+        self._misses = 0
+
+    @classmethod
+    def from_env(cls, build_bundle: Callable[[str], HeadlineBundle], categories: List[str]) -> "HeadlinePool":
+        configured = [c.strip() for c in os.getenv("PREFETCH_CATEGORIES", "").split(",") if c.strip()]
+        return cls(
+            build_bundle,
+            categories=configured or categories,
+            pool_size=int(os.getenv("PREFETCH_POOL_SIZE", "2")),
+            concurrency=int(os.getenv("PREFETCH_CONCURRENCY", "2")),
+            max_age=float(os.getenv("PREFETCH_MAX_AGE_SECONDS", "900")),
+            refresh_interval=float(os.getenv("PREFETCH_REFRESH_SECONDS", "60")),
+            enabled=os.getenv("PREFETCH_ENABLED", "false").lower() in ("1", "true", "yes"),
+        )
+
+    def start(self) -> None:
+        """Fill every category once and keep expiring bundles in the background."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._maintain, name="headline-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _maintain(self) -> None:
+        for category in self.categories:
+            self.top_up(category)
+        while not self._stop.wait(self.refresh_interval):
+            # Expired bundles are replaced by the next take() of their category, not here
+            for category in self.categories:
+                self._evict_stale(category)
+
+    def _evict_stale(self, category: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            pool = self._pools[category]
+            while pool and now - pool[0].created_at > self.max_age:
+                pool.popleft()
+
+    def top_up(self, category: str) -> None:
+        with self._lock:
+            missing = self.pool_size - len(self._pools[category]) - self._building[category]
+            self._building[category] += max(0, missing)
+        for _ in range(max(0, missing)):
+            self._executor.submit(self._build, category)
+
+    def _build(self, category: str) -> None:
+        try:
+            bundle = self.build_bundle(category)
+            with self._lock:
+                self._pools[category].append(bundle)
+        except Exception as e:
+            # Leave the slot empty; the next take() of this category retries
+            print(f"[HeadlinePool] Prefetch for '{category}' failed: {e}")
+        finally:
+            with self._lock:
+                self._building[category] -= 1
+
+    def take(self, category: str) -> Optional[HeadlineBundle]:
+        """Pop a fresh bundle for `category`, or None when the pool is empty or disabled."""
+        if not self.enabled or category not in self._pools:
+            return None
+        self._evict_stale(category)
+        with self._lock:
+            pool = self._pools[category]
+            bundle = pool.popleft() if pool else None
+            if bundle is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        self.top_up(category)
+        return bundle
+
+    def get_stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "ready": {c: len(p) for c, p in self._pools.items()},
+                "building": dict(self._building),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+__all__ = ["HeadlineBundle", "HeadlinePool"]
@@ -1,7 +1,8 @@
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 from threading import Lock
 from datetime import datetime, timedelta
 from schemas import SessionState
+from observability.tracing import span
 
 
 class SessionMemory:
@@ -12,6 +13,24 @@ class SessionMemory:
         self._lock = Lock()
         self.timeout = timedelta(minutes=timeout_minutes)
         self._last_cleanup = datetime.now()
+        # Running size totals, updated under the lock on every write so readers
+        # (e.g. the /metrics scrape) never need to take it
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    @property
+    def approx_bytes(self) -> int:
+        """Estimated bytes held, as of the last write (lock-free)."""
+        return self._bytes
+
+    def _track(self, session_id: str, state) -> None:
+        size = state.estimated_size() if state is not None else 0
+        self._bytes += size - self._sizes.pop(session_id, 0)
+        if state is not None:
+            self._sizes[session_id] = size
 
     def get(self, session_id: str) -> SessionState:
         with self._lock:
@@ -21,18 +40,26 @@ class SessionMemory:
             
             if session_id not in self._store:
                 self._store[session_id] = SessionState()
+                self._track(session_id, self._store[session_id])
             else:
                 # Update last accessed time
                 self._store[session_id].last_accessed = datetime.now()
             return self._store[session_id]
 
     def set(self, session_id: str, state: SessionState) -> None:
-        with self._lock:
+        with span("session.write"), self._lock:
             self._store[session_id] = state
+            self._track(session_id, state)
 
     def reset(self, session_id: str) -> None:
         with self._lock:
             self._store[session_id] = SessionState()
+            self._track(session_id, self._store[session_id])
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._store.pop(session_id, None)
+            self._track(session_id, None)
     
     def _cleanup_expired_sessions(self) -> int:
         """Remove sessions older than timeout. Called internally."""
@@ -43,6 +70,7 @@ class SessionMemory:
         ]
         for sid in expired:
             del self._store[sid]
+            self._track(sid, None)
         
         self._last_cleanup = now
         if expired:
@@ -59,10 +87,7 @@ class SessionMemory:
         with self._lock:
             now = datetime.now()
             active_sessions = len(self._store)
-            total_memory = sum(
-                len(str(state.dict()).encode('utf-8')) 
-                for state in self._store.values()
-            )
+            total_memory = sum(state.estimated_size() for state in self._store.values())
             
             # Age distribution
             ages = [(now - state.created_at).total_seconds() for state in self._store.values()]
@@ -76,6 +101,21 @@ class SessionMemory:
                 "timeout_minutes": self.timeout.total_seconds() / 60,
             }
     
+    def iter_completed(self) -> Iterator[Tuple[str, SessionState]]:
+        """Yield (session_id, state) for sessions with a finished story, one at a time.
+
+        Only the session ids are copied up front; each state is looked up when it is
+        reached, so exporting many sessions never holds them all in a second structure.
+        Sessions removed in the meantime are skipped.
+        """
+        with self._lock:
+            session_ids = list(self._store)
+        for sid in session_ids:
+            with self._lock:
+                state = self._store.get(sid)
+            if state is not None and state.is_complete:
+                yield sid, state
+
     def get_all_sessions(self) -> Dict[str, Dict]:
         """Get info about all active sessions for history view."""
         with self._lock:
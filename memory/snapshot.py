@@ -0,0 +1,109 @@
+import base64
+import zlib
+from datetime import datetime
+from typing import Optional
+
+import msgpack
+
+from schemas import Article, SessionState
+
+try:
+    import zstandard
+except ImportError:  # zlib is always available; zstd is smaller and faster when installed
+    zstandard = None
+
+SNAPSHOT_VERSION = 1
+
+CODEC_ZLIB = "zlib"
+CODEC_ZSTD = "zstd"
+
+_ARTICLE_FIELDS = ("title", "description", "content", "image_url", "url", "preview")
+
+
+class SnapshotError(ValueError):
+    """Raised for snapshots that are corrupt, from an unknown version or need a missing codec."""
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise SnapshotError("snapshot is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data)
+    raise SnapshotError(f"unknown snapshot codec {codec!r}")
+
+
+def _article_row(article: Article) -> list:
+    # payload already holds the URLs as strings
+    p = article.payload
+    return [p["title"], p["description"], p["content"], p["image_url"], p["url"], article.preview]
+
+
+def encode_session(state: SessionState, codec: Optional[str] = None) -> bytes:
+    """Serialize a session to a compact, versioned binary snapshot.
+
+    Text (articles, titles, options, story) is msgpack-encoded and compressed with
+    zstd (zlib without the zstandard package). The image is stored as raw PNG bytes
+    outside the compressed block, since PNG is already compressed.
+    """
+    codec = codec or (CODEC_ZSTD if zstandard is not None else CODEC_ZLIB)
+    text = {
+        "articles": [_article_row(a) for a in state.articles],
+        "titles": state.titles,
+        "title_to_article_map": state.title_to_article_map,
+        "selected_article_index": state.selected_article_index,
+        "continuation_options": state.continuation_options,
+        "selected_continuation_index": state.selected_continuation_index,
+        "final_story": state.final_story,
+        "created_at": state.created_at.isoformat(),
+        "last_accessed": state.last_accessed.isoformat(),
+        "session_name": state.session_name,
+    }
+    return msgpack.packb({
+        "v": SNAPSHOT_VERSION,
+        "codec": codec,
+        "text": _compress(msgpack.packb(text, use_bin_type=True), codec),
+        "image": base64.b64decode(state.image_base64) if state.image_base64 else None,
+    }, use_bin_type=True)
+
+
+def decode_session(data: bytes) -> SessionState:
+    """Rebuild a SessionState from `encode_session` output."""
+    try:
+        outer = msgpack.unpackb(data, raw=False)
+        version = outer["v"]
+    except Exception as e:
+        raise SnapshotError(f"not a session snapshot: {e}") from e
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f"unsupported snapshot version {version} (expected {SNAPSHOT_VERSION})")
+    try:
+        text = msgpack.unpackb(_decompress(outer["text"], outer["codec"]), raw=False)
+    except SnapshotError:
+        raise
+    except Exception as e:
+        raise SnapshotError(f"corrupt session snapshot: {e}") from e
+
+    image = outer.get("image")
+    return SessionState(
+        articles=[Article(**dict(zip(_ARTICLE_FIELDS, row))) for row in text["articles"]],
+        titles=text["titles"],
+        title_to_article_map=text["title_to_article_map"],
+        selected_article_index=text["selected_article_index"],
+        continuation_options=text["continuation_options"],
+        selected_continuation_index=text["selected_continuation_index"],
+        final_story=text["final_story"],
+        image_base64=base64.b64encode(image).decode("ascii") if image else None,
+        created_at=datetime.fromisoformat(text["created_at"]),
+        last_accessed=datetime.fromisoformat(text["last_accessed"]),
+        session_name=text["session_name"],
+    )
+
+
+__all__ = ["CODEC_ZLIB", "CODEC_ZSTD", "SNAPSHOT_VERSION", "SnapshotError", "decode_session", "encode_session"]
@@ -0,0 +1 @@
+# Observability: tracing spans for the generation pipeline
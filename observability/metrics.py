@@ -0,0 +1,245 @@
+"""Prometheus metrics for the generation pipeline, served on `/metrics`.
+
+A small in-process registry rendering the Prometheus text format. Each metric guards
+its own values with a private lock. Session counts and bytes come from counters that
+SessionMemory keeps up to date on every write, so a scrape never takes the session
+lock. Ollama availability is read from the circuit breaker and balancer at scrape time.
+"""
+import functools
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from observability.progress import report_progress
+from observability.tracing import span
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, *label_values: str, value: float) -> None:
+        with self._lock:
+            self._values[label_values] = float(value)
+
+
+class CallbackGauge(_Metric):
+    """Gauge whose samples are computed at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[Tuple[str, ...], float]], labels: Iterable[str] = ()):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        try:
+            samples = self.collect()
+        except Exception as e:
+            print(f"[Metrics] {self.name} unavailable: {e}")
+            return []
+        return self.header() + [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in sorted(samples.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # label values -> [per-bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            row = self._values.get(label_values)
+            if row is None:
+                row = self._values[label_values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            row[-2] += value
+            row[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = self.header()
+        for labels, row in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(row[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {_format_value(row[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+step_duration = registry.register(Histogram(
+    "fakenews_step_duration_seconds", "Duration of each main.py generation step", labels=("step", "outcome"),
+))
+step_retries = registry.register(Counter(
+    "fakenews_step_retries_total", "Retry attempts after a failed first attempt", labels=("step",),
+))
+fallbacks = registry.register(Counter(
+    "fakenews_fallbacks_total", "Fallback outputs served instead of model output", labels=("step",),
+))
+image_queue_depth = registry.register(Gauge(
+    "fakenews_image_queue_depth", "Image generations waiting or running",
+))
+image_queue_depth.set(value=0)
+
+
+def _session_bytes():
+    from memory.session_memory import memory
+
+    return {(): memory.approx_bytes}
+
+
+def _active_sessions():
+    from memory.session_memory import memory
+
+    return {(): len(memory)}
+
+
+def _ollama_up():
+    from chains.circuit_breaker import CLOSED, breaker
+
+    return {(): 1.0 if breaker.get_stats()["state"] == CLOSED else 0.0}
+
+
+def _backend_up():
+    from chains.ollama_balancer import balancer
+
+    return {(url,): 1.0 if b["healthy"] else 0.0 for url, b in balancer.get_stats().items()}
+
+
+def _backend_in_flight():
+    from chains.ollama_balancer import balancer
+
+    return {(url,): b["in_flight"] for url, b in balancer.get_stats().items()}
+
+
+registry.register(CallbackGauge("fakenews_active_sessions", "Sessions held in SessionMemory", _active_sessions))
+registry.register(CallbackGauge("fakenews_session_bytes", "Estimated bytes held by SessionMemory", _session_bytes))
+registry.register(CallbackGauge("fakenews_ollama_up", "1 when the Ollama circuit breaker is closed", _ollama_up))
+registry.register(CallbackGauge(
+    "fakenews_ollama_backend_up", "Health of each Ollama endpoint", _backend_up, labels=("url",),
+))
+registry.register(CallbackGauge(
+    "fakenews_ollama_backend_in_flight", "Requests in flight per Ollama endpoint", _backend_in_flight, labels=("url",),
+))
+
+
+def instrument_step(name: str):
+    """Decorator for `main.py` steps: a `step.<name>` span, the step duration histogram and progress events."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            report_progress(name, "start")
+            try:
+                with span(f"step.{name}"):
+                    result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                step_duration.observe(time.perf_counter() - start, name, outcome)
+                report_progress(name, "done" if outcome == "ok" else "error")
+
+        return wrapper
+
+    return decorator
+
+
+__all__ = [
+    "CallbackGauge",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "Registry",
+    "fallbacks",
+    "image_queue_depth",
+    "instrument_step",
+    "registry",
+    "step_duration",
+    "step_retries",
+]
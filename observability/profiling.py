@@ -0,0 +1,225 @@
+"""Opt-in profiling of Dash callbacks and chain steps.
+
+    @profiled("title.parse")
+    def _parse(self, res, articles): ...
+
+A decorated call is profiled when either
+
+- PROFILE_SAMPLE_RATE > 0 and the request (or, outside Flask, the call) is sampled, or
+- PROFILE_ALLOW_HEADER is on and the request carries `X-Profile: 1`.
+
+Profiles go to PROFILE_DIR as `<time>_<step>_<session>.prof` (cProfile, open with
+`python -m pstats` or snakeviz) or `.html` with PROFILE_ENGINE=pyinstrument. Calls made
+while a profile is already running are part of that profile, and calls on other threads
+are not profiled meanwhile. With both triggers off a
+decorated call costs one attribute check.
+
+TRACEMALLOC_ENABLED starts `tracemalloc` at import and serves `/debug/tracemalloc`: each
+request writes a snapshot to PROFILE_DIR and returns the top allocation sites
+(`?compare=1` diffs against the previous snapshot).
+"""
+import cProfile
+import functools
+import os
+import random
+import re
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+from typing import Optional
+
+from chains.request_context import current_session_id
+
+PROFILE_HEADER = "X-Profile"
+
+# Per-request decision set by the Flask hook; None outside a request
+_request_profile: ContextVar[Optional[bool]] = ContextVar("request_profile", default=None)
+_running: ContextVar[bool] = ContextVar("profile_running", default=False)
+# One profile at a time: Python 3.12+ allows a single active profiler per process
+_slot = threading.Lock()
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "false").lower() in ("1", "true", "yes")
+
+
+def _safe(part: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", part)[:64]
+
+
+class Profiler:
+    def __init__(self, sample_rate: float = 0.0, allow_header: bool = False, engine: str = "cprofile",
+                 directory: str = "profiles"):
+        self.sample_rate = sample_rate
+        self.allow_header = allow_header
+        self.engine = engine
+        self.directory = directory
+        self._warned = False
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        return cls(
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            allow_header=_env_flag("PROFILE_ALLOW_HEADER"),
+            engine=os.getenv("PROFILE_ENGINE", "cprofile").lower(),
+            directory=os.getenv("PROFILE_DIR", "profiles"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.allow_header
+
+    def sampled(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def should_profile(self) -> bool:
+        if _running.get():
+            return False
+        decided = _request_profile.get()
+        return self.sampled() if decided is None else decided
+
+    def _path(self, step: str, session_id: Optional[str], extension: str) -> str:
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        session = _safe(session_id or current_session_id() or "nosession")
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{seq:04d}_{_safe(step)}_{session}.{extension}"
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, name)
+
+    def _pyinstrument(self):
+        if self.engine != "pyinstrument":
+            return None
+        try:
+            from pyinstrument import Profiler as Sampler
+        except ImportError:
+            if not self._warned:
+                self._warned = True
+                print("[Profiling] pyinstrument is not installed; using cProfile")
+            return None
+        return Sampler()
+
+    def run(self, step: str, fn, *args, session_id: Optional[str] = None, **kwargs):
+        if not _slot.acquire(blocking=False):
+            # Another thread is being profiled; skip rather than wait
+            return fn(*args, **kwargs)
+        token = _running.set(True)
+        sampler = self._pyinstrument()
+        profile = None if sampler else cProfile.Profile()
+        try:
+            if sampler:
+                sampler.start()
+            elif profile is not None:
+                profile.enable()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                if sampler:
+                    sampler.stop()
+                elif profile is not None:
+                    profile.disable()
+                self._dump(step, session_id, sampler, profile)
+        finally:
+            _running.reset(token)
+            _slot.release()
+
+    def _dump(self, step: str, session_id: Optional[str], sampler, profile) -> None:
+        try:
+            if sampler:
+                path = self._path(step, session_id, "html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(sampler.output_html())
+            else:
+                path = self._path(step, session_id, "prof")
+                profile.dump_stats(path)
+            print(f"[Profiling] {step} -> {path}")
+        except Exception as e:
+            print(f"[Profiling] Could not write profile for {step}: {e}")
+
+
+profiler = Profiler.from_env()
+
+
+def profiled(step: str, session_arg: Optional[int] = None):
+    """Decorator: profile the call when sampled or requested. `session_arg` is the position
+    of a session id argument, for callers outside a `session_scope` (e.g. Dash callbacks)."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled or not profiler.should_profile():
+                return fn(*args, **kwargs)
+            session_id = args[session_arg] if session_arg is not None and session_arg < len(args) else None
+            return profiler.run(step, fn, *args, session_id=session_id, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+def start_tracemalloc() -> bool:
+    if not _env_flag("TRACEMALLOC_ENABLED"):
+        return False
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(int(os.getenv("TRACEMALLOC_FRAMES", "10")))
+    return True
+
+
+def tracemalloc_report(limit: int = 25, compare: bool = False) -> str:
+    """Snapshot allocations, write the snapshot to PROFILE_DIR and return the top sites."""
+    global _last_snapshot
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    os.makedirs(profiler.directory, exist_ok=True)
+    path = os.path.join(profiler.directory, f"{time.strftime('%Y%m%d-%H%M%S')}_tracemalloc.snapshot")
+    snapshot.dump(path)
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [f"# snapshot: {path}", f"# traced: {current / 1024 / 1024:.1f} MiB (peak {peak / 1024 / 1024:.1f} MiB)"]
+    if compare and _last_snapshot is not None:
+        lines.append("# change since previous snapshot")
+        lines.extend(str(s) for s in snapshot.compare_to(_last_snapshot, "lineno")[:limit])
+    else:
+        lines.extend(str(s) for s in snapshot.statistics("lineno")[:limit])
+    _last_snapshot = snapshot
+    return "\n".join(lines) + "\n"
+
+
+def install(server) -> None:
+    """Per-request profiling decision plus the `/debug/tracemalloc` route on a Flask server."""
+    import flask
+
+    @server.before_request
+    def _decide_profiling():
+        if not profiler.enabled:
+            return
+        requested = profiler.allow_header and flask.request.headers.get(PROFILE_HEADER, "") in ("1", "true", "yes")
+        flask.g.profile_token = _request_profile.set(requested or profiler.sampled())
+
+    @server.teardown_request
+    def _reset_profiling(exc=None):
+        token = flask.g.pop("profile_token", None)
+        if token is not None:
+            _request_profile.reset(token)
+
+    @server.route("/debug/tracemalloc")
+    def tracemalloc_snapshot():
+        if not tracemalloc.is_tracing():
+            flask.abort(404)
+        limit = flask.request.args.get("limit", 25, type=int)
+        compare = flask.request.args.get("compare", "0").lower() in ("1", "true", "yes")
+        return flask.Response(tracemalloc_report(limit, compare), mimetype="text/plain")
+
+
+start_tracemalloc()
+
+
+__all__ = ["PROFILE_HEADER", "Profiler", "install", "profiled", "profiler", "start_tracemalloc", "tracemalloc_report"]
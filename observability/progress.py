@@ -0,0 +1,39 @@
+"""Step progress events for callers that show progress while a request runs.
+
+    with progress_listener(lambda step, status, info: print(step, status, info)):
+        generate_final_and_image(session_id)
+
+`instrument_step` reports `start`, `done` and `error` for each `main.py` step, the
+story/image halves of `generate_final_and_image` report `start`, and retry loops
+report `retry` with the attempt number. Outside a listener reporting is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+Listener = Callable[[str, str, dict], None]
+
+_listener: ContextVar[Optional[Listener]] = ContextVar("progress_listener", default=None)
+
+
+@contextmanager
+def progress_listener(listener: Listener):
+    token = _listener.set(listener)
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def report_progress(step: str, status: str, **info) -> None:
+    listener = _listener.get()
+    if listener is None:
+        return
+    try:
+        listener(step, status, info)
+    except Exception as e:
+        # Progress is cosmetic; never fail the step because of it
+        print(f"[Progress] Listener failed on {step}/{status}: {e}")
+
+
+__all__ = ["Listener", "progress_listener", "report_progress"]
@@ -0,0 +1,296 @@
+"""Lightweight tracing spans for the generation pipeline.
+
+    with span("llm.call", chain="title") as s:
+        ...
+        s.set_attribute("llm.completion_tokens", 42)
+
+Spans nest through a contextvar. Every span carries the current session id, and the
+`attempt` number of an enclosing retry span. Finished spans go to the exporter chosen
+by TRACE_EXPORTER:
+
+- `none` (default): spans cost a contextvar lookup and nothing else
+- `console`: one `[Trace]` line per span
+- `json`: JSON lines appended to TRACE_FILE by a background writer
+- `otlp`: OTLP/HTTP JSON batches posted to OTEL_EXPORTER_OTLP_ENDPOINT (an OpenTelemetry collector)
+"""
+import atexit
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from chains.request_context import current_session_id
+
+# Attributes copied from the parent span so every child knows which retry it belongs to
+_INHERITED = ("attempt",)
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: Optional[int]
+    attributes: Dict[str, Any]
+    error: Optional[Dict[str, str]]
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = {k: parent.attributes[k] for k in _INHERITED if parent and k in parent.attributes}
+        session_id = current_session_id()
+        if session_id:
+            self.attributes["session_id"] = session_id
+        self.attributes.update(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        # OpenTelemetry semantic convention names
+        self.error = {
+            "exception.type": type(exc).__name__,
+            "exception.message": str(exc),
+            "exception.stacktrace": "".join(traceback.format_exception(type(exc), exc, exc.__traceback__)),
+        }
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_unix_nano": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class ConsoleExporter:
+    def export(self, span: Span) -> None:
+        attrs = " ".join(f"{k}={v}" for k, v in span.attributes.items())
+        status = f" ERROR {span.error['exception.type']}: {span.error['exception.message']}" if span.error else ""
+        print(f"[Trace] {span.name} {span.duration_ms:.1f}ms {attrs}{status}")
+
+    def shutdown(self) -> None:
+        pass
+
+
+class _BatchExporter:
+    """Queues finished spans and writes them from a background thread, off the request path."""
+
+    def __init__(self, flush_interval: float = 1.0, max_queue: int = 10000):
+        self.flush_interval = flush_interval
+        self._queue: deque = deque(maxlen=max_queue)
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, name=f"{type(self).__name__}", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def export(self, span: Span) -> None:
+        self._queue.append(span)
+
+    def _drain(self) -> List[Span]:
+        spans = []
+        while self._queue:
+            spans.append(self._queue.popleft())
+        return spans
+
+    def _loop(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        spans = self._drain()
+        if spans:
+            try:
+                self._write(spans)
+            except Exception as e:
+                print(f"[Trace] Dropped {len(spans)} span(s): {e}")
+
+    def shutdown(self) -> None:
+        if self._stopped:
+            return
+        self._stopped = True
+        self._wake.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _write(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+
+class JsonFileExporter(_BatchExporter):
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(**kwargs)
+
+    def _write(self, spans: List[Span]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter(_BatchExporter):
+    """Posts spans as OTLP/HTTP JSON (`/v1/traces`), understood by OpenTelemetry collectors."""
+
+    def __init__(self, endpoint: str, service_name: str = "fake-news-generator", **kwargs):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self._session = requests.Session()
+        super().__init__(**kwargs)
+
+    def _otlp_span(self, s: Span) -> dict:
+        attributes = {**s.attributes, **(s.error or {})}
+        out = {
+            "traceId": s.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 1,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+            "status": {"code": 2, "message": s.error["exception.message"]} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            out["parentSpanId"] = s.parent_id
+        return out
+
+    def payload(self, spans: List[Span]) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "fake_news_generator"}, "spans": [self._otlp_span(s) for s in spans]}],
+            }]
+        }
+
+    def _write(self, spans: List[Span]) -> None:
+        self._session.post(self.url, json=self.payload(spans), timeout=5).raise_for_status()
+
+
+def exporter_from_env():
+    kind = os.getenv("TRACE_EXPORTER", "none").lower()
+    flush = float(os.getenv("TRACE_FLUSH_SECONDS", "1.0"))
+    if kind == "console":
+        return ConsoleExporter()
+    if kind == "json":
+        return JsonFileExporter(os.getenv("TRACE_FILE", "traces.jsonl"), flush_interval=flush)
+    if kind == "otlp":
+        return OtlpHttpExporter(
+            os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318"),
+            service_name=os.getenv("OTEL_SERVICE_NAME", "fake-news-generator"),
+            flush_interval=flush,
+        )
+    return None
+
+
+class Tracer:
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        exporter = self.exporter
+        if exporter is None:
+            yield _NOOP
+            return
+        s = Span(name, _current.get(), attributes)
+        token = _current.set(s)
+        try:
+            yield s
+        except BaseException as e:
+            s.record_exception(e)
+            raise
+        finally:
+            s.end_ns = time.time_ns()
+            _current.reset(token)
+            exporter.export(s)
+
+
+tracer = Tracer(exporter_from_env())
+
+
+def span(name: str, **attributes):
+    """Context manager recording `name` as a child of the current span."""
+    return tracer.span(name, **attributes)
+
+
+def traced(name: str):
+    """Decorator: runs the function inside a span called `name`."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def current_span():
+    """The active span (a no-op stand-in when tracing is off), e.g. to add attributes from nested code."""
+    return _current.get() or _NOOP
+
+
+__all__ = [
+    "ConsoleExporter",
+    "JsonFileExporter",
+    "OtlpHttpExporter",
+    "Span",
+    "Tracer",
+    "current_span",
+    "span",
+    "traced",
+    "tracer",
+]
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
+from functools import cached_property
 from pydantic import BaseModel, HttpUrl, Field
 
 
@@ -9,6 +10,25 @@ class Article(BaseModel):
     content: Optional[str] = None
     image_url: Optional[HttpUrl] = None
     url: Optional[HttpUrl] = None
+    # Display text computed once at ingest so render callbacks do no text processing
+    preview: Optional[str] = None
+
+    # Articles are not modified after ingest, so derived forms are computed once.
+    # cached_property stores in the instance __dict__, much cheaper to read than a PrivateAttr.
+    @cached_property
+    def payload(self) -> dict:
+        """JSON-ready fields for prompts (URLs as strings, no preview)."""
+        return {
+            "title": self.title,
+            "description": self.description,
+            "content": self.content,
+            "image_url": str(self.image_url) if self.image_url else None,
+            "url": str(self.url) if self.url else None,
+        }
+
+    @cached_property
+    def estimated_size(self) -> int:
+        return sum(len(v) for v in self.payload.values() if v)
 
 
 class TitlesOutput(BaseModel):
@@ -20,8 +40,13 @@ class ContinuationOptions(BaseModel):
     options: List[str]
 
 
+# Roughly the serialized size of an empty session (field names, timestamps)
+_SESSION_BASE_SIZE = 350
+
+
 class SessionState(BaseModel):
     articles: List[Article] = []
+    titles: List[str] = []
     title_to_article_map: List[int] = []
     selected_article_index: Optional[int] = None
     continuation_options: List[str] = []
@@ -36,4 +61,11 @@ class SessionState(BaseModel):
     @property
     def is_complete(self) -> bool:
         """Check if session has a complete generated story."""
-        return self.final_story is not None and len(self.final_story) > 0
\ No newline at end of file
+        return self.final_story is not None and len(self.final_story) > 0
+
+    def estimated_size(self) -> int:
+        """Approximate bytes held by the session (text and image data), without serializing it."""
+        size = _SESSION_BASE_SIZE + sum(a.estimated_size for a in self.articles)
+        size += sum(len(t) for t in self.titles) + sum(len(o) for o in self.continuation_options)
+        size += len(self.final_story or "") + len(self.image_base64 or "") + len(self.session_name or "")
+        return size
\ No newline at end of file
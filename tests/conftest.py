@@ -9,3 +9,4 @@ sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
 os.environ['NEWS_API_KEY'] = 'test_key_for_testing'
 os.environ['FORCE_CPU_IMAGE'] = 'true'
 os.environ['OLLAMA_BASE_URL'] = 'http://localhost:11434'
+os.environ['ARTICLE_STORE_PATH'] = ':memory:'
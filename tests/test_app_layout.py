@@ -0,0 +1,45 @@
+"""Tests for how the Dash app splits work between browser and server."""
+
+
+def test_section_toggles_run_in_the_browser():
+    """Showing a step's section needs no server round trip."""
+    import app
+
+    deps = app.create_dash_app().server.test_client().get("/_dash-dependencies").json
+    toggles = [d for d in deps if "style" in d["output"] and "progress-row" not in d["output"]]
+    assert {t["inputs"][0]["id"] for t in toggles} == {"titles-area", "continuations-area", "final-story", "story-image"}
+    assert all(t["clientside_function"] for t in toggles)
+
+
+def test_restored_session_shows_its_title_buttons():
+    """Loading a saved session rebuilds the title buttons from `SessionState.titles`."""
+    import json
+
+    import app
+    from memory.session_memory import memory
+    from schemas import Article
+
+    sid = "restore-titles"
+    state = memory.get(sid)
+    state.articles = [Article(title="Original")]
+    state.titles = ["Fake headline one", "Fake headline two"]
+    state.title_to_article_map = [0, 0]
+    memory.set(sid, state)
+
+    client = app.create_dash_app().server.test_client()
+    deps = client.get("/_dash-dependencies").json
+    dep = next(d for d in deps if "load-session-btn" in json.dumps(d["inputs"]))
+    button = {"index": sid, "type": "load-session-btn"}
+    response = client.post("/_dash-update-component", json={
+        "output": dep["output"],
+        "outputs": [
+            {"id": part.rsplit(".", 1)[0], "property": part.rsplit(".", 1)[1]}
+            for part in dep["output"].strip(".").split("...")
+        ],
+        "inputs": [[{"id": button, "property": "n_clicks", "value": 1}]],
+        "changedPropIds": [json.dumps(button, separators=(",", ":")) + ".n_clicks"],
+        "state": [],
+    }).json["response"]
+    memory.delete(sid)
+    titles = str(response["titles-area"])
+    assert "Fake headline one" in titles and "Fake headline two" in titles
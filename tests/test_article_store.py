@@ -0,0 +1,61 @@
+"""Tests for the SQLite article store and offline serving."""
+import time
+
+import pytest
+
+from schemas import Article
+from tools.article_store import SQLiteArticleStore
+from tools.news_tool import NewsTool
+from tools.rate_limiter import QuotaExceededError, RateLimiter
+
+
+def _article(n, title=None, content="Body text"):
+    return Article(title=title or f"Headline {n}", content=content, url=f"https://example.com/{n}")
+
+
+def test_add_dedupes_by_url():
+    """Known articles are not counted as new."""
+    store = SQLiteArticleStore()
+    assert store.add([_article(1), _article(2)], "general") == 2
+    assert store.add([_article(2), _article(3)], "general") == 1
+    assert len(store) == 3
+    assert store.get("https://example.com/2").title == "Headline 2"
+
+
+def test_query_by_category_recency_and_keyword():
+    """Queries filter on category, fetch time and full-text keyword."""
+    store = SQLiteArticleStore()
+    store.add([_article(1, "Markets rally on rate cut")], "business")
+    cutoff = time.time()
+    time.sleep(0.01)
+    store.add([_article(2, "Rate cut expected"), _article(3, "Cup final tonight")], "sports")
+
+    assert [a.title for a in store.query(category="business")] == ["Markets rally on rate cut"]
+    assert {a.title for a in store.query(since=cutoff)} == {"Rate cut expected", "Cup final tonight"}
+    assert {a.title for a in store.query(keyword="rate cut")} == {"Markets rally on rate cut", "Rate cut expected"}
+    assert [a.title for a in store.query(keyword="rate", category="sports")] == ["Rate cut expected"]
+    assert store.query(keyword='"unbalanced') == []
+
+
+def test_offline_serves_from_store():
+    """With offline mode NewsAPI is never called."""
+    store = SQLiteArticleStore()
+    store.add([_article(n) for n in range(5)], "science")
+    tool = NewsTool(api_key="k", base_url="http://127.0.0.1:9", store=store, offline=True)
+    articles = tool.fetch_top_headlines("science", page_size=3)
+    assert len(articles) == 3
+    with pytest.raises(RuntimeError):
+        tool.fetch_top_headlines("health")
+
+
+def test_falls_back_to_store_when_quota_exhausted():
+    """An exhausted quota is served from stored articles; an empty store re-raises."""
+    store = SQLiteArticleStore()
+    store.add([_article(n) for n in range(4)], "general")
+    limiter = RateLimiter(rate=1000, burst=10, daily_quota=1)
+    limiter.acquire()
+    tool = NewsTool(api_key="k", store=store, rate_limiter=limiter)
+    assert len(tool.fetch_top_headlines("general", page_size=10)) == 4
+    with pytest.raises(QuotaExceededError):
+        tool.fetch_top_headlines("sports")
+    assert [a.title for a in tool.search("headline 2")] == ["Headline 2"]
@@ -0,0 +1,134 @@
+"""Tests for background jobs behind the Dash callbacks."""
+import threading
+import time
+
+from background import JobRunner, job_deadline
+
+
+def _wait(predicate, timeout: float = 5.0) -> None:
+    stop_at = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < stop_at, "timed out"
+        time.sleep(0.01)
+
+
+def test_job_result_and_progress():
+    """Jobs run off the request thread and report progress, then their result, once."""
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+
+    def job(set_progress, x):
+        set_progress((50, "halfway"))
+        release.wait(5)
+        return x * 2
+
+    job_id = runner.submit(job, 21)
+    _wait(lambda: runner.poll(job_id).progress is not None)
+    assert runner.poll(job_id).progress == (50, "halfway")
+    release.set()
+    _wait(lambda: runner.poll(job_id).done)
+    assert runner.poll(job_id) is None
+
+
+def test_errors_are_reported():
+    """A raising job is reported as finished with its error."""
+    runner = JobRunner(max_workers=1)
+
+    def job(set_progress):
+        raise ValueError("boom")
+
+    job_id = runner.submit(job)
+    _wait(lambda: runner._jobs[job_id].future.done())
+    status = runner.poll(job_id)
+    assert status.done and status.error == "boom"
+
+
+def test_cancel_cancels_the_job_deadline():
+    """Cancelling a running job makes its deadline fail the next check."""
+    runner = JobRunner(max_workers=1)
+    started = threading.Event()
+    outcome = []
+
+    def job(set_progress):
+        deadline = job_deadline()
+        started.set()
+        try:
+            while True:
+                deadline.check("loop")
+                time.sleep(0.01)
+        except Exception as e:
+            outcome.append(str(e))
+
+    runner.submit(job)
+    assert started.wait(5)
+    runner.cancel(list(runner._jobs)[0])
+    _wait(lambda: outcome)
+    assert "cancelled" in outcome[0]
+    assert job_deadline() is None
+
+
+def test_pool_is_bounded():
+    """Jobs beyond BACKGROUND_WORKERS wait in the queue; cancelling a queued job drops it."""
+    runner = JobRunner(max_workers=1)
+    release = threading.Event()
+    ran = []
+    first = runner.submit(lambda set_progress: release.wait(5))
+    second = runner.submit(lambda set_progress: ran.append(True))
+    _wait(lambda: runner.stats()["running"] == 1)
+    assert runner.stats() == {"workers": 1, "running": 1, "queued": 1}
+    runner.cancel(second)
+    release.set()
+    _wait(lambda: runner.poll(first).done)
+    assert runner.poll(second) is None
+    assert ran == []
+
+
+def _callback_body(deps, trigger: str, inputs: list, state: list) -> dict:
+    output = next(d["output"] for d in deps if d["inputs"][0]["id"] == trigger)
+    return {
+        "output": output,
+        "outputs": [
+            {"id": part.rsplit(".", 1)[0], "property": part.rsplit(".", 1)[1]}
+            for part in output.strip(".").split("...")
+        ],
+        "inputs": inputs,
+        "state": state,
+        "changedPropIds": [f"{inputs[0]['id']}.{inputs[0]['property']}"],
+    }
+
+
+def test_load_click_starts_a_job_that_is_polled_to_its_result(monkeypatch):
+    """`on_load` answers at once with a job id; polling it returns the titles, under the job's deadline."""
+    import app
+
+    deadlines = []
+
+    def fake_titles(session_id, deadline=None):
+        deadlines.append(deadline)
+        return ["A headline"]
+
+    monkeypatch.setattr(app, "load_latest_news", lambda session_id, category="general": [])
+    monkeypatch.setattr(app, "generate_titles_for_session", fake_titles)
+    client = app.create_dash_app().server.test_client()
+    deps = client.get("/_dash-dependencies").json
+
+    start = client.post("/_dash-update-component", json=_callback_body(
+        deps, "load-btn",
+        [{"id": "load-btn", "property": "n_clicks", "value": 1}],
+        [{"id": "category", "property": "value", "value": "general"}, {"id": "job", "property": "data", "value": None}],
+    )).json["response"]
+    job_id = start["job"]["data"]
+    assert job_id and start["job-poll"]["disabled"] is False
+
+    for n in range(1, 200):
+        response = client.post("/_dash-update-component", json=_callback_body(
+            deps, "job-poll",
+            [{"id": "job-poll", "property": "n_intervals", "value": n}],
+            [{"id": "job", "property": "data", "value": job_id}],
+        )).json["response"]
+        if "titles-area" in response:
+            break
+        time.sleep(0.02)
+    assert "A headline" in str(response["titles-area"])
+    assert response["job-poll"]["disabled"] is True
+    assert deadlines and deadlines[0] is not None
@@ -0,0 +1,81 @@
+"""Tests for the headless batch CLI."""
+import base64
+import io
+import json
+
+import pytest
+from PIL import Image
+
+import batch
+import main
+from memory.session_memory import memory
+from schemas import Article, ContinuationOptions, TitlesOutput
+
+
+def _png_b64():
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8)).save(buf, format="PNG")
+    return base64.b64encode(buf.getvalue()).decode("ascii")
+
+
+class _Fake:
+    def __init__(self, fn):
+        self.generate = fn
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    monkeypatch.setattr(main, "title_chain", _Fake(lambda articles: TitlesOutput(titles=["A", "B", "C"], article_indices=[1, 0, 2])))
+    monkeypatch.setattr(main, "continuation_chain", _Fake(lambda text, article_title="": ContinuationOptions(options=["x", "y", "z"])))
+    monkeypatch.setattr(main, "final_chain", _Fake(lambda title, text, cont: f"Story about {title} going {cont}"))
+    monkeypatch.setattr(main, "image_chain", _Fake(lambda story, article_title="", article_text="": _png_b64()))
+
+
+def test_resolve_category_prefix():
+    """Unambiguous prefixes map to NewsAPI categories."""
+    assert batch.resolve_category("tech") == "technology"
+    with pytest.raises(ValueError):
+        batch.resolve_category("s")
+
+
+def test_batch_writes_results_and_images(fake_pipeline, tmp_path):
+    """Every item is written to JSONL with its image, sessions are freed, stages are counted."""
+    pool = [Article(title=f"Article {i}", content="Body", url=f"https://example.com/{i}") for i in range(5)]
+    before = len(memory._store)
+    runner = batch.BatchRunner(str(tmp_path), workers=3, stage_limits={"story": 2})
+    summary = runner.run(pool, count=6, articles_per_item=3)
+
+    records = [json.loads(line) for line in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert summary["completed"] == 6 and len(records) == 6
+    assert {r["continuation"] for r in records} == {"x", "y", "z"}
+    assert all((tmp_path / r["image_path"]).exists() for r in records)
+    assert summary["stages"]["story"]["limit"] == 2 and summary["stages"]["image"]["ok"] == 6
+    assert len(memory._store) == before
+
+
+def test_batch_records_failures(fake_pipeline, monkeypatch, tmp_path):
+    """A failing stage is recorded per item instead of stopping the batch."""
+    def broken(*args, **kwargs):
+        raise RuntimeError("story model down")
+
+    monkeypatch.setattr(main, "final_chain", _Fake(broken))
+    monkeypatch.setenv("GEN_MAX_RETRIES", "1")
+    summary = batch.BatchRunner(str(tmp_path), workers=2, images=False).run([Article(title="A")], count=2)
+    records = [json.loads(line) for line in (tmp_path / "results.jsonl").read_text().splitlines()]
+    assert summary["failed"] == 2
+    assert {r["failed_stage"] for r in records} == {"story"}
+    assert summary["stages"]["story"]["failed"] == 2
+
+
+def test_fallback_story_gets_no_image(fake_pipeline, monkeypatch, tmp_path):
+    """With ENABLE_FALLBACK a fallback story completes the item but skips the image stage."""
+    def broken(*args, **kwargs):
+        raise RuntimeError("story model down")
+
+    monkeypatch.setattr(main, "final_chain", _Fake(broken))
+    monkeypatch.setenv("GEN_MAX_RETRIES", "1")
+    monkeypatch.setenv("ENABLE_FALLBACK", "true")
+    summary = batch.BatchRunner(str(tmp_path), workers=1).run([Article(title="A")], count=1)
+    record = json.loads((tmp_path / "results.jsonl").read_text())
+    assert summary["completed"] == 1 and record["image_path"] is None
+    assert "image" not in summary["stages"]
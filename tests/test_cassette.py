@@ -0,0 +1,98 @@
+"""Tests for cassette record/replay."""
+import json
+
+import pytest
+import requests
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import PromptTemplate
+from langchain_core.runnables import RunnableLambda
+
+from chains import ollama_client
+from tools import cassette as cassette_module, news_tool
+from tools.article_store import SQLiteArticleStore
+from tools.cassette import RECORD, REPLAY, Cassette, CassetteMissError
+from tools.news_tool import NewsTool
+from tools.rate_limiter import RateLimiter
+
+
+class _FakeSession:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = json.dumps({"articles": [{"title": f"Page {params['page']}", "url": "https://news.test/1"}]}).encode()
+        return resp
+
+
+@pytest.fixture
+def use_cassette(monkeypatch, tmp_path):
+    def configure(mode, **kwargs):
+        c = Cassette(str(tmp_path / "cassette.jsonl"), mode=mode, **kwargs)
+        for module in (ollama_client, news_tool, cassette_module):
+            monkeypatch.setattr(module, "cassette", c)
+        return c
+
+    return configure
+
+
+def _prompt(prompt, reply):
+    llm = RunnableLambda(lambda value: AIMessage(content=reply, response_metadata={"eval_count": 3}))
+    return ollama_client.run_prompt("title", PromptTemplate.from_template("Headline: {h}"), llm, {"h": prompt})
+
+
+def test_llm_record_then_replay(use_cassette):
+    """Replay serves the recorded reply without calling the model."""
+    recorder = use_cassette(RECORD)
+    assert _prompt("Mayor", "recorded") == "recorded"
+    entry = json.loads(open(recorder.path).read())
+    assert entry["request"] == "Headline: Mayor" and entry["response"]["metadata"] == {"eval_count": 3}
+
+    use_cassette(REPLAY, latency_scale=0)
+    assert _prompt("Mayor", "live") == "recorded"
+    # A different prompt falls back to the next recording of the same chain
+    assert _prompt("Other", "live") == "recorded"
+
+
+def test_strict_replay_raises_on_miss(use_cassette):
+    """Strict mode only serves exact matches."""
+    use_cassette(RECORD)
+    _prompt("Mayor", "recorded")
+    use_cassette(REPLAY, latency_scale=0, strict=True)
+    with pytest.raises(CassetteMissError):
+        _prompt("Other", "live")
+
+
+def test_news_record_then_replay_without_key(use_cassette):
+    """NewsAPI responses replay without a key, and the key is never recorded."""
+    recorder = use_cassette(RECORD)
+    tool = NewsTool(api_key="secret", base_url="https://newsapi.test", store=SQLiteArticleStore(),
+                    rate_limiter=RateLimiter(rate=1000, burst=10))
+    tool._session = _FakeSession()
+    assert [a.title for a in tool.fetch_page("science", page=2)] == ["Page 2"]
+    assert "secret" not in open(recorder.path).read()
+
+    use_cassette(REPLAY, latency_scale=0)
+    replayed = NewsTool(api_key=None, base_url="https://newsapi.test", store=SQLiteArticleStore())
+    replayed.api_key = None
+    replayed._session = _FakeSession()
+    assert [a.title for a in replayed.fetch_page("science", page=2)] == ["Page 2"]
+    assert replayed._session.calls == 0
+
+
+def test_replay_sleeps_scaled_latency(use_cassette, monkeypatch):
+    """Recorded latencies are replayed times the scale."""
+    recorder = use_cassette(RECORD)
+    _prompt("Mayor", "recorded")
+    lines = [json.loads(line) for line in open(recorder.path)]
+    lines[0]["latency"] = 2.0
+    with open(recorder.path, "w") as f:
+        f.write("".join(json.dumps(entry) + "\n" for entry in lines))
+
+    slept = []
+    monkeypatch.setattr(cassette_module.time, "sleep", slept.append)
+    use_cassette(REPLAY, latency_scale=0.5)
+    _prompt("Mayor", "live")
+    assert slept == [1.0]
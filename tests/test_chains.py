@@ -39,3 +39,19 @@ def test_image_chain_handles_missing_dependencies():
     # This should not raise an error even if torch/diffusers aren't installed
     chain = ImageChain()
     assert chain is not None
+
+
+def test_session_chains_share_prompt_prefix():
+    """Continuation, final story and image prompts start with the same system + article prefix."""
+    from chains.continuation_chain import ContinuationChain
+    from chains.final_story_chain import FinalStoryChain
+    from chains.image_chain import ImageChain
+    article = {"article_title": "Mayor opens bridge", "article_text": "The mayor opened a bridge today."}
+    prompts = [
+        ContinuationChain().prompt.format_messages(**article),
+        FinalStoryChain().prompt.format_messages(continuation_choice="A twist", **article),
+        ImageChain(pipeline=object()).prompt.format_messages(final_text="Story", **article),
+    ]
+    system_texts = {p[0].content for p in prompts}
+    assert len(system_texts) == 1
+    assert "The mayor opened a bridge today." in system_texts.pop()
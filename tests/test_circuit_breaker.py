@@ -0,0 +1,52 @@
+"""Tests for the Ollama circuit breaker."""
+import time
+import pytest
+from chains.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def failing():
+    raise ConnectionError("refused")
+
+
+def test_opens_after_threshold_and_fails_fast():
+    """Consecutive failures open the circuit; further calls are rejected without calling through."""
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(failing)
+    assert breaker.state == OPEN
+
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    assert breaker.get_stats()["rejected_calls"] == 1
+
+
+def test_half_open_trial_closes_or_reopens():
+    """After the reset timeout one trial call decides whether the circuit closes."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    with pytest.raises(ConnectionError):
+        breaker.call(failing)
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(ConnectionError):
+        breaker.call(failing)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED
+
+
+def test_background_probe_opens_and_recovers():
+    """The health probe opens the circuit proactively and half-opens it on recovery."""
+    healthy = {"value": False}
+    breaker = CircuitBreaker(reset_timeout=60, probe=lambda: healthy["value"], probe_interval=0.02)
+    breaker.before_call()  # starts the probe thread
+    time.sleep(0.1)
+    assert breaker.state == OPEN
+    healthy["value"] = True
+    time.sleep(0.1)
+    assert breaker.state == HALF_OPEN
+    breaker.stop()
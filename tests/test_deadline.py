@@ -0,0 +1,73 @@
+"""Tests for request deadlines and per-step budgets."""
+import time
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from chains.deadline import Deadline, DeadlineExceeded, current_deadline, timeout_stats, with_deadline
+
+
+def test_step_budget_is_bounded_by_deadline(monkeypatch):
+    """A step gets its own timeout, but never more than the request has left."""
+    monkeypatch.setenv("GEN_TIMEOUT_STORY", "30")
+    assert Deadline(None).step_budget("story") == 30
+    assert Deadline(5).step_budget("story") <= 5
+    expired = Deadline(0.001)
+    time.sleep(0.01)
+    assert expired.step_budget("story") == 0
+    with pytest.raises(DeadlineExceeded):
+        expired.check("story")
+
+
+def test_with_deadline_sets_and_resets_context():
+    """The decorator exposes the caller's deadline only while the step runs."""
+    seen = []
+
+    @with_deadline
+    def step():
+        seen.append(current_deadline())
+
+    mine = Deadline(10)
+    step(deadline=mine)
+    assert seen[0] is mine
+    assert current_deadline().expires_at is None
+
+
+def test_image_skipped_when_story_uses_the_budget(monkeypatch):
+    """No image attempt is started once the request deadline has too little time left."""
+    import main
+    from chains.final_story_chain import FinalStoryChain
+    from memory.session_memory import memory
+    from schemas import Article
+
+    def slow_story(_):
+        time.sleep(0.2)
+        return AIMessage(content="A story.")
+
+    image_calls = []
+    monkeypatch.setattr(main, "final_chain", FinalStoryChain(llm=RunnableLambda(slow_story)))
+    monkeypatch.setattr(main.image_chain, "generate", lambda *a, **k: image_calls.append(1))
+    monkeypatch.setenv("ENABLE_FALLBACK", "true")
+    monkeypatch.setenv("GEN_MIN_ATTEMPT_SECONDS", "1")
+
+    state = memory.get("deadline-test")
+    state.articles = [Article(title="Title", content="Content")]
+    state.selected_article_index = 0
+    state.continuation_options = ["A twist"]
+    state.selected_continuation_index = 0
+    memory.set("deadline-test", state)
+
+    before = timeout_stats.get_stats().get("image", 0)
+    story, image = main.generate_final_and_image("deadline-test", deadline=Deadline(1.1))
+    assert story == "A story."
+    assert image is None
+    assert image_calls == []
+    assert timeout_stats.get_stats()["image"] == before + 1
+
+
+def test_cancelled_deadline_stops_checks():
+    """`Deadline.cancel` ends the request even without a time limit."""
+    deadline = Deadline(None)
+    deadline.cancel()
+    assert deadline.remaining() == 0
+    with pytest.raises(DeadlineExceeded, match="cancelled"):
+        deadline.check("story")
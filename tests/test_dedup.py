@@ -0,0 +1,32 @@
+"""Tests for near-duplicate headline detection."""
+from schemas import Article
+from tools.dedup import HeadlineDeduplicator, headline_shingles
+
+
+def _a(title):
+    return Article(title=title)
+
+
+def test_shingles_ignore_outlet_suffix():
+    """The ' - Outlet' suffix does not contribute shingles."""
+    assert headline_shingles(_a("Fed cuts rates - CNN")) == headline_shingles(_a("Fed cuts rates - Reuters"))
+
+
+def test_near_duplicates_are_collapsed_keeping_first():
+    """Copies of one story collapse to the first; distinct stories survive."""
+    articles = [
+        _a("Fed cuts interest rates by half a point - CNN"),
+        _a("Lakers win season opener in overtime - ESPN"),
+        _a("Fed cuts interest rates by half a point, markets rally - Reuters"),
+        _a("Fed cuts interest rates by half a point - AP News"),
+        _a("New telescope images reveal distant galaxy - NASA"),
+    ]
+    kept = HeadlineDeduplicator(threshold=0.5).dedupe(articles)
+    assert [a.title for a in kept] == [articles[0].title, articles[1].title, articles[4].title]
+
+
+def test_threshold_zero_disables_and_empty_titles_are_kept():
+    """Threshold 0 keeps everything; headlines without words are never duplicates."""
+    articles = [_a("Same story"), _a("Same story"), _a(""), _a("")]
+    assert len(HeadlineDeduplicator(threshold=0).dedupe(articles)) == 4
+    assert len(HeadlineDeduplicator(threshold=0.5).dedupe(articles)) == 3
@@ -0,0 +1,55 @@
+"""Tests for the streaming session export."""
+import io
+import json
+import tarfile
+
+from app import create_dash_app
+from memory.export import iter_jsonl, iter_tar
+from memory.session_memory import SessionMemory, memory
+from schemas import Article, SessionState
+
+
+def _complete(n):
+    return SessionState(
+        articles=[Article(title=f"Article {n}", url=f"https://example.com/{n}")],
+        selected_article_index=0,
+        continuation_options=["a", "b"],
+        selected_continuation_index=1,
+        final_story=f"Story {n}",
+        image_base64="iVBORw0KGgo=",
+    )
+
+
+def test_iter_completed_skips_unfinished():
+    """Only sessions with a story are exported."""
+    mem = SessionMemory()
+    mem.set("done", _complete(1))
+    mem.get("empty")
+    assert [sid for sid, _ in mem.iter_completed()] == ["done"]
+
+
+def test_jsonl_and_tar_contents():
+    """Each format carries the story, article metadata and image."""
+    sessions = [("s1", _complete(1)), ("s2", _complete(2))]
+    lines = b"".join(iter_jsonl(sessions)).decode().splitlines()
+    first = json.loads(lines[0])
+    assert len(lines) == 2
+    assert first["story"] == "Story 1" and first["continuation"] == "b"
+    assert first["article"]["url"] == "https://example.com/1"
+    assert first["image_png_base64"] == "iVBORw0KGgo="
+
+    with tarfile.open(fileobj=io.BytesIO(b"".join(iter_tar(sessions))), mode="r:") as tar:
+        assert sorted(tar.getnames()) == ["s1/image.png", "s1/session.json", "s2/image.png", "s2/session.json"]
+        assert json.load(tar.extractfile("s2/session.json"))["story"] == "Story 2"
+
+
+def test_export_route_streams():
+    """The Flask route streams JSONL and rejects unknown formats."""
+    memory.set("export-test", _complete(3))
+    client = create_dash_app().server.test_client()
+    resp = client.get("/export/sessions.jsonl?images=0")
+    records = [json.loads(line) for line in resp.data.decode().splitlines()]
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    assert any(r["session_id"] == "export-test" and "image_png_base64" not in r for r in records)
+    assert client.get("/export/sessions.zip").status_code == 404
+    memory._store.pop("export-test", None)
@@ -0,0 +1,40 @@
+"""Tests for per-chain generation limits."""
+from chains.generation_limits import GenerationLimits, GenerationStats, close_json, limits_for, paragraph_cutoff
+
+
+def test_json_chains_stop_on_closing_brace():
+    """JSON chains stop at '}' and the brace is restored afterwards."""
+    limits = limits_for("title", 160)
+    assert limits.stop == ("}",)
+    assert limits.num_predict == 160
+    assert close_json('{"titles": ["a", "b", "c"]', limits) == '{"titles": ["a", "b", "c"]}'
+    assert close_json('{"titles": []}', limits) == '{"titles": []}'
+
+
+def test_story_limits_from_env(monkeypatch):
+    """Story caps come from env and 0 disables the token cap."""
+    monkeypatch.setenv("STORY_NUM_PREDICT", "0")
+    monkeypatch.setenv("STORY_MAX_PARAGRAPHS", "4")
+    limits = limits_for("story", 1200)
+    assert limits == GenerationLimits(num_predict=None, stop=(), max_paragraphs=4)
+
+
+def test_paragraph_cutoff():
+    """Text is cut right before the paragraph that exceeds the limit."""
+    text = "\n\nOne.\n\nTwo.\n\nThree."
+    assert paragraph_cutoff(text, 3) is None
+    assert text[: paragraph_cutoff(text, 2)] == "\n\nOne.\n\nTwo."
+    # A trailing break alone does not trigger the cut until new text arrives
+    assert paragraph_cutoff("One.\n\nTwo.\n\n", 2) is None
+
+
+def test_generation_stats():
+    """Stats aggregate tokens and decode time per chain."""
+    stats = GenerationStats()
+    stats.record("story", tokens=100, decode_seconds=2.0)
+    stats.record("story", tokens=50, decode_seconds=1.0, stopped_early=True)
+    story = stats.get_stats()["story"]
+    assert story["calls"] == 2
+    assert story["avg_tokens_per_call"] == 75
+    assert story["tokens_per_second"] == 50
+    assert story["stopped_early"] == 1
@@ -0,0 +1,69 @@
+"""Tests for the prefetched headline pool."""
+import time
+from memory.headline_pool import HeadlineBundle, HeadlinePool
+from schemas import Article
+
+
+def make_builder(calls):
+    def build(category):
+        calls.append(category)
+        return HeadlineBundle(category, [Article(title=f"{category} news")], ["A", "B", "C"], [0, 0, 0])
+
+    return build
+
+
+def wait_for(predicate, timeout=2.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_pool_fills_and_refills_after_take():
+    """Started pools fill every category; taking a bundle schedules a replacement."""
+    calls = []
+    pool = HeadlinePool(make_builder(calls), ["tech", "sports"], pool_size=2, refresh_interval=60)
+    pool.start()
+    assert wait_for(lambda: pool.get_stats()["ready"] == {"tech": 2, "sports": 2})
+
+    bundle = pool.take("tech")
+    assert bundle.titles == ["A", "B", "C"]
+    assert wait_for(lambda: pool.get_stats()["ready"]["tech"] == 2)
+    assert calls.count("tech") == 3
+    pool.stop()
+
+
+def test_stale_bundles_are_not_served():
+    """Bundles older than max_age are dropped and count as a miss."""
+    pool = HeadlinePool(make_builder([]), ["tech"], pool_size=1, max_age=0.05)
+    pool._pools["tech"].append(HeadlineBundle("tech", [], [], [], created_at=time.monotonic() - 1))
+    pool.enabled = True
+    assert pool.take("tech") is None
+    assert pool.get_stats()["misses"] == 1
+    pool.stop()
+
+
+def test_idle_pool_does_not_rebuild_expired_bundles():
+    """Without traffic expired bundles are dropped, not rebuilt; the next take refills the category."""
+    calls = []
+    pool = HeadlinePool(make_builder(calls), ["tech"], pool_size=1, max_age=0.05, refresh_interval=0.01)
+    pool.start()
+    assert wait_for(lambda: calls == ["tech"])
+    assert wait_for(lambda: pool.get_stats()["ready"]["tech"] == 0)
+    time.sleep(0.1)
+    assert calls == ["tech"]
+
+    assert pool.take("tech") is None
+    assert wait_for(lambda: pool.get_stats()["ready"]["tech"] == 1)
+    assert calls == ["tech", "tech"]
+    pool.stop()
+
+
+def test_disabled_pool_returns_nothing():
+    """With PREFETCH_ENABLED off, load_latest_news keeps using live fetches."""
+    pool = HeadlinePool(make_builder([]), ["tech"], enabled=False)
+    pool.start()
+    assert pool.take("tech") is None
+    pool.stop()
@@ -0,0 +1,115 @@
+"""Tests for the shared local generation fallback."""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from chains.local_fallback import LocalGenerationService
+
+
+class FakePipe:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, prompts, **kwargs):
+        self.calls.append(list(prompts))
+        return [[{"generated_text": f"out:{p}"}] for p in prompts]
+
+
+def test_loads_once_and_batches_concurrent_requests():
+    """Concurrent callers share one load and are generated in a single batch."""
+    pipe = FakePipe()
+    loads = []
+    lock = threading.Lock()
+
+    def loader(name):
+        with lock:
+            loads.append(name)
+        return pipe
+
+    service = LocalGenerationService(enabled=True, use_process=False, batch_window=0.2, max_batch=8, loader=loader)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(service.generate, ["a", "b", "c", "d"]))
+
+    assert results == ["out:a", "out:b", "out:c", "out:d"]
+    assert len(loads) == 1
+    assert len(pipe.calls) < 4
+
+
+def test_failed_load_is_negative_cached():
+    """A failing loader is not retried within the retry window and the primary error is re-raised."""
+    attempts = []
+
+    def loader(name):
+        attempts.append(name)
+        raise ImportError("no transformers")
+
+    service = LocalGenerationService(enabled=True, use_process=False, retry_after=600, loader=loader)
+    primary = ConnectionError("ollama down")
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            service.generate_or_raise("prompt", primary)
+    assert len(attempts) == 1
+
+
+def test_disabled_service_is_unavailable():
+    """LOCAL_GEN_ENABLED=false disables the fallback without loading anything."""
+    service = LocalGenerationService(enabled=False, loader=lambda name: pytest.fail("should not load"))
+    assert service.available() is False
+
+
+class DyingPipe:
+    """Pipeline whose first generation kills the worker process, like an OOM kill would."""
+
+    def __call__(self, prompts, **kwargs):
+        os._exit(1)
+
+
+def load_dying_pipe(name):
+    return DyingPipe()
+
+
+def test_dead_worker_process_fails_pending_requests():
+    """Waits on the subprocess are bounded: a worker that dies fails its requests instead of hanging."""
+    dead_on_load = LocalGenerationService(enabled=True, use_process=True, timeout=30, loader=sys.exit)
+    assert dead_on_load.available() is False
+
+    service = LocalGenerationService(enabled=True, use_process=True, batch_window=0, timeout=30, loader=load_dying_pipe)
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="exited"):
+        service.generate("prompt")
+    assert time.monotonic() - started < 15
+    assert service.available() is False
+
+
+def test_locally_written_story_gets_no_image(monkeypatch):
+    """A story the local model wrote after Ollama failed is returned without an SDXL call."""
+    import main
+    from chains import final_story_chain
+    from chains.final_story_chain import FinalStoryChain
+    from langchain_core.runnables import RunnableLambda
+    from memory.session_memory import memory
+    from schemas import Article
+
+    def ollama_down(_):
+        raise ConnectionError("ollama down")
+
+    image_calls = []
+    local = LocalGenerationService(enabled=True, use_process=False, batch_window=0, loader=lambda name: FakePipe())
+    monkeypatch.setattr(final_story_chain, "local_generator", local)
+    monkeypatch.setattr(main, "final_chain", FinalStoryChain(llm=RunnableLambda(ollama_down)))
+    monkeypatch.setattr(main.image_chain, "generate", lambda *a, **k: image_calls.append(1))
+    monkeypatch.setenv("GEN_MAX_RETRIES", "1")
+
+    state = memory.get("local-story")
+    state.articles = [Article(title="Title", content="Content")]
+    state.selected_article_index = 0
+    state.continuation_options = ["A twist"]
+    state.selected_continuation_index = 0
+    memory.set("local-story", state)
+
+    story, image = main.generate_final_and_image("local-story")
+    memory.delete("local-story")
+    assert story.startswith("out:")
+    assert image is None and image_calls == []
@@ -0,0 +1,81 @@
+"""Tests for the Prometheus metrics endpoint."""
+import threading
+
+import main
+from app import create_dash_app
+from memory.session_memory import SessionMemory, memory
+from observability.metrics import Counter, Histogram, fallbacks, registry, step_duration
+from schemas import Article, SessionState
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative and end with +Inf, followed by sum and count."""
+    h = Histogram("demo_seconds", "Demo", labels=("step",), buckets=(0.1, 1.0))
+    h.observe(0.05, "titles")
+    h.observe(0.5, "titles")
+    h.observe(5.0, "titles")
+    lines = h.render()
+    assert 'demo_seconds_bucket{step="titles",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{step="titles",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{step="titles",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{step="titles"} 5.55' in lines
+    assert 'demo_seconds_count{step="titles"} 3' in lines
+
+
+def test_counter_labels_are_escaped():
+    """Label values are quoted and escaped."""
+    c = Counter("demo_total", "Demo", labels=("step",))
+    c.inc('say "hi"')
+    assert 'demo_total{step="say \\"hi\\""} 1' in c.render()
+
+
+def test_session_bytes_follow_writes():
+    """approx_bytes tracks set/delete without recomputing over the store."""
+    mem = SessionMemory()
+    state = SessionState(final_story="x" * 1000)
+    mem.set("a", state)
+    assert len(mem) == 1 and mem.approx_bytes == state.estimated_size()
+    mem.get("b")
+    assert mem.approx_bytes == state.estimated_size() + SessionState().estimated_size()
+    mem.delete("a")
+    mem.delete("b")
+    assert len(mem) == 0 and mem.approx_bytes == 0
+
+
+def test_scrape_does_not_take_session_lock():
+    """Rendering finishes while another thread holds the session lock."""
+    out = []
+    with memory._lock:
+        t = threading.Thread(target=lambda: out.append(registry.render()), daemon=True)
+        t.start()
+        t.join(timeout=5)
+    assert out and "fakenews_active_sessions" in out[0]
+
+
+def test_titles_fallback_is_counted(monkeypatch):
+    """A failed title generation records the step duration and a fallback."""
+    class Broken:
+        def generate(self, articles):
+            raise RuntimeError("ollama down")
+
+    monkeypatch.setattr(main, "title_chain", Broken())
+    sid = "metrics-fallback"
+    memory.set(sid, SessionState(articles=[Article(title="A headline")]))
+    before = fallbacks.value("titles")
+    try:
+        main.generate_titles_for_session(sid)
+    finally:
+        memory.delete(sid)
+    assert fallbacks.value("titles") == before + 1
+    assert 'fakenews_step_duration_seconds_count{step="titles",outcome="ok"}' in "\n".join(step_duration.render())
+
+
+def test_metrics_route():
+    """/metrics serves the Prometheus text format."""
+    client = create_dash_app().server.test_client()
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    body = resp.get_data(as_text=True)
+    assert "# TYPE fakenews_step_duration_seconds histogram" in body
+    assert "fakenews_session_bytes" in body and "fakenews_ollama_up" in body
@@ -0,0 +1,41 @@
+"""Tests for model routing tiers."""
+import json
+from chains.model_routing import ModelRoute, ModelRouter
+
+
+def test_default_routes_cover_all_chains():
+    """Every chain has a route and stories keep the large model."""
+    router = ModelRouter()
+    for name in ("title", "continuation", "image", "story"):
+        assert isinstance(router.route(name), ModelRoute)
+    assert router.route("story").num_predict >= router.route("title").num_predict
+
+
+def test_overload_downgrades_and_recovers():
+    """High time-to-first-token switches stories to the small model until latency drops."""
+    routes = {
+        "title": ModelRoute("small", 0.7, 100),
+        "story": ModelRoute("large", 0.9, 1000),
+    }
+    router = ModelRouter(routes=routes, overload_ttft=2.0, smoothing=1.0)
+    assert router.route("story").model == "large"
+
+    router.observe_ttft(5.0)
+    assert router.overloaded
+    assert router.route("story").model == "small"
+    assert router.get_stats()["downgraded_calls"] == 1
+
+    router.observe_ttft(0.5)
+    assert not router.overloaded
+    assert router.route("story").model == "large"
+
+
+def test_routes_from_env(monkeypatch):
+    """MODEL_ROUTES overrides individual fields and the overload table."""
+    monkeypatch.setenv(
+        "MODEL_ROUTES",
+        json.dumps({"title": {"model": "tiny", "num_predict": 64}, "overload": {"story": {"num_predict": 300}}}),
+    )
+    router = ModelRouter.from_env()
+    assert router.route("title") == ModelRoute("tiny", 0.7, 64)
+    assert router.overload_routes["story"].num_predict == 300
@@ -0,0 +1,77 @@
+"""Bulk NewsAPI ingestion against a local fake NewsAPI server."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from tools.article_store import SQLiteArticleStore
+from tools.news_tool import NewsTool
+from tools.rate_limiter import QuotaExceededError, RateLimiter
+
+
+@pytest.fixture
+def fake_newsapi():
+    """Serves 3 articles per category/page; the 'shared' article appears in every category."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            query = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            requests_seen.append(query)
+            category, page = query["category"], query["page"]
+            articles = [
+                {"title": f"{category} {page} {i}", "description": "<b>desc</b>", "content": "body", "url": f"https://news.test/{category}/{page}/{i}"}
+                for i in range(2)
+            ]
+            articles.append({"title": "Shared story", "description": "d", "content": "c", "url": "https://news.test/shared"})
+            payload = json.dumps({"status": "ok", "articles": articles}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v2/top-headlines", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_bulk_dedupes_and_stores(fake_newsapi):
+    """Every category/page is fetched once, shared URLs are kept once and stored."""
+    url, seen = fake_newsapi
+    store = SQLiteArticleStore()
+    tool = NewsTool(api_key="k", base_url=url, store=store, rate_limiter=RateLimiter(rate=1000, burst=100))
+    result = tool.fetch_bulk(["business", "sports"], pages=[1, 2], max_workers=4)
+
+    assert len(seen) == 4
+    titles = [a.title for articles in result.values() for a in articles]
+    assert titles.count("Shared story") == 1
+    assert "Shared story" in [a.title for a in result["business"]]
+    assert len(result["sports"]) == 4
+    assert len(store) == 9
+    assert result["business"][0].description == "desc"
+
+
+def test_rate_limiter_spaces_requests():
+    """Beyond the burst, requests wait for tokens at the configured rate."""
+    limiter = RateLimiter(rate=20, burst=1)
+    start = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+
+def test_daily_quota_is_enforced(fake_newsapi):
+    """Once the daily quota is used up, fetches fail without contacting NewsAPI."""
+    url, seen = fake_newsapi
+    tool = NewsTool(api_key="k", base_url=url, rate_limiter=RateLimiter(rate=1000, burst=10, daily_quota=1))
+    tool.fetch_page("general")
+    with pytest.raises(QuotaExceededError):
+        tool.fetch_page("general")
+    assert len(seen) == 1
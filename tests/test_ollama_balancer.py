@@ -0,0 +1,136 @@
+"""Tests for the multi-backend Ollama balancer using local stub servers."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from chains.circuit_breaker import CircuitBreaker, http_probe
+from chains.model_routing import ModelRoute, ModelRouter
+from chains.ollama_balancer import NoHealthyBackendError, OllamaBalancer
+from chains.ollama_client import RoutedChatOllama
+from chains.request_context import session_scope
+
+
+def start_stub(name):
+    """Minimal Ollama stand-in answering /api/version and streaming /api/chat replies."""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, payload):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._send(b'{"version": "stub"}')
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            hits.append(self.path)
+            lines = [
+                {"message": {"role": "assistant", "content": name}, "done": False},
+                {"message": {"role": "assistant", "content": ""}, "done": True, "eval_count": 1},
+            ]
+            self._send("".join(json.dumps(line) + "\n" for line in lines).encode())
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", hits
+
+
+@pytest.fixture
+def stubs():
+    servers = [start_stub(name) for name in ("a", "b")]
+    yield servers
+    for server, _, _ in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_llm(balancer):
+    router = ModelRouter(routes={"story": ModelRoute("stub", 0.5, 10)})
+    return RoutedChatOllama("story", router=router, breaker=CircuitBreaker(enabled=False), balancer=balancer)
+
+
+def test_least_outstanding_and_affinity(stubs):
+    """Idle backends share the load; a session keeps hitting the same backend."""
+    balancer = OllamaBalancer([url for _, url, _ in stubs], probe_interval=0)
+    first = balancer.acquire("s1")
+    second = balancer.acquire("s2")
+    assert first is not second
+    balancer.release(first, True, 0.1)
+    balancer.release(second, True, 0.1)
+    assert balancer.acquire("s1") is first
+
+
+def test_routes_calls_through_stub_servers(stubs):
+    """RoutedChatOllama sends each session's calls to its sticky backend."""
+    balancer = OllamaBalancer([url for _, url, _ in stubs], probe_interval=0)
+    llm = make_llm(balancer)
+
+    @session_scope
+    def call(session_id):
+        return llm.invoke("hello").content
+
+    replies = {sid: {call(sid) for _ in range(3)} for sid in ("s1", "s2")}
+    assert all(len(r) == 1 for r in replies.values())
+    assert replies["s1"] != replies["s2"]
+    stats = balancer.get_stats()
+    assert sum(s["requests"] for s in stats.values()) == 6
+    assert all(s["in_flight"] == 0 for s in stats.values())
+
+
+def test_unhealthy_backend_is_removed_and_restored(stubs):
+    """A failing node is skipped until its health probe succeeds again."""
+    (server_a, url_a, hits_a), (_, url_b, hits_b) = stubs
+    server_a.shutdown()
+    server_a.server_close()
+    balancer = OllamaBalancer([url_a, url_b], probe=http_probe, probe_interval=0)
+    llm = make_llm(balancer)
+    for _ in range(balancer.eject_after):
+        assert balancer.get_stats()[url_a]["healthy"] is True
+        with pytest.raises(Exception):
+            # Least-outstanding picks the first (dead) node on a tie
+            llm.invoke("hello")
+    assert balancer.get_stats()[url_a]["healthy"] is False
+    assert llm.invoke("hello").content == "b"
+
+    balancer.backends[1].healthy = False
+    with pytest.raises(NoHealthyBackendError):
+        balancer.acquire()
+    assert balancer.any_healthy() is True
+    balancer._probe_backend(balancer.backends[1])
+    assert balancer.get_stats()[url_b]["healthy"] is True
+
+
+def test_only_connection_errors_eject_and_never_the_last_backend():
+    """Timeouts and server errors keep a backend in rotation; the last healthy one is never ejected."""
+    balancer = OllamaBalancer(["http://a", "http://b"], probe_interval=0, eject_after=2)
+    a, b = balancer.backends
+
+    def fail(backend, error):
+        backend.in_flight += 1
+        balancer.release(backend, False, 0.1, error)
+
+    for error in (requests.exceptions.ReadTimeout(), ValueError("model not found"), requests.exceptions.ConnectionError()):
+        fail(a, error)
+    assert a.healthy and a.consecutive_failures == 1
+    fail(a, requests.exceptions.ConnectionError())
+    assert not a.healthy
+
+    for _ in range(5):
+        fail(b, requests.exceptions.ConnectionError())
+    assert b.healthy
+
+
+def test_failed_breaker_probe_does_not_eject():
+    """The circuit breaker's probe only reads health: one failed probe leaves a one-backend pool usable."""
+    balancer = OllamaBalancer(["http://a"], probe=lambda url: False, probe_interval=0)
+    assert balancer.any_healthy() is False
+    backend = balancer.acquire()
+    assert backend.healthy
+    balancer.release(backend, True, 0.1)
@@ -0,0 +1,124 @@
+"""Tests for the Ollama-compatible stub server."""
+import json
+import time
+
+import pytest
+import requests
+
+from chains.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker, CircuitOpenError
+from chains.deadline import DeadlineExceeded
+from chains.model_routing import ModelRoute, ModelRouter
+from chains.ollama_balancer import OllamaBalancer
+from chains.ollama_client import RoutedChatOllama
+from chains.title_chain import TitleChain
+from schemas import Article
+from tools.ollama_stub import OllamaStub, apply_options
+
+
+@pytest.fixture
+def stub():
+    with OllamaStub(seed=1) as s:
+        yield s
+
+
+def make_llm(url, chain="title", breaker=None):
+    router = ModelRouter(routes={chain: ModelRoute("stub", 0.5, 0), "story": ModelRoute("stub", 0.5, 0)})
+    return RoutedChatOllama(
+        chain,
+        router=router,
+        breaker=breaker or CircuitBreaker(enabled=False),
+        balancer=OllamaBalancer([url], probe_interval=0),
+    )
+
+
+def test_apply_options_honours_stop_and_num_predict():
+    """Replies end before the stop sequence and after num_predict pieces."""
+    assert "".join(apply_options('{"a": 1} trailing', {"stop": ["}"]})) == '{"a": 1'
+    assert len(apply_options("one two three four", {"num_predict": 2})) == 2
+
+
+def test_title_chain_against_stub(stub):
+    """The streamed canned reply parses into three titles."""
+    chain = TitleChain(llm=make_llm(stub.url))
+    out = chain.generate([Article(title=f"Headline {i}") for i in range(3)])
+    assert len(out.titles) == 3
+    assert stub.stats["completed"] == 1
+
+
+def test_stream_lines_and_ttft(stub):
+    """Streaming sends one NDJSON line per piece after the time to first token."""
+    stub.configure(ttft=0.2, tokens_per_second=5000)
+    start = time.monotonic()
+    resp = requests.post(f"{stub.url}/api/generate", json={"model": "m", "prompt": "write"}, stream=True)
+    lines = [json.loads(line) for line in resp.iter_lines() if line]
+    assert time.monotonic() - start >= 0.2
+    assert len(lines) > 10 and lines[-1]["done"] is True
+    assert lines[-1]["eval_count"] == len(lines) - 1
+    assert "".join(line["response"] for line in lines).startswith("Paragraph 1:")
+
+
+def test_prompt_cache_counts_only_new_tokens(stub):
+    """A repeated prompt prefix is not evaluated again."""
+    def eval_count(prompt):
+        body = {"model": "m", "prompt": prompt, "stream": False}
+        return requests.post(f"{stub.url}/api/generate", json=body).json()["prompt_eval_count"]
+
+    assert eval_count("shared prefix one") == 3
+    assert eval_count("shared prefix two") == 1
+
+
+def test_injected_failures_open_the_circuit(stub):
+    """HTTP 500s from the stub count as failures and open the breaker."""
+    stub.configure(failure_rate=1.0)
+    llm = make_llm(stub.url, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    for _ in range(2):
+        # Server errors leave the backend in the balancer's rotation; only the breaker reacts
+        with pytest.raises(ValueError, match="status code 500"):
+            llm.invoke("hello")
+    with pytest.raises(CircuitOpenError):
+        llm.invoke("hello")
+    assert stub.stats["failed"] == 2
+
+
+def test_read_timeout_mid_stream_is_a_deadline(stub, monkeypatch):
+    """A budget expiring before or between slow tokens raises DeadlineExceeded and never ejects the backend."""
+    monkeypatch.setenv("GEN_TIMEOUT_TITLE", "1")
+    stub.configure(ttft=0.1, tokens_per_second=0.4)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    llm = make_llm(stub.url, breaker=breaker)
+    llm.balancer.eject_after = 1
+    with pytest.raises(DeadlineExceeded):
+        llm.invoke("hello")
+    assert breaker.state == CLOSED
+    assert llm.balancer.backends[0].healthy
+
+    # No first byte within the budget either: still a deadline, and still no ejection
+    stub.configure(ttft=1.5)
+    with pytest.raises(DeadlineExceeded):
+        llm.invoke("hello")
+    assert llm.balancer.backends[0].healthy
+
+
+def test_abandoned_stream_settles_half_open_trial(stub):
+    """Closing stream() early during the half-open trial closes the circuit instead of wedging it."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    llm = make_llm(stub.url, breaker=breaker)
+    stub.configure(failure_rate=1.0)
+    with pytest.raises(ValueError):
+        llm.invoke("hello")
+    assert breaker.state == HALF_OPEN
+
+    stub.configure(failure_rate=0.0)
+    chunks = llm.stream("hello")
+    next(chunks)
+    chunks.close()
+    assert breaker.state == CLOSED
+    assert llm.invoke("hello").content
+
+
+def test_runtime_config_and_down(stub):
+    """POST /_stub/config changes settings; a down stub fails the health probe."""
+    resp = requests.post(f"{stub.url}/_stub/config", json={"down": True})
+    assert resp.json()["down"] is True
+    assert requests.get(f"{stub.url}/api/version").status_code == 503
+    assert requests.post(f"{stub.url}/_stub/config", json={"bogus": 1}).status_code == 400
@@ -0,0 +1,84 @@
+"""Tests for the opt-in profiling hooks."""
+import os
+import pstats
+import tracemalloc
+
+import pytest
+
+from app import create_dash_app
+from observability import profiling
+from observability.profiling import Profiler, profiled
+
+
+@pytest.fixture
+def profile_dir(monkeypatch, tmp_path):
+    def configure(**kwargs):
+        monkeypatch.setattr(profiling, "profiler", Profiler(directory=str(tmp_path), **kwargs))
+        return tmp_path
+
+    return configure
+
+
+@profiled("demo.step", session_arg=0)
+def _work(session_id, n=2000):
+    return sum(i * i for i in range(n))
+
+
+def test_disabled_profiler_writes_nothing(profile_dir):
+    """With no trigger configured the call runs untouched."""
+    directory = profile_dir()
+    assert _work("s1") == sum(i * i for i in range(2000))
+    assert os.listdir(directory) == []
+
+
+def test_sampled_call_dumps_cprofile(profile_dir):
+    """A sampled call writes a pstats file named after the step and session."""
+    directory = profile_dir(sample_rate=1.0)
+    _work("sess-42")
+    (name,) = os.listdir(directory)
+    assert name.endswith("_demo.step_sess-42.prof")
+    assert pstats.Stats(str(directory / name)).total_calls > 0
+
+
+def test_nested_calls_share_one_profile(profile_dir):
+    """Profiled calls inside a running profile do not start their own."""
+    directory = profile_dir(sample_rate=1.0)
+
+    @profiled("outer")
+    def outer():
+        return _work("inner")
+
+    outer()
+    (name,) = os.listdir(directory)
+    assert "_outer_" in name
+
+
+def test_header_triggers_request_profile(profile_dir):
+    """X-Profile only profiles that request, and only when allowed."""
+    directory = profile_dir(allow_header=True)
+    server = create_dash_app().server
+
+    @server.route("/_test/profiled")
+    def profiled_view():
+        return str(_work("http"))
+
+    client = server.test_client()
+    client.get("/_test/profiled")
+    assert os.listdir(directory) == []
+    client.get("/_test/profiled", headers={"X-Profile": "1"})
+    assert len(os.listdir(directory)) == 1
+
+
+def test_tracemalloc_endpoint(profile_dir):
+    """The snapshot route is off unless tracemalloc is tracing."""
+    directory = profile_dir()
+    client = create_dash_app().server.test_client()
+    assert client.get("/debug/tracemalloc").status_code == 404
+    tracemalloc.start()
+    try:
+        resp = client.get("/debug/tracemalloc?limit=5")
+    finally:
+        tracemalloc.stop()
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True).startswith("# snapshot:")
+    assert any(n.endswith(".snapshot") for n in os.listdir(directory))
@@ -3,6 +3,7 @@ import pytest
 import time
 from datetime import datetime, timedelta
 from memory.session_memory import SessionMemory, SessionState
+from schemas import Article
 
 
 def test_session_memory_init():
@@ -121,3 +122,20 @@ def test_manual_cleanup():
     cleaned = memory.cleanup_now()
     assert cleaned == 2
     assert len(memory._store) == 0
+
+
+def test_article_payload_is_cached_and_json_ready():
+    """payload has string URLs, excludes the preview and is computed once."""
+    article = Article(title="T", url="https://example.com/a", preview="p")
+    assert article.payload == {"title": "T", "description": None, "content": None, "image_url": None, "url": "https://example.com/a"}
+    assert article.payload is article.payload
+
+
+def test_stats_size_grows_with_session_content():
+    """The memory estimate accounts for articles and generated text."""
+    memory = SessionMemory()
+    state = memory.get("s")
+    empty = memory.get_stats()["estimated_memory_bytes"]
+    state.articles = [Article(title="Headline", content="x" * 1000)]
+    state.final_story = "y" * 500
+    assert memory.get_stats()["estimated_memory_bytes"] >= empty + 1500
@@ -0,0 +1,56 @@
+"""Tests for the binary session snapshot codec."""
+import base64
+import io
+
+import msgpack
+import pytest
+from PIL import Image
+
+from memory import snapshot
+from memory.snapshot import CODEC_ZLIB, CODEC_ZSTD, SnapshotError, decode_session, encode_session
+from schemas import Article, SessionState
+
+
+def _session():
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 30, 30)).save(buf, format="PNG")
+    return SessionState(
+        articles=[
+            Article(title="Storm hits coast", content="Body " * 50, url="https://example.com/a", preview="Body"),
+            Article(title="No URL"),
+        ],
+        titles=["A", "B", "C"],
+        title_to_article_map=[0, 1, 0],
+        selected_article_index=0,
+        continuation_options=["one", "two", "three"],
+        selected_continuation_index=2,
+        final_story="Paragraph one.\n\nParagraph two.",
+        image_base64=base64.b64encode(buf.getvalue()).decode("ascii"),
+        session_name="Storm",
+    )
+
+
+@pytest.mark.parametrize("codec", [CODEC_ZLIB, CODEC_ZSTD])
+def test_round_trip(codec):
+    """Every field survives encode/decode with either codec."""
+    if codec == CODEC_ZSTD and snapshot.zstandard is None:
+        pytest.skip("zstandard not installed")
+    state = _session()
+    restored = decode_session(encode_session(state, codec=codec))
+    assert restored.model_dump() == state.model_dump()
+
+
+def test_snapshot_is_smaller_than_json():
+    """The image is stored as raw bytes and text is compressed."""
+    state = _session()
+    assert len(encode_session(state)) < len(state.model_dump_json())
+
+
+def test_rejects_unknown_version_and_garbage():
+    """Snapshots from another version or non-snapshots raise SnapshotError."""
+    outer = msgpack.unpackb(encode_session(_session()), raw=False)
+    outer["v"] = 99
+    with pytest.raises(SnapshotError):
+        decode_session(msgpack.packb(outer, use_bin_type=True))
+    with pytest.raises(SnapshotError):
+        decode_session(b"not a snapshot")
@@ -0,0 +1,26 @@
+"""Tests for ingest-time article normalization."""
+from tools.text_normalize import normalize_article, normalize_text
+
+
+def test_normalize_text_single_pass():
+    """Tags, entities, the truncation marker and extra whitespace are removed."""
+    raw = "<p>Mayor &amp; council\r\n  agree</p>  on&nbsp;budget… [+2345 chars]"
+    assert normalize_text(raw) == "Mayor & council agree on budget"
+    assert normalize_text(None) == ""
+    assert normalize_text("Costs rose [+5%]") == "Costs rose [+5%]"
+
+
+def test_normalize_article_sets_preview():
+    """The preview is computed at ingest and falls back to the description."""
+    article = normalize_article({
+        "title": "Storm &quot;Ana&quot; - Outlet",
+        "description": "<b>Short</b> summary",
+        "content": None,
+        "url": "https://example.com/a",
+    })
+    assert article.title == 'Storm "Ana" - Outlet'
+    assert article.content == article.description == "Short summary"
+    assert article.preview == "Short summary"
+
+    long_article = normalize_article({"title": "T", "content": "word " * 200})
+    assert long_article.preview.endswith("...") and len(long_article.preview) == 503
@@ -0,0 +1,73 @@
+"""Tests for tracing spans."""
+import json
+
+import pytest
+
+from chains.request_context import session_scope
+from observability import tracing
+from observability.tracing import JsonFileExporter, OtlpHttpExporter, span
+
+
+class _Collect:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, s):
+        self.spans.append(s)
+
+
+@pytest.fixture
+def collected(monkeypatch):
+    exporter = _Collect()
+    monkeypatch.setattr(tracing.tracer, "exporter", exporter)
+    return exporter.spans
+
+
+def test_spans_nest_and_carry_session_and_attempt(collected):
+    """Children share the trace, point at their parent and inherit the attempt number."""
+    @session_scope
+    def step(session_id):
+        with span("step"):
+            with span("attempt", attempt=2):
+                with span("llm.call", chain="title") as s:
+                    s.set_attribute("llm.completion_tokens", 5)
+
+    step("sess-1")
+    llm, attempt, root = collected
+    assert [s.name for s in collected] == ["llm.call", "attempt", "step"]
+    assert llm.trace_id == root.trace_id and llm.parent_id == attempt.span_id
+    assert llm.attributes == {"attempt": 2, "session_id": "sess-1", "chain": "title", "llm.completion_tokens": 5}
+
+
+def test_errors_are_recorded_and_reraised(collected):
+    """An exception marks the span as failed and still propagates."""
+    with pytest.raises(ValueError):
+        with span("parse"):
+            raise ValueError("bad json")
+    assert collected[0].to_dict()["status"] == "error"
+    assert collected[0].error["exception.type"] == "ValueError"
+
+
+def test_disabled_tracer_is_noop(monkeypatch):
+    """Without an exporter spans are not created."""
+    monkeypatch.setattr(tracing.tracer, "exporter", None)
+    with span("x") as s:
+        s.set_attribute("k", 1)
+        assert tracing.current_span() is s
+
+
+def test_json_file_exporter_and_otlp_payload(tmp_path, collected):
+    """Spans are written as JSON lines and convert to OTLP JSON."""
+    with span("session.write"):
+        pass
+    exporter = JsonFileExporter(str(tmp_path / "traces.jsonl"), flush_interval=60)
+    exporter.export(collected[0])
+    exporter.shutdown()
+    line = json.loads((tmp_path / "traces.jsonl").read_text())
+    assert line["name"] == "session.write" and line["status"] == "ok"
+
+    otlp = OtlpHttpExporter("http://127.0.0.1:9", flush_interval=60)
+    payload = otlp.payload(collected)
+    otlp.shutdown()
+    span_json = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span_json["name"] == "session.write" and len(span_json["spanId"]) == 16
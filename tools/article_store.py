@@ -0,0 +1,154 @@
+import os
+import time
+import sqlite3
+from threading import Lock
+from typing import Any, List, Optional
+from schemas import Article
+from tools.text_normalize import preview_text
+
+
+def article_key(article: Article) -> str:
+    """Identity used for de-duplication: the article URL, or its title when there is none."""
+    return str(article.url) if article.url else f"title:{article.title}"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    category TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT,
+    content TEXT,
+    url TEXT,
+    image_url TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_category_fetched ON articles (category, fetched_at DESC);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts(rowid, title, description, content) VALUES (new.id, new.title, new.description, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, description, content) VALUES ('delete', old.id, old.title, old.description, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE OF title, description, content ON articles BEGIN
+    INSERT INTO articles_fts(articles_fts, rowid, title, description, content) VALUES ('delete', old.id, old.title, old.description, old.content);
+    INSERT INTO articles_fts(rowid, title, description, content) VALUES (new.id, new.title, new.description, new.content);
+END;
+"""
+
+
+class SQLiteArticleStore:
+    """Persistent article repository (SQLite + FTS5) that NewsTool writes on every fetch.
+
+    It lets the app serve headlines without NewsAPI (offline, rate limited) and lets
+    load tests replay a realistic article set. Queries filter by category, recency
+    (`since`, a UNIX timestamp) and full-text keyword.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+
+    def add(self, articles: List[Article], category: str) -> int:
+        """Insert new articles and refresh `fetched_at` of known ones; returns how many were new."""
+        now = time.time()
+        rows = [
+            (
+                article_key(a),
+                category,
+                a.title,
+                a.description,
+                a.content,
+                str(a.url) if a.url else None,
+                str(a.image_url) if a.image_url else None,
+                now,
+            )
+            for a in articles
+        ]
+        with self._lock, self._conn:
+            cur = self._conn.executemany(
+                "INSERT OR IGNORE INTO articles (key, category, title, description, content, url, image_url, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            added = cur.rowcount
+            self._conn.executemany("UPDATE articles SET fetched_at = ? WHERE key = ?", [(now, r[0]) for r in rows])
+        return added
+
+    @staticmethod
+    def _to_article(row) -> Article:
+        return Article(
+            title=row["title"],
+            description=row["description"],
+            content=row["content"],
+            url=row["url"],
+            image_url=row["image_url"],
+            preview=preview_text(row["content"] or row["description"] or ""),
+        )
+
+    def get(self, url: str) -> Optional[Article]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM articles WHERE key = ?", (url,)).fetchone()
+        return self._to_article(row) if row else None
+
+    def query(self, category: Optional[str] = None, since: Optional[float] = None, keyword: Optional[str] = None, limit: int = 20) -> List[Article]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        sql = "SELECT a.* FROM articles a"
+        if keyword:
+            sql += " JOIN articles_fts f ON f.rowid = a.id"
+            clauses.append("articles_fts MATCH ?")
+            # Quote each term so user input cannot inject FTS query syntax
+            params.append(" ".join('"' + term.replace('"', '""') + '"' for term in keyword.split()))
+        if category:
+            clauses.append("a.category = ?")
+            params.append(category)
+        if since is not None:
+            clauses.append("a.fetched_at >= ?")
+            params.append(since)
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY " + ("bm25(articles_fts), " if keyword else "") + "a.fetched_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_article(r) for r in rows]
+
+    def by_category(self, category: str, limit: int = 20) -> List[Article]:
+        return self.query(category=category, limit=limit)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_store = None
+_default_store_lock = Lock()
+
+
+def default_store() -> SQLiteArticleStore:
+    """Process-wide store at ARTICLE_STORE_PATH (default data/articles.db)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SQLiteArticleStore(os.getenv("ARTICLE_STORE_PATH", os.path.join("data", "articles.db")))
+        return _default_store
+
+
+__all__ = ["SQLiteArticleStore", "article_key", "default_store"]
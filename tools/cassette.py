@@ -0,0 +1,160 @@
+"""Record/replay of LLM and NewsAPI traffic for reproducible performance runs.
+
+CASSETTE_MODE selects the behaviour:
+
+- `off` (default): calls go straight through
+- `record`: every chain's rendered prompt and reply (`run_prompt`) and every NewsTool
+  HTTP response is appended to CASSETTE_PATH together with its observed latency
+- `replay`: recorded replies are served from CASSETTE_PATH instead of calling Ollama
+  or NewsAPI, after sleeping the recorded latency times CASSETTE_LATENCY_SCALE
+  (`0` replays instantly)
+
+Interactions are matched on their exact request first (chain + prompt text, or URL +
+query parameters). Prompts and NewsAPI pages vary from run to run (headlines are
+shuffled, the page is random), so without an exact match the next recording of the
+same chain or endpoint is served in recorded order. CASSETTE_STRICT=true turns a
+missing exact match into a CassetteMissError instead. The NewsAPI key is never written.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, DefaultDict, Dict, Optional, Tuple
+
+import requests
+
+from chains.request_context import current_session_id
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+_SECRET_PARAMS = ("apiKey",)
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when the cassette has no recording for a request."""
+
+
+def _key(kind: str, name: str, request) -> str:
+    raw = json.dumps([kind, name, request], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    def __init__(self, path: str = "cassettes/cassette.jsonl", mode: str = OFF, latency_scale: float = 1.0,
+                 strict: bool = False):
+        if mode not in (OFF, RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._exact: Dict[str, deque] = {}
+        self._in_order: Dict[Tuple[str, str], deque] = {}
+        self._loaded = False
+
+    @classmethod
+    def from_env(cls) -> "Cassette":
+        return cls(
+            path=os.getenv("CASSETTE_PATH", "cassettes/cassette.jsonl"),
+            mode=os.getenv("CASSETTE_MODE", OFF).lower(),
+            latency_scale=float(os.getenv("CASSETTE_LATENCY_SCALE", "1.0")),
+            strict=os.getenv("CASSETTE_STRICT", "false").lower() in ("1", "true", "yes"),
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load(self) -> None:
+        exact: DefaultDict[str, deque] = defaultdict(deque)
+        in_order: DefaultDict[Tuple[str, str], deque] = defaultdict(deque)
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                exact[entry["key"]].append(entry)
+                in_order[(entry["kind"], entry["name"])].append(entry)
+        self._exact, self._in_order = dict(exact), dict(in_order)
+        self._loaded = True
+        print(f"[Cassette] Replaying {sum(len(q) for q in self._exact.values())} interaction(s) from {self.path}")
+
+    @staticmethod
+    def _take(entries: Optional[deque]):
+        # Consume recordings in order; the last one keeps answering repeats
+        if not entries:
+            return None
+        return entries.popleft() if len(entries) > 1 else entries[0]
+
+    def _lookup(self, kind: str, name: str, request) -> dict:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._take(self._exact.get(_key(kind, name, request)))
+            if entry is None and not self.strict:
+                entry = self._take(self._in_order.get((kind, name)))
+        if entry is None:
+            raise CassetteMissError(f"No recorded {kind} interaction for {name!r} in {self.path}")
+        if entry["latency"] and self.latency_scale:
+            time.sleep(entry["latency"] * self.latency_scale)
+        return entry
+
+    def _append(self, kind: str, name: str, request, response, latency: float) -> None:
+        entry = {
+            "kind": kind,
+            "name": name,
+            "key": _key(kind, name, request),
+            "session_id": current_session_id(),
+            "latency": round(latency, 6),
+            "request": request,
+            "response": response,
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def llm(self, chain_name: str, prompt_text: str, call: Callable[[], Tuple[str, dict]]) -> Tuple[str, dict]:
+        """(reply text, response metadata) for a rendered prompt, recorded or replayed."""
+        if self.mode == REPLAY:
+            response = self._lookup("llm", chain_name, prompt_text)["response"]
+            return response["content"], response.get("metadata", {})
+        start = time.perf_counter()
+        content, metadata = call()
+        if self.mode == RECORD:
+            self._append("llm", chain_name, prompt_text, {"content": content, "metadata": metadata},
+                         time.perf_counter() - start)
+        return content, metadata
+
+    def http_get(self, session: requests.Session, url: str, params: dict, timeout: float) -> requests.Response:
+        """`session.get(url, params=...)`, recorded or replayed; secrets are left out of the cassette."""
+        public = {k: v for k, v in params.items() if k not in _SECRET_PARAMS}
+        if self.mode == REPLAY:
+            recorded = self._lookup("http", url, public)["response"]
+            resp = requests.Response()
+            resp.status_code = recorded["status"]
+            resp._content = recorded["body"].encode("utf-8")
+            resp.headers["Content-Type"] = recorded.get("content_type") or "application/json"
+            resp.encoding = "utf-8"
+            resp.url = url
+            return resp
+        start = time.perf_counter()
+        resp = session.get(url, params=params, timeout=timeout)
+        if self.mode == RECORD:
+            self._append("http", url, public, {
+                "status": resp.status_code,
+                "content_type": resp.headers.get("Content-Type"),
+                "body": resp.text,
+            }, time.perf_counter() - start)
+        return resp
+
+
+cassette = Cassette.from_env()
+
+
+__all__ = ["Cassette", "CassetteMissError", "cassette", "OFF", "RECORD", "REPLAY"]
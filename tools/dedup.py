@@ -0,0 +1,80 @@
+import os
+import re
+import zlib
+from typing import Iterable, List, Set
+
+import numpy as np
+
+from schemas import Article
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# NewsAPI titles usually end in " - Outlet"; the outlet differs between copies of the same story
+_SOURCE_SUFFIX = re.compile(r"\s+[-|–—]\s+[^-|–—]+$")
+# Prime above 2**32 so crc32 hashes (< 2**32) times coefficients (< 2**31) fit in uint64
+_PRIME = np.uint64(4294967311)
+
+
+def headline_shingles(article: Article) -> Set[str]:
+    """Word unigrams and bigrams of the headline, without the outlet suffix."""
+    title = _SOURCE_SUFFIX.sub("", article.title or "")
+    tokens = _TOKEN.findall(title.lower())
+    return set(tokens) | {f"{a} {b}" for a, b in zip(tokens, tokens[1:])}
+
+
+class HeadlineDeduplicator:
+    """Collapses near-duplicate headlines with MinHash signatures computed in NumPy.
+
+    Two articles whose estimated Jaccard similarity of headline shingles reaches
+    `threshold` are treated as the same story; the first one (NewsAPI order) is kept.
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 64, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2**31 - 1, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 2**31 - 1, size=num_perm, dtype=np.uint64)
+
+    @classmethod
+    def from_env(cls) -> "HeadlineDeduplicator":
+        return cls(threshold=float(os.getenv("HEADLINE_DEDUP_THRESHOLD", "0.5")))
+
+    def signatures(self, shingle_sets: Iterable[Set[str]]) -> np.ndarray:
+        """One row of `num_perm` min-hashes per shingle set (all-max for an empty set)."""
+        sets = list(shingle_sets)
+        sigs = np.full((len(sets), self.num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for i, shingles in enumerate(sets):
+            if not shingles:
+                continue
+            hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+            sigs[i] = ((hashes[:, None] * self._a + self._b) % _PRIME).min(axis=0)
+        return sigs
+
+    def similarity(self, articles: List[Article]) -> np.ndarray:
+        """Pairwise estimated Jaccard similarity; articles without headline words match nothing."""
+        sets = [headline_shingles(a) for a in articles]
+        sigs = self.signatures(sets)
+        sim = (sigs[:, None, :] == sigs[None, :, :]).mean(axis=2)
+        empty = np.array([not s for s in sets], dtype=bool)
+        sim[empty, :] = 0.0
+        sim[:, empty] = 0.0
+        return sim
+
+    def dedupe(self, articles: List[Article]) -> List[Article]:
+        if self.threshold <= 0 or len(articles) < 2:
+            return list(articles)
+        duplicate = self.similarity(articles) >= self.threshold
+        keep = np.zeros(len(articles), dtype=bool)
+        for i in range(len(articles)):
+            # Keep an article unless it duplicates one already kept
+            keep[i] = not duplicate[i, keep].any()
+        kept = [a for a, k in zip(articles, keep) if k]
+        if len(kept) < len(articles):
+            print(f"[Dedup] Collapsed {len(articles) - len(kept)} near-duplicate headline(s)")
+        return kept
+
+
+headline_dedup = HeadlineDeduplicator.from_env()
+
+
+__all__ = ["HeadlineDeduplicator", "headline_dedup", "headline_shingles"]
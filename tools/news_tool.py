@@ -1,9 +1,15 @@
 import os
 import requests
 import random
-import re
-from typing import List, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Union
 from schemas import Article
+from tools.cassette import cassette
+from tools.article_store import SQLiteArticleStore, article_key, default_store
+from tools.rate_limiter import QuotaExceededError, RateLimiter, newsapi_limiter
+from tools.text_normalize import normalize_article
+from observability.tracing import current_span, span
 
 def _get_news_api_key():
     # Accept several possible env names and sanitize the value
@@ -26,18 +32,40 @@ class NewsTool:
     BASE_URL = "https://newsapi.org/v2/top-headlines"
     CATEGORIES = ["business", "entertainment", "technology", "science", "sports", "health", "general"]
 
-    def __init__(self, api_key: Optional[str] = None, country: str = "us"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        country: str = "us",
+        base_url: Optional[str] = None,
+        store: Optional[SQLiteArticleStore] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        offline: Optional[bool] = None,
+    ):
         self.api_key = api_key or NEWS_API_KEY
         self.country = country
+        self.base_url: str = base_url or os.getenv("NEWSAPI_BASE_URL") or self.BASE_URL
+        # Defaults to the shared SQLite store so fetched articles survive restarts
+        self.store = store if store is not None else default_store()
+        self.rate_limiter = rate_limiter or newsapi_limiter
+        if offline is None:
+            offline = os.getenv("NEWS_OFFLINE", "false").lower() in ("1", "true", "yes")
+        self.offline = offline
+        # requests.Session keeps connections alive across pages/categories
+        self._session = requests.Session()
 
-    def fetch_top_headlines(self, category: str = "general", page_size: int = 10) -> List[Article]:
-        if not self.api_key:
+    def fetch_page(
+        self,
+        category: str = "general",
+        page: int = 1,
+        page_size: int = 10,
+        session: Optional[requests.Session] = None,
+    ) -> List[Article]:
+        """Fetch one page of top headlines for a category (rate limited) and record it in the store."""
+        if not self.api_key and not cassette.replaying:
             raise RuntimeError("NEWS_API_KEY not configured in environment")
 
-        # Use provided category, randomly select page to get varied results
-        page = random.randint(1, 3)  # NewsAPI free tier supports up to page 3
-
-        params = {
+        # The key is None when replaying a cassette; requests then leaves it out of the URL
+        params: Dict[str, Union[str, int, None]] = {
             "apiKey": self.api_key,
             "country": self.country,
             "category": category,
@@ -45,30 +73,110 @@ class NewsTool:
             "pageSize": page_size,
         }
 
-        resp = requests.get(self.BASE_URL, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
-        articles = []
-        for a in data.get("articles", []):
-            raw_content = a.get("content") or a.get("description") or ""
-            raw_description = a.get("description") or ""
-            
-            clean_content = re.sub(r'<[^>]+>', '', raw_content)
-            clean_description = re.sub(r'<[^>]+>', '', raw_description)
-            
-            article = Article(
-                title=a.get("title") or "",
-                description=clean_description if clean_description else None,
-                content=clean_content if clean_content else None,
-                image_url=a.get("urlToImage"),
-                url=a.get("url"),
-            )
-            articles.append(article)
+        with span("news.fetch", category=category, page=page) as s:
+            if not cassette.replaying:
+                # Replayed responses cost no NewsAPI quota
+                self.rate_limiter.acquire()
+            resp = cassette.http_get(session or self._session, self.base_url, params, timeout=10)
+            resp.raise_for_status()
+            data = resp.json()
+
+            articles = [normalize_article(a) for a in data.get("articles", [])]
+            s.set_attribute("articles", len(articles))
+        self.store.add(articles, category)
+        return articles
+
+    def fetch_top_headlines(self, category: str = "general", page_size: int = 10) -> List[Article]:
+        if self.offline:
+            articles = self._from_store(category, page_size)
+            if not articles:
+                raise RuntimeError(f"NEWS_OFFLINE is set but the article store has no '{category}' articles")
+            return articles
+
+        # Use provided category, randomly select page to get varied results
+        page = random.randint(1, 3)  # NewsAPI free tier supports up to page 3
+        try:
+            articles = self.fetch_page(category=category, page=page, page_size=page_size)
+        except (requests.RequestException, QuotaExceededError, RuntimeError) as e:
+            # Rate limited, out of quota, unconfigured or offline: serve what we stored earlier
+            articles = self._from_store(category, page_size)
+            if not articles:
+                raise
+            print(f"[NewsTool] NewsAPI unavailable ({e}); serving {len(articles)} stored '{category}' articles")
+            current_span().set_attribute("news.from_store", True)
+            return articles
 
         # Shuffle to add more randomness
         random.shuffle(articles)
         return articles
 
+    def _from_store(self, category: str, page_size: int) -> List[Article]:
+        # Sample from the most recent articles so repeated loads still vary
+        recent = self.store.query(category=category, limit=page_size * 3)
+        return random.sample(recent, min(page_size, len(recent)))
+
+    def search(
+        self,
+        keyword: str,
+        category: Optional[str] = None,
+        since: Optional[float] = None,
+        limit: int = 20,
+    ) -> List[Article]:
+        """Search previously fetched articles by keyword (no NewsAPI call)."""
+        return self.store.query(category=category, since=since, keyword=keyword, limit=limit)
+
+    def fetch_bulk(
+        self,
+        categories: Optional[Iterable[str]] = None,
+        pages: Iterable[int] = (1, 2, 3),
+        page_size: int = 20,
+        max_workers: int = 4,
+    ) -> Dict[str, List[Article]]:
+        """Fetch several categories and pages concurrently.
+
+        All requests share the NewsTool rate limiter; each worker thread has its own
+        `requests.Session`, which is not thread-safe. Articles are de-duplicated by URL
+        across categories (the first category in `categories` order keeps a shared
+        article), and every fetched page is written to the article store. Failed pages
+        are logged and skipped.
+        """
+        categories = list(categories or self.CATEGORIES)
+        pages = list(pages)
+        jobs = [(c, p) for c in categories for p in pages]
+
+        local = threading.local()
+        sessions: List[requests.Session] = []
+
+        def fetch(job):
+            category, page = job
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+                sessions.append(session)
+            try:
+                return self.fetch_page(category=category, page=page, page_size=page_size, session=session)
+            except Exception as e:
+                print(f"[NewsTool] Bulk fetch of {category} page {page} failed: {e}")
+                return []
+
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-bulk") as pool:
+                results = list(pool.map(fetch, jobs))
+        finally:
+            for session in sessions:
+                session.close()
+
+        seen = set()
+        by_category: Dict[str, List[Article]] = {c: [] for c in categories}
+        # pool.map preserves job order, so de-duplication is deterministic
+        for (category, _), articles in zip(jobs, results):
+            for a in articles:
+                key = article_key(a)
+                if key in seen:
+                    continue
+                seen.add(key)
+                by_category[category].append(a)
+        return by_category
+
 
-__all__ = ["NewsTool"]
\ No newline at end of file
+__all__ = ["NewsTool"]
@@ -0,0 +1,290 @@
+"""Ollama-compatible stub server for running the app without a model.
+
+    python -m tools.ollama_stub --port 11434 --tokens-per-second 30 --ttft 0.5 --failure-rate 0.05
+    OLLAMA_BASE_URL=http://localhost:11434 python app.py
+
+Implements `/api/chat` and `/api/generate` (streamed as NDJSON, or a single JSON
+object with `"stream": false`), `/api/version` (the circuit breaker's probe) and
+`/api/tags`. Replies are canned outputs in the format each chain asks for (titles,
+continuation options, image components, a story), streamed word by word after a
+time-to-first-token at a configurable tokens/second. `num_predict` and `stop`
+options are honoured like Ollama does, and `prompt_eval_count` reports only the
+tokens after the prefix shared with the model's previous prompt, like Ollama's
+prompt cache.
+
+Failure injection: `failure_rate` answers a share of calls with HTTP 500,
+`drop_rate` cuts a share of streams off halfway, and `down` fails every request
+including the health probe. Settings can be changed while running with
+`POST /_stub/config` (a JSON object of settings), e.g. during a load test.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# Streamed pieces: a word with its trailing whitespace, roughly one token each
+_PIECE_RE = re.compile(r"\S+\s*|\s+")
+
+REPLIES = {
+    "titles": '{"titles": ["Mayor Unveils Secret Tunnel Plan", "Council Stunned by Overnight Twist", '
+              '"City Wakes to a Very Strange Morning"]}',
+    "options": '{"options": ["A hidden witness comes forward with a recording.", '
+               '"The announcement turns out to be a decoy for a bigger plan.", '
+               '"A rival city responds with an even bolder promise."]}',
+    "image": '{"subject": "a mayor at a podium", "setting": "city hall at night", "lighting": "neon", '
+             '"mood": "tense", "realism_level": "photorealistic"}',
+    "story": "\n\n".join(
+        f"Paragraph {i}: officials met again as rumours spread through the markets, the river district "
+        "and the late-night radio shows, each version stranger than the last."
+        for i in range(1, 13)
+    ),
+}
+
+SETTINGS = ("tokens_per_second", "ttft", "failure_rate", "drop_rate", "down")
+
+
+def reply_for(prompt: str, replies: Dict[str, str] = REPLIES) -> str:
+    """The canned reply in the format the prompt's instructions ask for."""
+    if '"titles"' in prompt:
+        return replies["titles"]
+    if '"options"' in prompt:
+        return replies["options"]
+    if "realism_level" in prompt:
+        return replies["image"]
+    return replies["story"]
+
+
+def apply_options(reply: str, options: dict) -> List[str]:
+    """Streamed pieces of `reply`, cut at the first stop sequence and at `num_predict` pieces."""
+    for stop in options.get("stop") or ():
+        if stop and stop in reply:
+            reply = reply[: reply.index(stop)]
+    pieces = _PIECE_RE.findall(reply)
+    limit = options.get("num_predict")
+    if limit is not None and limit > 0:
+        pieces = pieces[:limit]
+    return pieces
+
+
+class PrefixCache:
+    """Ollama's single-slot prompt cache: only tokens after the prefix shared with the model's previous prompt are evaluated."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last: Dict[str, List[str]] = {}
+
+    def evaluate(self, model: str, text: str) -> Tuple[int, int]:
+        """(prompt tokens, evaluated tokens) for `text`."""
+        tokens = _TOKEN_RE.findall(text)
+        with self._lock:
+            previous = self._last.get(model, [])
+            common = 0
+            for a, b in zip(previous, tokens):
+                if a != b:
+                    break
+                common += 1
+            self._last[model] = tokens
+        return len(tokens), len(tokens) - common
+
+    def reset(self) -> None:
+        with self._lock:
+            self._last.clear()
+
+
+class OllamaStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, tokens_per_second: float = 0.0, ttft: float = 0.0,
+                 failure_rate: float = 0.0, drop_rate: float = 0.0, replies: Optional[Dict[str, str]] = None,
+                 seed: Optional[int] = None):
+        self.tokens_per_second = tokens_per_second
+        self.ttft = ttft
+        self.failure_rate = failure_rate
+        self.drop_rate = drop_rate
+        self.down = False
+        self.replies = {**REPLIES, **(replies or {})}
+        self.cache = PrefixCache()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "failed": 0, "dropped": 0, "completed": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}"
+
+    def configure(self, **settings) -> None:
+        for name, value in settings.items():
+            if name not in SETTINGS:
+                raise ValueError(f"Unknown stub setting {name!r}")
+            setattr(self, name, value)
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, name="ollama-stub", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "OllamaStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, status: int, payload) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if stub.down:
+                    return self._json(503, {"error": "stub is down"})
+                if self.path == "/api/version":
+                    return self._json(200, {"version": "0.0.0-stub"})
+                if self.path == "/api/tags":
+                    return self._json(200, {"models": [{"name": "stub:latest", "model": "stub:latest"}]})
+                self._json(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path == "/_stub/config":
+                    try:
+                        stub.configure(**body)
+                    except ValueError as e:
+                        return self._json(400, {"error": str(e)})
+                    return self._json(200, {name: getattr(stub, name) for name in SETTINGS})
+                if self.path not in ("/api/chat", "/api/generate"):
+                    return self._json(404, {"error": "not found"})
+                stub._count("requests")
+                if stub.down or stub._roll(stub.failure_rate):
+                    stub._count("failed")
+                    return self._json(500, {"error": "stub: injected failure"})
+                self._generate(body, chat=self.path == "/api/chat")
+
+            def _generate(self, body: dict, chat: bool) -> None:
+                model = body.get("model", "")
+                if chat:
+                    messages = body.get("messages", [])
+                    rendered = "".join(f"<{m.get('role')}>{m.get('content', '')}" for m in messages)
+                    task = messages[-1].get("content", "") if messages else ""
+                else:
+                    rendered = task = body.get("prompt", "")
+                total, evaluated = stub.cache.evaluate(model, rendered)
+                pieces = apply_options(reply_for(task, stub.replies), body.get("options") or {})
+
+                def line(content: str, done: bool, **extra) -> dict:
+                    out = {"model": model, "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "done": done}
+                    if chat:
+                        out["message"] = {"role": "assistant", "content": content}
+                    else:
+                        out["response"] = content
+                    out.update(extra)
+                    return out
+
+                start = time.monotonic()
+                if stub.ttft:
+                    time.sleep(stub.ttft)
+                final = {
+                    "done_reason": "stop",
+                    "prompt_eval_count": evaluated,
+                    "eval_count": len(pieces),
+                    "prompt_tokens_total": total,
+                }
+                if body.get("stream", True) is False:
+                    if stub.tokens_per_second:
+                        time.sleep(len(pieces) / stub.tokens_per_second)
+                    final["total_duration"] = int((time.monotonic() - start) * 1e9)
+                    stub._count("completed")
+                    return self._json(200, line("".join(pieces), True, **final))
+
+                # No Content-Length: the NDJSON stream ends when the connection closes, as with Ollama
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                drop_at = len(pieces) // 2 if stub._roll(stub.drop_rate) else None
+                delay = 1.0 / stub.tokens_per_second if stub.tokens_per_second else 0.0
+                try:
+                    for i, piece in enumerate(pieces):
+                        if i == drop_at:
+                            stub._count("dropped")
+                            self.close_connection = True
+                            return
+                        if delay and i:
+                            time.sleep(delay)
+                        self.wfile.write((json.dumps(line(piece, False)) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+                    final["total_duration"] = int((time.monotonic() - start) * 1e9)
+                    self.wfile.write((json.dumps(line("", True, **final)) + "\n").encode("utf-8"))
+                    stub._count("completed")
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client stopped reading (e.g. the story paragraph cut-off)
+                    pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--tokens-per-second", type=float, default=30.0, help="0 streams as fast as possible")
+    parser.add_argument("--ttft", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of calls answered with HTTP 500")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of streams cut off halfway")
+    parser.add_argument("--replies", default=None, help="JSON file overriding the titles/options/image/story replies")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    replies = None
+    if args.replies:
+        with open(args.replies, encoding="utf-8") as f:
+            replies = json.load(f)
+    stub = OllamaStub(args.host, args.port, args.tokens_per_second, args.ttft, args.failure_rate, args.drop_rate,
+                      replies=replies, seed=args.seed)
+    print(f"[OllamaStub] Serving on {stub.url} ({args.tokens_per_second} tokens/s, TTFT {args.ttft}s)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+
+
+__all__ = ["OllamaStub", "PrefixCache", "REPLIES", "apply_options", "reply_for"]
+
+
+if __name__ == "__main__":
+    main()
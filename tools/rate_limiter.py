@@ -0,0 +1,65 @@
+import os
+import time
+import threading
+from datetime import date
+from typing import Optional
+
+
+class QuotaExceededError(RuntimeError):
+    """Raised when the daily request quota is used up."""
+
+
+class RateLimiter:
+    """Token bucket (`rate` requests/second, bursts up to `burst`) with an optional daily quota.
+
+    One instance is shared by every NewsTool so concurrent fetches together stay
+    within the NewsAPI plan limits.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5, daily_quota: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._day = date.today()
+        self._used_today = 0
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        quota = int(os.getenv("NEWSAPI_DAILY_QUOTA", "100"))
+        return cls(
+            rate=float(os.getenv("NEWSAPI_RATE_PER_SECOND", "1.0")),
+            burst=int(os.getenv("NEWSAPI_BURST", "5")),
+            daily_quota=quota if quota > 0 else None,
+        )
+
+    def acquire(self) -> None:
+        """Block until a request may be sent; raise QuotaExceededError when the daily quota is spent."""
+        while True:
+            with self._lock:
+                today = date.today()
+                if today != self._day:
+                    self._day, self._used_today = today, 0
+                if self.daily_quota is not None and self._used_today >= self.daily_quota:
+                    raise QuotaExceededError(f"NewsAPI daily quota of {self.daily_quota} requests reached")
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self._used_today += 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"used_today": self._used_today, "daily_quota": self.daily_quota}
+
+
+newsapi_limiter = RateLimiter.from_env()
+
+
+__all__ = ["RateLimiter", "QuotaExceededError", "newsapi_limiter"]
@@ -0,0 +1,51 @@
+import html
+import re
+from typing import Optional
+
+from schemas import Article
+
+_TAG = re.compile(r"<[^>]+>")
+# NewsAPI truncates `content` and appends e.g. "… [+2345 chars]"
+_TRUNCATION = re.compile(r"\[\+\d+ chars\]\s*$")
+
+PREVIEW_CHARS = 500
+
+
+def normalize_text(raw: Optional[str]) -> str:
+    """Strip tags, unescape entities, drop the NewsAPI truncation marker and collapse whitespace."""
+    if not raw:
+        return ""
+    text = _TAG.sub("", raw) if "<" in raw else raw
+    if "&" in text:
+        text = html.unescape(text)
+    # Only the tail can hold the marker; searching from there avoids a scan of the whole body
+    marker = _TRUNCATION.search(text, max(0, len(text) - 32))
+    if marker:
+        text = text[: marker.start()].rstrip().rstrip("…")
+    return " ".join(text.split())
+
+
+def preview_text(text: str, limit: int = PREVIEW_CHARS) -> str:
+    return text[:limit] + ("..." if len(text) > limit else "")
+
+
+def article_preview(article: Article) -> str:
+    """Preview for articles built without one (e.g. tests or older stored rows)."""
+    return preview_text(article.content or article.description or "")
+
+
+def normalize_article(raw: dict) -> Article:
+    """Build an Article from a NewsAPI article dict in a single normalization pass."""
+    description = normalize_text(raw.get("description"))
+    content = normalize_text(raw.get("content")) or description
+    return Article(
+        title=normalize_text(raw.get("title")),
+        description=description or None,
+        content=content or None,
+        image_url=raw.get("urlToImage"),
+        url=raw.get("url"),
+        preview=preview_text(content),
+    )
+
+
+__all__ = ["article_preview", "normalize_article", "normalize_text", "preview_text", "PREVIEW_CHARS"]